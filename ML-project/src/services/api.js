@@ -11,10 +11,96 @@ async function req(path, opts = {}) {
   return res.json();
 }
 
+const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+const FINISHED = ["completed", "cancelled", "failed"];
+
 /* exposed API funcs */
-export const trainModel = (body) =>
+
+// training runs as a background job: submit, poll its status, then fetch the result
+export const submitTraining = (body) =>
   req("/train", { method: "POST", body: JSON.stringify(body) });
 
+export const getJob = (jobId) => req(`/jobs/${jobId}`);
+
+export const getJobResult = (jobId) => req(`/jobs/${jobId}/result`);
+
+export const cancelJob = (jobId) =>
+  req(`/jobs/${jobId}/cancel`, { method: "POST" });
+
+// live frames for one job: { type: "status" | "progress" | "done", ... }
+// resolves with the "done" frame; rejects if the socket drops before it
+export function streamJob(jobId, onFrame, { interval } = {}) {
+  const base = API_URL.replace(/^http/, "ws");
+  const qs = interval ? `?interval=${interval}` : "";
+  return new Promise((resolve, reject) => {
+    const ws = new WebSocket(`${base}/ws/jobs/${jobId}${qs}`);
+    let done = null;
+    ws.onmessage = (ev) => {
+      const frame = JSON.parse(ev.data);
+      if (onFrame) onFrame(frame);
+      if (frame.type === "done") done = frame;
+    };
+    ws.onclose = () => (done ? resolve(done) : reject(new Error("job stream closed")));
+  });
+}
+
+async function pollJob(jobId, onProgress, pollMs) {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (onProgress) onProgress(job);
+    if (FINISHED.includes(job.status)) return;
+    await sleep(pollMs);
+  }
+}
+
+// datasets are stored server-side by content hash; upload once, train by dataset_id
+export async function uploadDataset(body, { format = "npy", ...params } = {}) {
+  const qs = new URLSearchParams({ format, ...params });
+  const res = await fetch(`${API_URL}/datasets?${qs}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/octet-stream" },
+    body,
+  });
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
+export const listDatasets = () => req("/datasets");
+
+// data array -> dataset_id, so Edit & Re-train of the same data skips the upload
+const uploadedIds = new WeakMap();
+
+async function datasetIdFor(data, labels) {
+  if (uploadedIds.has(data)) return uploadedIds.get(data);
+  if (!data.length || labels.some((l) => Array.isArray(l))) return null; // one-hot labels stay inline
+  const cols = data[0].length + 1;
+  const flat = new Float64Array(data.length * cols); // features + label column, little-endian f64
+  data.forEach((row, i) => {
+    flat.set(row, i * cols);
+    flat[i * cols + cols - 1] = labels[i];
+  });
+  const { dataset_id } = await uploadDataset(flat, { format: "raw", n_columns: cols });
+  uploadedIds.set(data, dataset_id);
+  return dataset_id;
+}
+
+// same contract as before: resolves with { job_id, loss, accuracy, learning_rate, ... }
+// (job_id doubles as a checkpoint name for resume_from / base_model when checkpoint: true)
+// onProgress gets stream frames, or /jobs/{id} snapshots when polling
+export async function trainModel(body, { onProgress, pollMs = 500 } = {}) {
+  if (body.data && body.labels && !body.dataset_id) {
+    const dataset_id = await datasetIdFor(body.data, body.labels).catch(() => null);
+    if (dataset_id) body = { ...body, data: undefined, labels: undefined, dataset_id };
+  }
+  const { job_id } = await submitTraining(body);
+  try {
+    await streamJob(job_id, onProgress);
+  } catch {
+    await pollJob(job_id, onProgress, pollMs);
+  }
+  return getJobResult(job_id);
+}
+
 export const predict = (body) =>
   req("/predict", { method: "POST", body: JSON.stringify(body) });
 
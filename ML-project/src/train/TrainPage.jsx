@@ -479,6 +479,14 @@ const TRAIN_PAGE_SECTIONS = [
   },
 ];
 
+// Edit & Re-train warm-starts from the previous run's weights only when that is opt-in and still meaningful:
+// it defaults on for schedule / size edits (width and depth grow Net2Net-style), and is never used when the
+// edit asks for a different starting point or training dynamics.
+const WARM_START_KEYS = ["learn_rate", "epochs", "hidden_size", "num_layers"];
+const COLD_START_KEYS = ["init_id", "seed", "optimizer_choice", "dropout", "useDropout"];
+const changedKeys = (prev, next, keys) =>
+  !!prev && !!next && keys.some((k) => prev[k] !== next[k]);
+
 export default function TrainPage() {
   const { state } = useLocation();
   const navigate = useNavigate();
@@ -491,6 +499,8 @@ export default function TrainPage() {
   const [error, setError] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const hasTrainedInitially = useRef(false);
+  const lastRun = useRef(null); // { jobId, params, checkpointed } of the run a re-train may warm-start from
+  const [warmStartChoice, setWarmStartChoice] = useState(null); // null: follow the edit's default
   const [editingParam, setEditingParam] = useState(null);
   const [architectureLayersForAnalysis, setArchitectureLayersForAnalysis] =
     useState(state?.trainingParams?.architectureLayers || []);
@@ -502,7 +512,7 @@ export default function TrainPage() {
   const [isTocMobileOpen, setIsTocMobileOpen] = useState(false);
 
   const runTraining = useCallback(
-    async (paramsToUse) => {
+    async (paramsToUse, warmStart = false) => {
       /* ... (as before) ... */
       if (!paramsToUse) {
         setError("Cannot run training without parameters.");
@@ -540,7 +550,26 @@ export default function TrainPage() {
         );
       }
       try {
-        const res = await trainModel(paramsToUse);
+        // a final checkpoint is only kept when something will start from it: this warm-start chain or a resume
+        const keepCheckpoint = warmStart || !!paramsToUse.resume_from;
+        const prev = lastRun.current;
+        const res = await trainModel({
+          ...paramsToUse,
+          ...(keepCheckpoint && {
+            checkpoint: true,
+            checkpoint_every: paramsToUse.epochs,
+          }),
+          base_model:
+            warmStart && prev?.checkpointed && !paramsToUse.resume_from
+              ? prev.jobId
+              : undefined,
+        });
+        lastRun.current = {
+          jobId: res.job_id,
+          params: paramsToUse,
+          checkpointed: keepCheckpoint,
+        };
+        setWarmStartChoice(null);
         setHistory({
           loss: res.loss,
           accuracy: res.accuracy,
@@ -593,6 +622,13 @@ export default function TrainPage() {
       return updatedParams;
     });
   };
+  // warm start for the pending edit: explicit choice, else on only for lr / epochs / width / depth edits
+  const prevParams = lastRun.current?.params;
+  const coldEdit = changedKeys(prevParams, editableTrainingParams, COLD_START_KEYS);
+  const warmStart =
+    !coldEdit &&
+    (warmStartChoice ??
+      changedKeys(prevParams, editableTrainingParams, WARM_START_KEYS));
   const editableKeys = [
     "num_layers",
     "hidden_size",
@@ -881,7 +917,7 @@ export default function TrainPage() {
               </h2>{" "}
             </div>
             <motion.button
-              onClick={() => runTraining(editableTrainingParams)}
+              onClick={() => runTraining(editableTrainingParams, warmStart)}
               disabled={isLoading}
               className={`flex items-center gap-2 px-4 py-2 rounded-lg text-sm font-semibold bg-gradient-to-r from-${theme.accent}-600 to-${theme.accent}-500 text-white hover:from-${theme.accent}-500 hover:to-${theme.accent}-400 shadow-lg disabled:opacity-60 disabled:cursor-not-allowed transition-all`}
               whileHover={{
@@ -965,6 +1001,34 @@ export default function TrainPage() {
           ) : (
             <p className={theme.textMuted}>No training parameters available.</p>
           )}
+          {lastRun.current && (
+            <label
+              className={`mt-6 flex items-center gap-3 p-2 rounded-md transition-colors ${
+                coldEdit || isLoading
+                  ? "opacity-60 cursor-not-allowed"
+                  : "hover:bg-slate-700/50 cursor-pointer"
+              }`}
+            >
+              {" "}
+              <input
+                type="checkbox"
+                checked={warmStart}
+                disabled={coldEdit || isLoading}
+                onChange={(e) => setWarmStartChoice(e.target.checked)}
+                className={`form-checkbox h-5 w-5 rounded ${theme.accent}-500 text-${theme.accent}-500 border-slate-600 focus:ring-${theme.accent}-400 focus:ring-offset-slate-800 bg-slate-700`}
+              />{" "}
+              <span className={`${theme.textSecondary} text-sm`}>
+                Warm-start from the last run
+                <span className={`block text-xs ${theme.textMuted}`}>
+                  {coldEdit
+                    ? "Init, seed, optimizer or dropout changed - training from scratch."
+                    : !lastRun.current.checkpointed && warmStart
+                    ? "The last run kept no checkpoint; this run keeps one for the next re-train."
+                    : "Keeps a final checkpoint; new width / depth is grown from the old weights."}
+                </span>
+              </span>{" "}
+            </label>
+          )}
         </section>
         {/* Metrics Section */}
         <motion.section ref={metricsRef} id="metrics-section">
@@ -1032,7 +1096,7 @@ export default function TrainPage() {
                 </h3>{" "}
                 <p className={`${theme.textSecondary} text-sm`}>{error}</p>{" "}
                 <motion.button
-                  onClick={() => runTraining(editableTrainingParams)}
+                  onClick={() => runTraining(editableTrainingParams, warmStart)}
                   className={`mt-6 inline-flex items-center gap-2 px-5 py-2.5 rounded-lg text-sm font-semibold bg-${theme.accentTertiary}-600 text-white hover:bg-${theme.accentTertiary}-500 transition-colors`}
                   whileHover={{ scale: 1.05 }}
                   whileTap={{ scale: 0.95 }}
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
 from fastapi.exceptions import RequestValidationError
 import asyncio
 
@@ -15,11 +15,18 @@ app.add_middleware(
 )
 
 # now continue importing after CORS is applied
-from .train_runner import run_training_from_api
-from .predict_runner import run_prediction_from_api
+from .train_runner import run_training_from_api, run_stacked_training_from_api
+from .predict_runner import run_batched_prediction
+from .batcher import PREDICT_BATCHER
+from .model_registry import MODEL_REGISTRY
+from .dataset_registry import DATASET_REGISTRY
+from .jobs import JobManager
+from utils.checkpoint import CHECKPOINT_DIR, checkpoint_path, read_checkpoint
+from utils.model_loader import find_base_model
+from .sweeps import Sweep, SWEEPS, remember, sample_space, halving_rungs, hyperband_brackets
 
 from pydantic import BaseModel
-from typing import List, Union, Optional
+from typing import Any, Dict, List, Union, Optional, Literal
 import uuid
 import os
 from models.network import NeuralNetwork
@@ -40,21 +47,258 @@ class TrainRequest(BaseModel):
     init_id: int
     learn_rate: float
     epochs: int
-    data: List[List[float]]
-    labels: List[Union[float, List[float]]]
+    data: Optional[List[List[float]]] = None
+    labels: Optional[List[Union[float, List[float]]]] = None
+    dataset_id: Optional[str] = None            # from POST /datasets, instead of data / labels
     save_after_train: Optional[bool] = False
     filename: Optional[str] = "latest_model.npz"
     use_scheduler: Optional[bool] = False
+    dtype: Literal["float64", "float32"] = "float64"
+    metrics: Literal["eval", "running"] = "eval"
+    eval_every: int = 1
+    eval_subsample: Optional[int] = None
+    shuffle: Literal["full", "block", "none"] = "full"
+    block_size: Optional[int] = None
+    validation_split: float = 0.0
+    early_stopping: bool = False
+    patience: int = 10
+    min_delta: float = 0.0
+    restore_best_weights: bool = True
+    plateau_window: Optional[int] = None
+    plateau_tol: float = 1e-3
+    seed: Optional[int] = None
+    model_format: Literal["npz", "nnm"] = "npz"
+    profile: bool = False                       # per-phase timings in the result + a Chrome trace
+    data_parallel: Optional[int] = None         # split each mini-batch over this many local processes
+    checkpoint: bool = False                    # full checkpoints: saved_checkpoints/<job id>.npz
+    checkpoint_every: int = 10                  # epochs between checkpoints (plus one at the end)
+    resume_from: Optional[str] = None           # checkpoint name / job id to continue (its architecture wins)
+    base_model: Optional[str] = None            # saved model / checkpoint / job id to warm-start from
+    lr_horizon: Optional[int] = None            # cosine schedule length (default epochs; a resume keeps its own)
+
+class ModelVariant(BaseModel):
+    seed: Optional[int] = None
+    learn_rate: Optional[float] = None
+    dropout: Optional[float] = None
+
+class StackedTrainRequest(TrainRequest):
+    variants: List[ModelVariant]
+
+class SweepRequest(TrainRequest):
+    # field -> list of values, or {"min", "max", "log", "num"}; fields: sweeps.SWEEP_FIELDS
+    space: Dict[str, Union[List[Any], Dict[str, Any]]]
+    strategy: Literal["grid", "random"] = "grid"
+    n_trials: Optional[int] = None
+    sample_seed: Optional[int] = None            # random strategy
+    max_workers: Optional[int] = None
+    rank_by: Optional[Literal["loss", "accuracy", "val_loss", "val_accuracy"]] = None
+    # "halving" / "hyperband": short runs first, only the best 1/eta continue (see sweeps.py)
+    scheduler: Literal["full", "halving", "hyperband"] = "full"
+    eta: int = 3
+    min_epochs: Optional[int] = None            # first rung's budget (default epochs // eta**2)
 
 class PredictRequest(BaseModel):
     model_path: str
     test_data: List[List[float]]
 
+def train_response(result):
+    """Shape a `run_training_from_api` result for the frontend."""
+    return {
+        "loss": result["loss_history"],
+        "accuracy": result["acc_history"],
+        "learning_rate": result["lr_history"],
+        "metric_epochs": result["metric_epochs"],
+        "metrics_schedule": result["metrics_schedule"],
+        "val_loss": result["val_loss_history"],
+        "val_accuracy": result["val_acc_history"],
+        "epochs_run": result["epochs_run"],
+        "stopped_epoch": result["stopped_epoch"],
+        "stop_reason": result["stop_reason"],
+        "best_epoch": result["best_epoch"],
+        "threads": result.get("threads"),
+        "profile": result.get("profile"),
+        "train_seconds": result.get("train_seconds"),
+        "data_parallel": result.get("data_parallel"),
+        "checkpoint": result.get("checkpoint"),
+        "resumed_from_epoch": result.get("resumed_from_epoch"),
+        "warm_start": result.get("warm_start"),
+        "final_metrics": {
+            "loss": result["loss_history"][-1] if result["loss_history"] else None,
+            "accuracy": result["acc_history"][-1] if result["acc_history"] else None,
+            "learning_rate": result["lr_history"][-1] if result["lr_history"] else None,
+        }
+    }
+
+
+def _job_saved_model(job_id, result):
+    # the worker process saved the file; drop this process's cached copy
+    if result.get("model_file"):
+        MODEL_REGISTRY.invalidate(result["model_file"])
+
+JOBS = JobManager(training_history_store, on_finish=_job_saved_model)
+
+
+def check_training_data(request: TrainRequest):
+    if request.dataset_id is None:
+        if request.data is None or request.labels is None:
+            raise HTTPException(status_code=422, detail="Send data + labels, or a dataset_id")
+        return
+    if request.dataset_id not in DATASET_REGISTRY:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    n_features = DATASET_REGISTRY.meta(request.dataset_id)["n_features"]
+    if n_features != request.input_size:
+        raise HTTPException(status_code=422, detail=f"Dataset has {n_features} features, input_size is {request.input_size}")
+
+
+def check_resume(request: TrainRequest):
+    path = checkpoint_path(request.resume_from)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    _, meta = read_checkpoint(path)
+    if meta["epoch"] >= request.epochs:
+        raise HTTPException(status_code=422, detail=f"Checkpoint is at epoch {meta['epoch']}; epochs must be larger")
+    if meta["config"].get("input_size") != request.input_size:
+        raise HTTPException(status_code=422, detail=f"Checkpoint expects {meta['config'].get('input_size')} features")
+
+
+def check_base_model(request: TrainRequest):
+    # only a missing file is an error; an incompatible base trains from scratch (result["warm_start"] says why)
+    if request.resume_from:
+        raise HTTPException(status_code=422, detail="Send resume_from or base_model, not both")
+    if find_base_model(request.base_model) is None:
+        raise HTTPException(status_code=404, detail="Base model not found")
+
+
+# 1b. Upload a dataset once (raw body: .npy, CSV or little-endian floats), then train on its dataset_id
+@app.post("/datasets")
+async def upload_dataset(
+    request: Request,
+    format: Literal["npy", "csv", "raw"] = "npy",
+    label_column: int = -1,
+    n_columns: Optional[int] = None,       # raw only
+    dtype: Literal["float64", "float32"] = "float64",   # raw only
+    header: bool = False,                  # csv only
+):
+    body = await request.body()
+    try:
+        meta, created = await asyncio.to_thread(
+            DATASET_REGISTRY.put_bytes, body,
+            fmt=format, label_column=label_column, n_columns=n_columns, dtype=dtype, header=header,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Could not read dataset: {e}")
+    return {**meta, "created": created}
+
+
+@app.get("/datasets")
+def list_datasets():
+    return {"datasets": DATASET_REGISTRY.entries()}
+
+
+@app.get("/datasets/{dataset_id}")
+def dataset_info(dataset_id: str):
+    if dataset_id not in DATASET_REGISTRY:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return DATASET_REGISTRY.meta(dataset_id)
+
+
+@app.delete("/datasets/{dataset_id}")
+def delete_dataset(dataset_id: str):
+    if not DATASET_REGISTRY.delete(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return {"dataset_id": dataset_id, "deleted": True}
+
+
+# 2. Training runs as a background job: submit, then poll /jobs/{id} (or read /jobs/{id}/result)
 @app.post("/train")
 def train_model(request: TrainRequest):
     print("TRAINING ENDPOINT HIT")
+    check_training_data(request)
+    if request.resume_from:
+        check_resume(request)
+    if request.base_model:
+        check_base_model(request)
+    n_samples = DATASET_REGISTRY.meta(request.dataset_id)["n_samples"] if request.dataset_id else None
+    job_id = JOBS.submit(request.model_dump(), n_samples)   # field names match run_training_from_api
+    return {"job_id": job_id, "status": training_history_store[job_id]["status"]}
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [JOBS.snapshot(job_id) for job_id in list(training_history_store)]}
 
-    result = run_training_from_api(
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    if job_id not in training_history_store:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JOBS.snapshot(job_id)
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    if job_id not in training_history_store:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = training_history_store[job_id]
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Training failed: {job['error']}")
+    if job["result"] is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {"job_id": job_id, "status": job["status"], **train_response(job["result"])}
+
+
+@app.get("/jobs/{job_id}/trace")
+def job_trace(job_id: str):
+    # Chrome trace-event JSON of a job trained with profile=true (chrome://tracing, Perfetto)
+    job = training_history_store.get(job_id)
+    profile = ((job or {}).get("result") or {}).get("profile") or {}
+    if not profile.get("trace_file") or not os.path.exists(profile["trace_file"]):
+        raise HTTPException(status_code=404, detail="No trace for this job")
+    return FileResponse(profile["trace_file"], media_type="application/json", filename=f"trace_{job_id}.json")
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    if job_id not in training_history_store:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, "status": JOBS.cancel(job_id)}
+
+
+# 2a. Live progress for one job: status / progress frames, then a final "done" frame.
+# Frames are coalesced - a client that reads slower than `interval` just skips to the newest one.
+STREAM_INTERVAL = 0.25
+
+@app.websocket("/ws/jobs/{job_id}")
+async def stream_job(websocket: WebSocket, job_id: str, interval: float = STREAM_INTERVAL):
+    await websocket.accept()
+    if job_id not in training_history_store:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    sub = JOBS.subscribe(job_id, asyncio.get_running_loop())
+    try:
+        while True:
+            frame = await sub.next()
+            await websocket.send_json({**frame, "dropped": sub.dropped})
+            if frame["type"] == "done":
+                break
+            await asyncio.sleep(max(interval, 0.05))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        JOBS.unsubscribe(job_id, sub)
+
+
+@app.on_event("shutdown")
+def stop_jobs():
+    JOBS.shutdown()
+
+
+# 2b. Train K seed / learn-rate / dropout variants of one architecture as one stacked job
+@app.post("/train/stacked")
+def train_stacked(request: StackedTrainRequest):
+    check_training_data(request)
+    results = run_stacked_training_from_api(
         input_size=request.input_size,
         output_size=request.output_size,
         hidden_size=request.hidden_size,
@@ -68,23 +312,81 @@ def train_model(request: TrainRequest):
         epochs=request.epochs,
         data=request.data,
         labels=request.labels,
+        variants=[v.model_dump(exclude_none=True) for v in request.variants],
         save_after_train=request.save_after_train,
         filename=request.filename,
         use_scheduler=request.use_scheduler,
+        dtype=request.dtype,
+        seed=request.seed,
+        model_format=request.model_format,
+        dataset_id=request.dataset_id,
     )
 
     return {
-        "loss": result["loss_history"],
-        "accuracy": result["acc_history"],
-        "learning_rate": result["lr_history"],
-        "final_metrics": {
-            "loss": result["loss_history"][-1],
-            "accuracy": result["acc_history"][-1],
-            "learning_rate": result["lr_history"][-1],
-        }
+        "models": [
+            {
+                "variant": result["variant"],
+                "loss": result["loss_history"],
+                "accuracy": result["acc_history"],
+                "learning_rate": result["lr_history"],
+                "final_metrics": {
+                    "loss": result["loss_history"][-1],
+                    "accuracy": result["acc_history"][-1],
+                    "learning_rate": result["lr_history"][-1],
+                }
+            }
+            for result in results
+        ]
     }
 
     
+# 2c. Hyperparameter sweep: the trials of the search space on a local process pool (full / halving / hyperband)
+@app.post("/sweeps")
+def start_sweep(request: SweepRequest):
+    check_training_data(request)
+    if request.eta < 2 or request.epochs < 1:
+        raise HTTPException(status_code=422, detail="eta must be >= 2 and epochs >= 1")
+    brackets = None
+    try:
+        if request.scheduler == "hyperband":
+            # samples its own configs per bracket (strategy / n_trials don't apply)
+            trials, brackets = hyperband_brackets(request.space, request.epochs, request.min_epochs,
+                                                  request.eta, request.sample_seed)
+        else:
+            trials = sample_space(request.space, request.strategy, request.n_trials, request.sample_seed)
+            if request.scheduler == "halving":
+                brackets = [(list(range(len(trials))), halving_rungs(request.epochs, request.min_epochs, request.eta))]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    base = request.model_dump(exclude={"space", "strategy", "n_trials", "sample_seed", "max_workers", "rank_by",
+                                       "scheduler", "eta", "min_epochs"})
+    sweep = remember(Sweep(base, trials, request.max_workers, request.rank_by, brackets, request.eta,
+                           request.scheduler).start())
+    return {"sweep_id": sweep.sweep_id, "trials": len(trials), "scheduler": sweep.scheduler,
+            "brackets": sweep.snapshot()["brackets"], "status": sweep.status}
+
+
+@app.get("/sweeps")
+def list_sweeps():
+    return {"sweeps": [{k: v for k, v in s.snapshot().items() if k != "results"} for s in SWEEPS.values()]}
+
+
+@app.get("/sweeps/{sweep_id}")
+def sweep_status(sweep_id: str):
+    if sweep_id not in SWEEPS:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return SWEEPS[sweep_id].snapshot()
+
+
+@app.post("/sweeps/{sweep_id}/cancel")
+def cancel_sweep(sweep_id: str):
+    # queued trials are dropped; trials already running finish
+    if sweep_id not in SWEEPS:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    SWEEPS[sweep_id].cancel()
+    return {"sweep_id": sweep_id, "status": SWEEPS[sweep_id].status}
+
+
 # 3. Route for training dashboard
 @app.get("/training-history/{training_id}")
 def get_training_history(training_id: str):
@@ -100,10 +402,11 @@ def get_training_history(training_id: str):
         "final_metrics": history["final_metrics"]    # dict
     }
 
+# concurrent requests for the same model are micro-batched (api/batcher.py)
 @app.post("/predict")
-def predict(request: PredictRequest):
+async def predict(request: PredictRequest):
     try:
-        result = run_prediction_from_api(
+        result = await run_batched_prediction(
             model_path = request.model_path,
             test_data = request.test_data
         )
@@ -111,15 +414,43 @@ def predict(request: PredictRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.get("/predict/stats")
+def predict_stats():
+    return PREDICT_BATCHER.stats()
+
+@app.on_event("startup")
+def preload_models():
+    # NN_PRELOAD_MODELS="*" warms every saved model, or a comma-separated list of files
+    wanted = os.environ.get("NN_PRELOAD_MODELS", "").strip()
+    if wanted:
+        files = None if wanted == "*" else [f.strip() for f in wanted.split(",") if f.strip()]
+        print("Preloaded models:", MODEL_REGISTRY.preload(files))
+
+@app.get("/models/cache")
+def model_cache_stats():
+    return MODEL_REGISTRY.stats()
+
 @app.get("/models")
 def list_saved_models():
     try:
         models_dir = "saved_models"
-        model_files = [f for f in os.listdir(models_dir) if f.endswith(".npz")]
+        model_files = [f for f in os.listdir(models_dir) if f.endswith((".npz", ".nnm"))]
         return {"models": model_files}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not list models: {str(e)}")
 
+@app.get("/checkpoints")
+def list_checkpoints():
+    # resumable runs (POST /train with resume_from=<name>)
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return {"checkpoints": []}
+    out = []
+    for f in sorted(os.listdir(CHECKPOINT_DIR)):
+        if f.endswith(".npz"):
+            _, meta = read_checkpoint(os.path.join(CHECKPOINT_DIR, f))
+            out.append({k: v for k, v in meta.items() if k != "stats"})
+    return {"checkpoints": out}
+
 @app.exception_handler(Exception)
 async def handle_general_error(request: Request, exc: Exception):
     print("❌ Backend error:", repr(exc))
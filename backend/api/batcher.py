@@ -0,0 +1,177 @@
+"""batcher.py - dynamic micro-batching for /predict
+=================================================
+Concurrent `/predict` calls used to each run their own tiny forward pass,
+paying Python + BLAS call overhead per request. `PredictBatcher` sits in
+front of the cached `InferenceModel`s and turns concurrent requests for the
+same model into one stacked `predict`:
+
+* A request is validated and parked in its model's bucket. The bucket
+  flushes when it holds `max_batch_rows` rows, or `max_wait_ms` after its
+  oldest request arrived - whichever comes first.
+* One drain task per model: it concatenates the parked inputs, runs one
+  `predict` on a worker thread (the event loop keeps accepting requests,
+  which then form the next batch) and hands each caller its slice.
+* A single request bigger than `max_batch_rows` runs on its own.
+* Buckets are keyed by the model object, so a model reloaded from disk
+  mid-window never mixes with requests for the old one.
+* `stats()` exposes histograms (power-of-two buckets) of requests / rows per
+  batch, queue depth at flush and time spent queued, for tuning the
+  latency vs throughput trade-off.
+
+Tuning: `NN_BATCH_MAX_WAIT_MS` (default 2) and `NN_BATCH_MAX_ROWS` (1024).
+`max_wait_ms=0` still batches whatever arrives while a pass is running.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import time
+import numpy as np
+from .model_registry import MODEL_REGISTRY
+
+
+class Histogram:
+    """Counts per power-of-two upper bound (`le_1`, `le_2`, `le_4`, ...)."""
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.n, self.total, self.max = 0, 0.0, 0.0
+
+    def observe(self, v: float) -> None:
+        bound = 1
+        while bound < v:
+            bound <<= 1
+        self.counts[bound] = self.counts.get(bound, 0) + 1
+        self.n += 1
+        self.total += v
+        self.max = max(self.max, v)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.n,
+            "mean": self.total / self.n if self.n else None,
+            "max": self.max if self.n else None,
+            "buckets": {f"le_{b}": c for b, c in sorted(self.counts.items())},
+        }
+
+
+class _Bucket:
+    __slots__ = ("items", "rows", "full", "task")
+
+    def __init__(self) -> None:
+        self.items: list = []            # (X, future, enqueue time)
+        self.rows = 0
+        self.full = asyncio.Event()
+        self.task = None
+
+
+class PredictBatcher:
+    """Coalesces concurrent predictions per model into one forward pass."""
+
+    def __init__(self, registry=MODEL_REGISTRY, max_wait_ms: float | None = None,
+                 max_batch_rows: int | None = None) -> None:
+        self.registry = registry
+        if max_wait_ms is None:
+            max_wait_ms = float(os.environ.get("NN_BATCH_MAX_WAIT_MS", 2))
+        if max_batch_rows is None:
+            max_batch_rows = int(os.environ.get("NN_BATCH_MAX_ROWS", 1024))
+        self.max_wait = max(0.0, max_wait_ms) / 1e3
+        self.max_batch_rows = max(1, int(max_batch_rows))
+        self._buckets: dict = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.batches = self.requests = 0
+        self.hist = {name: Histogram() for name in ("batch_requests", "batch_rows", "queue_depth", "wait_ms")}
+
+    # -------- request side
+    async def predict(self, model_path: str, X):
+        """Outputs `(n, out_dim)` for one request's inputs, plus the model's config."""
+        hit = self.registry.peek(model_path)               # warm lookup: one os.stat
+        # miss / file changed: read + build the model off the event loop
+        model, config = hit if hit is not None else await asyncio.to_thread(self.registry.get, model_path)
+        X = np.asarray(X, dtype=model.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != model.in_dim:
+            raise ValueError(f"Expected {model.in_dim} features, got shape {X.shape}")
+
+        fut = asyncio.get_running_loop().create_future()
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets[model] = _Bucket()
+        bucket.items.append((X, fut, time.perf_counter()))
+        bucket.rows += len(X)
+        self.requests += 1
+        if bucket.rows >= self.max_batch_rows:
+            bucket.full.set()
+        if bucket.task is None:
+            bucket.task = asyncio.create_task(self._drain(model, bucket))
+        return await fut, config
+
+    # -------- batch side
+    def _take(self, bucket):
+        """Pop queued requests up to `max_batch_rows` rows (always at least one)."""
+        n, rows = 0, 0
+        for X, _, _ in bucket.items:
+            if n and rows + len(X) > self.max_batch_rows:
+                break
+            n, rows = n + 1, rows + len(X)
+        batch, bucket.items = bucket.items[:n], bucket.items[n:]
+        bucket.rows -= rows
+        if bucket.rows < self.max_batch_rows:
+            bucket.full.clear()
+        return batch, rows
+
+    async def _drain(self, model, bucket):
+        try:
+            while bucket.items:
+                if bucket.rows < self.max_batch_rows:
+                    remaining = bucket.items[0][2] + self.max_wait - time.perf_counter()
+                    if remaining > 0:
+                        try:
+                            await asyncio.wait_for(bucket.full.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+                depth = len(bucket.items)
+                batch, rows = self._take(bucket)
+                now = time.perf_counter()
+                self.batches += 1
+                self.hist["batch_requests"].observe(len(batch))
+                self.hist["batch_rows"].observe(rows)
+                self.hist["queue_depth"].observe(depth)
+                for _, _, t in batch:
+                    self.hist["wait_ms"].observe((now - t) * 1e3)
+                await self._run(model, batch)
+        finally:
+            bucket.task = None
+            if self._buckets.get(model) is bucket and not bucket.items:
+                del self._buckets[model]
+
+    async def _run(self, model, batch):
+        X = batch[0][0] if len(batch) == 1 else np.concatenate([X for X, _, _ in batch])
+        try:
+            out = await asyncio.to_thread(model.predict, X)
+        except Exception as e:
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        lo = 0
+        for Xi, fut, _ in batch:
+            if not fut.done():                               # caller may have gone away
+                fut.set_result(out[lo: lo + len(Xi)])
+            lo += len(Xi)
+
+    def stats(self) -> dict:
+        return {
+            "max_wait_ms": self.max_wait * 1e3,
+            "max_batch_rows": self.max_batch_rows,
+            "requests": self.requests,
+            "batches": self.batches,
+            "queued": sum(len(b.items) for b in self._buckets.values()),
+            **{name: h.snapshot() for name, h in self.hist.items()},
+        }
+
+
+# process-wide batcher used by /predict
+PREDICT_BATCHER = PredictBatcher()
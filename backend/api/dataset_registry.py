@@ -0,0 +1,170 @@
+"""dataset_registry.py - uploaded datasets stored by content hash
+==============================================================
+Sending the training set as `data: List[List[float]]` JSON means Pydantic
+validates every float and `prepare_dataset` converts it to NumPy again - on
+every re-train of the same data. Instead a client uploads it once
+(`POST /datasets`) and trains with `dataset_id`.
+
+* Accepted bodies: `.npy`, CSV text, or raw little-endian floats
+  (`n_columns` + `dtype` query params). One matrix, labels in `label_column`.
+* Features are stored as float64 `X.npy` / labels as `y.npy` under
+  `DATASETS_DIR/<id>/`, where `<id>` is the sha256 of shape + values - the
+  same data uploaded as CSV or `.npy` maps to the same id, and a repeat
+  upload is a no-op.
+* `meta.json` is computed once at upload: shape, dtype, class counts (for
+  integer labels) and float64 z-score stats, so training skips that pass.
+* `load()` memory-maps the arrays - the worker processes share the page
+  cache and nothing is parsed.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import numpy as np
+
+DATASETS_DIR = "saved_datasets"
+UPLOAD_FORMATS = ("npy", "csv", "raw")
+MAX_CLASSES = 1000                 # more distinct integer labels than this -> treated as regression
+
+
+# ------------------------------------------------ parsing ------------------------------------------------ #
+
+def parse_upload(body: bytes, fmt: str = "npy", label_column: int = -1, n_columns: int | None = None,
+                 dtype: str = "float64", header: bool = False):
+    """Bytes of one upload -> `(X, y)` float64 arrays."""
+    if fmt == "npy":
+        M = np.load(io.BytesIO(body), allow_pickle=False)
+    elif fmt == "csv":
+        M = np.loadtxt(io.BytesIO(body), delimiter=",", skiprows=int(header), ndmin=2)
+    elif fmt == "raw":
+        if not n_columns:
+            raise ValueError("raw uploads need n_columns")
+        M = np.frombuffer(body, dtype=np.dtype(dtype).newbyteorder("<"))
+        if M.size % n_columns:
+            raise ValueError(f"{M.size} values don't fill rows of {n_columns} columns")
+        M = M.reshape(-1, n_columns)
+    else:
+        raise ValueError(f"Unknown upload format: {fmt}")
+
+    if M.ndim != 2 or M.shape[1] < 2 or M.shape[0] == 0:
+        raise ValueError(f"Expected a non-empty 2-D matrix with a label column, got shape {M.shape}")
+    M = np.asarray(M, dtype=np.float64)
+    label_column = int(np.arange(M.shape[1])[label_column])
+    y = np.ascontiguousarray(M[:, label_column])
+    X = np.ascontiguousarray(np.delete(M, label_column, axis=1))
+    if not (np.isfinite(X).all() and np.isfinite(y).all()):
+        raise ValueError("Dataset contains NaN or inf")
+    return X, y
+
+
+def content_id(X, y) -> str:
+    h = hashlib.sha256()
+    h.update(f"{X.shape}|{y.shape}|".encode())
+    h.update(X.tobytes())
+    h.update(y.tobytes())
+    return h.hexdigest()
+
+
+def describe(X, y, dataset_id: str) -> dict:
+    """Everything training would otherwise recompute from the data."""
+    classes = None
+    if np.array_equal(y, np.round(y)) and y.min() >= 0:
+        values, counts = np.unique(y.astype(np.int64), return_counts=True)
+        if len(values) <= MAX_CLASSES:
+            classes = {str(v): int(c) for v, c in zip(values, counts)}
+    return {
+        "dataset_id": dataset_id,
+        "n_samples": int(X.shape[0]),
+        "n_features": int(X.shape[1]),
+        "dtype": "float64",
+        "class_counts": classes,
+        "n_classes": None if classes is None else int(max(map(int, classes))) + 1,
+        "mean": X.mean(axis=0).tolist(),
+        "std": (X.std(axis=0) + 1e-8).tolist(),      # same epsilon as prepare_dataset
+        "nbytes": int(X.nbytes + y.nbytes),
+    }
+
+
+# ------------------------------------------------ registry ------------------------------------------------ #
+
+class DatasetRegistry:
+    """Content-addressed store: dataset id -> `X.npy`, `y.npy`, `meta.json`."""
+
+    def __init__(self, root: str = DATASETS_DIR) -> None:
+        self.root = root
+        self._meta: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, dataset_id: str) -> str:
+        if not (len(dataset_id) == 64 and all(c in "0123456789abcdef" for c in dataset_id)):
+            raise KeyError(dataset_id)                # also keeps ids from escaping `root`
+        return os.path.join(self.root, dataset_id)
+
+    def __contains__(self, dataset_id: str) -> bool:
+        try:
+            return os.path.isfile(os.path.join(self._dir(dataset_id), "meta.json"))
+        except KeyError:
+            return False
+
+    def put(self, X, y) -> tuple[dict, bool]:
+        """Store `(X, y)`; returns `(meta, created)` - `created` is False for a known dataset."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        dataset_id = content_id(X, y)
+        if dataset_id in self:
+            return self.meta(dataset_id), False
+
+        meta = describe(X, y, dataset_id)
+        tmp = os.path.join(self.root, f".{dataset_id}.tmp{os.getpid()}.{threading.get_ident()}")
+        os.makedirs(tmp, exist_ok=True)
+        np.save(os.path.join(tmp, "X.npy"), X)
+        np.save(os.path.join(tmp, "y.npy"), y)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp, self._dir(dataset_id))   # atomic; readers never see a half-written dataset
+        except OSError:                              # same data uploaded concurrently - keep theirs
+            shutil.rmtree(tmp, ignore_errors=True)
+            return self.meta(dataset_id), False
+        return meta, True
+
+    def put_bytes(self, body: bytes, **parse_kw) -> tuple[dict, bool]:
+        return self.put(*parse_upload(body, **parse_kw))
+
+    def meta(self, dataset_id: str) -> dict:
+        with self._lock:
+            if dataset_id in self._meta:
+                return self._meta[dataset_id]
+        with open(os.path.join(self._dir(dataset_id), "meta.json")) as f:
+            meta = json.load(f)
+        with self._lock:
+            self._meta[dataset_id] = meta
+        return meta
+
+    def load(self, dataset_id: str):
+        """`(X, y, meta)` with X / y memory-mapped read-only."""
+        d = self._dir(dataset_id)
+        meta = self.meta(dataset_id)
+        X = np.load(os.path.join(d, "X.npy"), mmap_mode="r")
+        y = np.load(os.path.join(d, "y.npy"), mmap_mode="r")
+        return X, y, meta
+
+    def entries(self) -> list[dict]:
+        if not os.path.isdir(self.root):
+            return []
+        return [self.meta(name) for name in sorted(os.listdir(self.root)) if name in self]
+
+    def delete(self, dataset_id: str) -> bool:
+        if dataset_id not in self:
+            return False
+        with self._lock:
+            self._meta.pop(dataset_id, None)
+        shutil.rmtree(self._dir(dataset_id))
+        return True
+
+
+# process-wide registry used by /datasets and /train
+DATASET_REGISTRY = DatasetRegistry()
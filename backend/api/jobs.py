@@ -0,0 +1,324 @@
+"""jobs.py - background training jobs on a process pool
+=======================================================
+`POST /train` used to run the whole training loop inside the request. Now it
+submits a job and returns its id at once; the NumPy work runs in a bounded
+`ProcessPoolExecutor`, so CPU-bound training never holds the API's threads
+or the GIL.
+
+* Workers are started with "spawn" (the server is multi-threaded, forking it
+  is not safe) and only import the training code.
+* A worker reports through one `Manager().Queue()`: a "started" message, then
+  the latest epoch metrics at most every `PROGRESS_INTERVAL` seconds. A pump
+  thread in the API process writes them into `store[job_id]`.
+* Cancel: a queued job is dropped from the pool; a running job gets its
+  `Event` set, which the worker's `on_epoch_end` sees at the next progress
+  tick and stops training (partial histories are kept, nothing is saved).
+* Live streams: `subscribe()` hands out a `Subscriber` - a one-slot mailbox
+  the pump / done callback write frames into from their threads. A newer
+  frame overwrites one the client hasn't taken yet (counted in `dropped`),
+  so a slow WebSocket only ever lags by one frame and never backs up the
+  pump or the trainer.
+* BLAS threads: each job's budget comes from `thread_budget.allocate()`
+  over the jobs holding (or next in line for) a worker, recomputed on every
+  submit / finish. Workers read it before training and at each progress
+  tick; the numbers used end up in `result["threads"]`. A data-parallel
+  job's grant is split over its ranks (`thread_budget.rank_threads`).
+* `checkpoint=true` jobs write `saved_checkpoints/<job id>.npz`; a later
+  `/train` with `resume_from=<job id>` continues that run.
+* The pool (and the manager process) is created on the first submit.
+"""
+from __future__ import annotations
+import asyncio
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from .thread_budget import allocate, deployment_cap, limit_env, threadpool_limits, wanted_threads
+
+PROGRESS_INTERVAL = 0.25          # seconds between progress messages from one worker
+TRACES_DIR = "saved_traces"       # Chrome traces of profiled jobs, <job id>.json
+
+# job states
+QUEUED, RUNNING, CANCELLING = "queued", "running", "cancelling"
+COMPLETED, CANCELLED, FAILED = "completed", "cancelled", "failed"
+FINISHED = (COMPLETED, CANCELLED, FAILED)
+
+
+# ------------------------------------------------ worker side ------------------------------------------------ #
+
+def _run_job(job_id, kwargs, queue, cancel, interval, budget):
+    """Entry point inside a worker process."""
+    from .train_runner import run_training_from_api
+    from .thread_budget import rank_threads, set_blas_threads
+    from utils.checkpoint import checkpoint_path
+
+    threads = {
+        "mechanism": "threadpoolctl" if threadpool_limits is not None else "env",
+        "cap": deployment_cap(),
+        "blas_threads": None,         # budget at the start of training
+        "final": None,                # ... and at the end
+        "adjustments": 0,
+        "ranks": max(1, int(kwargs.get("data_parallel") or 1)),   # a data-parallel job splits its budget
+    }
+
+    def retune():
+        n = budget.get(job_id)
+        if not n or n == threads["final"] or not set_blas_threads(rank_threads(n, threads["ranks"])):
+            return
+        if threads["final"] is None:
+            threads["blas_threads"] = n
+        else:
+            threads["adjustments"] += 1
+        threads["final"] = n
+
+    retune()
+    if threads["final"] is None:      # no threadpoolctl: whatever the pool initializer pinned
+        threads["blas_threads"] = threads["final"] = int(os.environ.get("OMP_NUM_THREADS", 0)) or None
+
+    queue.put(("started", job_id, {"pid": os.getpid(), "blas_threads": threads["blas_threads"]}))
+    state = {"last": 0.0, "logs": None}
+
+    def on_epoch_end(epoch, logs):
+        if "loss" in logs:
+            state["logs"] = {"epoch": epoch, **logs}
+        now = time.monotonic()
+        if now - state["last"] < interval and epoch < logs["epochs"] - 1:
+            return False
+        # one IPC round per tick: publish the newest metrics, then look at the cancel flag
+        state["last"] = now
+        if state["logs"] is not None:
+            queue.put(("progress", job_id, state["logs"]))
+            state["logs"] = None
+        retune()
+        return cancel.is_set()
+
+    if kwargs.get("profile"):
+        kwargs = {**kwargs, "trace_file": os.path.join(TRACES_DIR, f"{job_id}.json")}
+    if kwargs.get("checkpoint"):
+        kwargs = {**kwargs, "checkpoint_file": checkpoint_path(job_id)}   # resume with resume_from=<job id>
+    if threads["blas_threads"]:
+        kwargs = {**kwargs, "blas_threads": threads["blas_threads"]}
+    result = run_training_from_api(**kwargs, on_epoch_end=on_epoch_end)
+    result["threads"] = threads
+    return result
+
+
+# ------------------------------------------------- API side -------------------------------------------------- #
+
+class Subscriber:
+    """One stream client: keeps only the newest frame, handed over to an asyncio loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._frame = None
+        self._lock = threading.Lock()
+        self.dropped = 0                  # frames overwritten before the client took them
+
+    def publish(self, frame: dict) -> None:
+        """Called from any thread."""
+        with self._lock:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:              # loop already closed (client gone)
+            pass
+
+    async def next(self) -> dict:
+        """Wait for the newest frame (called on the subscriber's loop)."""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            with self._lock:
+                frame, self._frame = self._frame, None
+            if frame is not None:
+                return frame
+
+
+class JobManager:
+    """Submits training jobs and mirrors their state into `store` (job id -> dict)."""
+
+    def __init__(self, store: dict, max_workers: int | None = None, on_finish=None) -> None:
+        self.store = store
+        self.max_workers = max_workers or int(os.environ.get("NN_TRAIN_WORKERS", 2))
+        self.on_finish = on_finish            # fn(job_id, result) after a successful run
+        self._lock = threading.Lock()
+        self._pool = self._manager = self._queue = None
+        self._futures, self._cancel = {}, {}
+        self._subs: dict[str, set] = {}
+        self.blas_cap = deployment_cap()
+        self._wanted: dict[str, int] = {}
+
+    def _start(self):
+        ctx = mp.get_context("spawn")
+        self._manager = ctx.Manager()
+        self._queue = self._manager.Queue()
+        self._budget = self._manager.dict()      # job id -> BLAS threads, read by the workers
+        # without threadpoolctl the only lever is the env, fixed per worker before NumPy loads
+        init = None if threadpool_limits is not None else limit_env
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx, initializer=init,
+                                         initargs=() if init is None else (max(1, self.blas_cap // self.max_workers),))
+        threading.Thread(target=self._pump, name="job-progress", daemon=True).start()
+
+    # -------- lifecycle
+    def submit(self, kwargs: dict, n_samples: int | None = None) -> str:
+        with self._lock:
+            if self._pool is None:
+                self._start()
+            job_id = uuid.uuid4().hex
+            self.store[job_id] = {
+                "job_id": job_id,
+                "status": QUEUED,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": None,
+                "loss": [],
+                "accuracy": [],
+                "learning_rate": [],
+                "final_metrics": None,
+                "result": None,
+                "error": None,
+            }
+            self._wanted[job_id] = wanted_threads(kwargs, self.blas_cap, n_samples)
+            self._futures[job_id] = None
+            self._rebalance()
+            cancel = self._manager.Event()
+            fut = self._pool.submit(_run_job, job_id, kwargs, self._queue, cancel, PROGRESS_INTERVAL, self._budget)
+            self._futures[job_id], self._cancel[job_id] = fut, cancel
+        fut.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def cancel(self, job_id: str) -> str:
+        with self._lock:
+            job = self.store[job_id]
+            fut = self._futures.get(job_id)
+            if job["status"] in FINISHED or fut is None:
+                return job["status"]
+        # outside the lock: cancelling a queued future runs `_finish` right here
+        if fut.cancel():
+            return CANCELLED
+        with self._lock:
+            if job["status"] in FINISHED:
+                return job["status"]
+            self._cancel[job_id].set()
+            job["status"] = CANCELLING
+            self._publish(job_id, self._status_frame(job))
+            return CANCELLING
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            if pool is None:
+                return
+            for ev in self._cancel.values():
+                ev.set()
+        pool.shutdown(wait=False, cancel_futures=True)   # runs `_finish` for the queued jobs
+        self._queue.put(None)
+
+    def _rebalance(self):
+        # caller holds self._lock; the pool is FIFO, so the oldest unfinished jobs hold the workers
+        active = list(self._futures)[: self.max_workers]
+        alloc = allocate({j: self._wanted[j] for j in active}, self.blas_cap)
+        if alloc:
+            self._budget.update(alloc)
+
+    # -------- state updates
+    def _pump(self):
+        queue = self._queue
+        while True:
+            msg = queue.get()
+            if msg is None:
+                return
+            kind, job_id, payload = msg
+            with self._lock:
+                job = self.store.get(job_id)
+                if job is None or job["status"] in FINISHED:
+                    continue
+                if kind == "started":
+                    job["started_at"] = time.time()
+                    if job["status"] == QUEUED:
+                        job["status"] = RUNNING
+                    self._publish(job_id, self._status_frame(job))
+                elif kind == "progress":
+                    job["progress"] = payload
+                    self._publish(job_id, {"type": "progress", "job_id": job_id, **payload})
+
+    def _finish(self, job_id, fut):
+        result = None
+        with self._lock:
+            job = self.store[job_id]
+            job["finished_at"] = time.time()
+            self._cancel.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            self._wanted.pop(job_id, None)
+            self._budget.pop(job_id, None)
+            self._rebalance()
+            if fut.cancelled():
+                job["status"] = CANCELLED
+            elif fut.exception() is not None:
+                job["status"], job["error"] = FAILED, repr(fut.exception())
+            else:
+                result = fut.result()
+                job["result"] = result
+                job["loss"] = result["loss_history"]
+                job["accuracy"] = result["acc_history"]
+                job["learning_rate"] = result["lr_history"]
+                job["final_metrics"] = {k: result.get(k) for k in ("loss", "accuracy", "learning_rate")}
+                job["status"] = CANCELLED if result.get("stop_reason") == "callback" else COMPLETED
+            self._publish(job_id, self._done_frame(job))
+            self._subs.pop(job_id, None)
+        if result is not None and self.on_finish is not None and job["status"] == COMPLETED:
+            self.on_finish(job_id, result)
+
+    # -------- live streams
+    @staticmethod
+    def _status_frame(job):
+        return {"type": "status", "job_id": job["job_id"], "status": job["status"], "progress": job["progress"]}
+
+    @staticmethod
+    def _done_frame(job):
+        result = job["result"] or {}
+        return {
+            "type": "done",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "error": job["error"],
+            "final_metrics": job["final_metrics"],
+            "epochs_run": result.get("epochs_run"),
+            "stop_reason": result.get("stop_reason"),
+        }
+
+    def _publish(self, job_id, frame):
+        # caller holds self._lock; Subscriber.publish never blocks
+        for sub in self._subs.get(job_id, ()):
+            sub.publish(frame)
+
+    def subscribe(self, job_id: str, loop: asyncio.AbstractEventLoop) -> Subscriber:
+        """Stream a job's frames into `loop`; the first frame is its current state."""
+        sub = Subscriber(loop)
+        with self._lock:
+            job = self.store[job_id]
+            if job["status"] in FINISHED:
+                sub.publish(self._done_frame(job))
+            else:
+                sub.publish(self._status_frame(job))
+                if job["progress"] is not None:
+                    sub.publish({"type": "progress", "job_id": job_id, **job["progress"]})
+                    sub.dropped = 0
+                self._subs.setdefault(job_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, job_id: str, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs.get(job_id, set()).discard(sub)
+
+    def snapshot(self, job_id: str) -> dict:
+        """Copy of a job's public state (without the full result)."""
+        with self._lock:
+            job = self.store[job_id]
+            return {k: v for k, v in job.items() if k not in ("result", "loss", "accuracy", "learning_rate")}
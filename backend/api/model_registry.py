@@ -0,0 +1,119 @@
+"""model_registry.py - in-process LRU of ready-to-serve models
+=============================================================
+`/predict` used to open the `.npz`, rebuild a `NeuralNetwork` and compile it
+on every request. `ModelRegistry` keeps compiled `InferenceModel`s in a
+size-bounded LRU so repeat predictions skip disk and construction.
+
+* Entries are keyed by file name and checked against the file's
+  `(mtime_ns, size)` on every lookup (one `os.stat`); a file overwritten by
+  `save_model` - in this process or any other - is reloaded on next use.
+* `peek()` is the warm half of `get()` (no disk read, no build), cheap
+  enough for the event loop; async callers run `get()` on a thread on a miss.
+* `invalidate()` drops an entry right away (train_runner calls it after saving).
+* `preload()` warms the cache at startup (`NN_PRELOAD_MODELS`, see api.py).
+* `stats()` reports hits / misses / evictions / reloads.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from utils.model_loader import load_inference_model
+
+MODELS_DIR = "saved_models"
+MODEL_EXTS = (".npz", ".nnm")
+
+
+def _normalise(filename: str) -> str:
+    name = os.path.basename(filename)
+    return name if name.endswith(MODEL_EXTS) else name + ".npz"
+
+
+class ModelRegistry:
+    """Thread-safe LRU: file name -> (file signature, InferenceModel, config)."""
+
+    def __init__(self, capacity: int = 8, models_dir: str = MODELS_DIR, loader=load_inference_model) -> None:
+        self.capacity = max(1, int(capacity))
+        self.models_dir = models_dir
+        self._loader = loader
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.reloads = 0
+
+    def _signature(self, name: str):
+        st = os.stat(os.path.join(self.models_dir, name))
+        return st.st_mtime_ns, st.st_size
+
+    def _cached(self, name: str, sig):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != sig:
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def peek(self, filename: str):
+        """`(model, config)` if the cached entry is current, else None; never loads (one `os.stat`)."""
+        name = _normalise(filename)
+        return self._cached(name, self._signature(name))
+
+    def get(self, filename: str):
+        """Return `(model, config)` for a saved model, loading it on a miss."""
+        name = _normalise(filename)
+        sig = self._signature(name)                   # FileNotFoundError for unknown models
+        hit = self._cached(name, sig)
+        if hit is not None:
+            return hit
+        with self._lock:
+            self.misses += 1
+            if name in self._entries:
+                self.reloads += 1                     # file changed under us
+
+        # load outside the lock so a cold model doesn't stall warm lookups
+        model, config = self._loader(name)
+        with self._lock:
+            self._entries[name] = (sig, model, config)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return model, config
+
+    def invalidate(self, filename: str | None = None) -> None:
+        """Forget one model (or every model when `filename` is None)."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(_normalise(filename), None)
+
+    def preload(self, filenames=None) -> list[str]:
+        """Load models ahead of the first request; None = every saved model (up to capacity)."""
+        if filenames is None:
+            if not os.path.isdir(self.models_dir):
+                return []
+            filenames = sorted(f for f in os.listdir(self.models_dir) if f.endswith(MODEL_EXTS))[: self.capacity]
+        loaded = []
+        for f in filenames:
+            try:
+                self.get(f)
+                loaded.append(_normalise(f))
+            except Exception as e:
+                print(f"Preload of {f} failed: {e!r}")
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "size": len(self._entries),
+                "models": list(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+            }
+
+
+# process-wide registry used by /predict
+MODEL_REGISTRY = ModelRegistry(capacity=int(os.environ.get("NN_MODEL_CACHE_SIZE", 8)))
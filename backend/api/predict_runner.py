@@ -1,24 +1,28 @@
 import numpy as np
-from utils.model_loader import load_full_model
+from .model_registry import MODEL_REGISTRY
+from .batcher import PREDICT_BATCHER
 
-def run_prediction_from_api(model_path, test_data):
-    # Load model and config
-    network, config = load_full_model(model_path)
-
-    test_data = np.array(test_data, dtype=np.float64)
-    if config.get("normalize"):
-        test_data = test_data / 10.0
-
-    predictions = []
-    for sample in test_data:
-        pred = network.feedforward(sample)
-        if len(pred) == 1:
-            predictions.append(float(pred[0]))  # Binary case
-        else:
-            predictions.append([float(p) for p in pred])  # Multiclass case
+def format_predictions(model_path, outputs):
+    if outputs.shape[1] == 1:
+        predictions = outputs[:, 0].tolist()          # Binary case
+    else:
+        predictions = outputs.tolist()                # Multiclass case
 
     return {
         "model": model_path,
-        "num_samples": len(test_data),
+        "num_samples": len(outputs),
         "predictions": predictions
     }
+
+def run_prediction_from_api(model_path, test_data, registry=MODEL_REGISTRY):
+    # Cached frozen model (reloaded only if the file changed); applies the saved norm stats itself
+    model, config = registry.get(model_path)
+
+    test_data = np.asarray(test_data, dtype=model.dtype)
+    outputs = model.predict(test_data)               # one vectorised pass, chunked internally
+    return format_predictions(model_path, outputs)
+
+async def run_batched_prediction(model_path, test_data, batcher=PREDICT_BATCHER):
+    # same result as run_prediction_from_api, but concurrent requests share one forward pass
+    outputs, config = await batcher.predict(model_path, test_data)
+    return format_predictions(model_path, outputs)
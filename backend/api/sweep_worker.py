@@ -0,0 +1,75 @@
+"""sweep_worker.py - trial side of api/sweeps.py
+==============================================
+Runs inside the sweep's worker processes. Kept free of top-level NumPy
+imports so `_init_worker` can pin the BLAS thread count (env fallback of
+`thread_budget`) before NumPy loads.
+
+* `_init_worker` attaches the sweep's shared-memory blocks once per
+  process and keeps NumPy views over them - the dataset is never pickled
+  per trial or copied per worker.
+* `run_trial` trains one configuration on those views and returns its
+  final metrics + wall time. Under a halving scheduler it trains up to
+  one rung's epoch budget and can hand back the run's `train_state()`,
+  which the next rung passes in to continue the same run.
+"""
+from __future__ import annotations
+import contextlib
+import io
+import time
+from .thread_budget import limit_env, set_blas_threads
+
+_DATA: dict = {}          # "X" / "y" -> ndarray views into shared memory
+_SHM: list = []           # keep the SharedMemory handles alive
+
+
+def _attach(name):
+    from multiprocessing import shared_memory
+    # spawned pool workers share the parent's resource tracker, which already knows the block;
+    # the sweep unlinks it when it ends
+    return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(specs: dict, blas_threads: int):
+    """Pool initializer: `specs` = key -> (shm name, shape, dtype str)."""
+    limit_env(blas_threads)
+    set_blas_threads(blas_threads)
+    import numpy as np
+    for key, (name, shape, dtype) in specs.items():
+        shm = _attach(name)
+        _SHM.append(shm)
+        _DATA[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def run_trial(trial_id: int, cfg: dict, budget: int | None = None, state: dict | None = None,
+              keep_state: bool = False) -> dict:
+    """Train one merged config (`TrainRequest` field names) on the shared dataset.
+
+    `budget` = train up to this epoch (default `cfg["epochs"]`, which is also the cosine
+    horizon); `state` = a previous rung's `train_state()` to continue from."""
+    from .train_runner import build_network
+    from utils.convergence import EarlyStopping
+
+    t0 = time.perf_counter()
+    network = build_network(cfg["input_size"], cfg["output_size"], cfg["hidden_size"], cfg["num_layers"],
+                            cfg["dropout"], cfg["optimizer_choice"], cfg["mode_id"], cfg["learn_rate"],
+                            cfg["init_id"], cfg.get("use_scheduler", False), cfg.get("dtype", "float64"),
+                            cfg.get("seed"))
+    start = network.load_train_state(state) if state is not None else 0
+    stopper = None
+    if cfg.get("early_stopping"):
+        stopper = EarlyStopping(cfg.get("patience", 10), cfg.get("min_delta", 0.0), cfg.get("restore_best_weights", True))
+    with contextlib.redirect_stdout(io.StringIO()):          # per-100-epoch prints of every trial
+        network.train(X=_DATA["X"], y=_DATA["y"], epochs=budget or cfg["epochs"], batch_size=cfg.get("batch_size"),
+                      lr_min=1e-4, metrics=cfg.get("metrics", "eval"), eval_every=cfg.get("eval_every", 1),
+                      eval_subsample=cfg.get("eval_subsample"), validation_split=cfg.get("validation_split", 0.0),
+                      early_stopping=stopper, initial_epoch=start, lr_horizon=cfg["epochs"])
+    row = {
+        "trial": trial_id,
+        **getattr(network, "final_metrics", {}),
+        "epochs_run": len(network.lr_history),
+        "stop_reason": network.stop_reason,
+        "wall_time": time.perf_counter() - t0,
+    }
+    if keep_state:
+        row["state"] = network.train_state()
+    return row
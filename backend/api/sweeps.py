@@ -0,0 +1,303 @@
+"""sweeps.py - parallel hyperparameter sweeps over TrainRequest fields
+====================================================================
+Tuning by re-posting `/train` with hand-edited requests runs one config at
+a time and re-sends the dataset each time. A sweep takes one base request
+plus a search space and runs every trial on a local process pool.
+
+* Space: field -> list of values, or `{"min", "max", "log", "num"}` range.
+  `strategy="grid"` takes the product of all lists (ranges need `num`);
+  `"random"` draws `n_trials` configs (ranges uniform / log-uniform).
+  Fields: `SWEEP_FIELDS`; integer fields are rounded.
+* The dataset is prepared once (labels / z-score, compute dtype) and
+  copied into `multiprocessing.shared_memory`; workers map it in their
+  initializer (api/sweep_worker.py), so trials never pickle it.
+* Workers split the BLAS thread budget evenly (`thread_budget`).
+* Results: one row per trial (params, final metrics, epochs run, wall
+  time), ranked by `rank_by` - `val_loss` when there is a validation
+  split, else `loss`.
+
+Schedulers
+----------
+* "full"      - every trial runs all `epochs`.
+* "halving"   - successive halving: every trial runs `min_epochs`, the best
+                1/`eta` continue to `eta` x that budget, ... up to `epochs`.
+                Survivors resume from their weights, optimizer state and RNG
+                streams (`NeuralNetwork.train_state()`), and the cosine
+                schedule spans `epochs` throughout - a survivor ends exactly
+                where a full run of its config would.
+* "hyperband" - several halving brackets over freshly sampled configs, from
+                many short trials down to a few full-length ones, so a
+                too-aggressive `min_epochs` can't discard a slow starter.
+Rungs are synchronous (every trial of a rung finishes before the cut).
+`epochs_trained` vs `epochs_full` in the snapshot is the CPU-epoch saving
+over running every trial in full. Early stopping is ignored under a
+halving scheduler - the rungs already stop the bad trials.
+
+Memory: a sweep drops the request's inline `data` / `labels` once they are
+in shared memory, and `remember()` keeps at most `MAX_FINISHED_SWEEPS`
+finished sweeps (oldest dropped first; running ones are always kept).
+"""
+from __future__ import annotations
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from .train_runner import load_dataset, prepare_dataset
+from .thread_budget import deployment_cap
+from .sweep_worker import _init_worker, run_trial
+
+SCHEDULERS = ("full", "halving", "hyperband")
+SWEEP_FIELDS = ("hidden_size", "num_layers", "learn_rate", "optimizer_choice", "init_id", "dropout", "batch_size")
+INT_FIELDS = ("hidden_size", "num_layers", "optimizer_choice", "init_id", "batch_size")
+MAX_TRIALS = 1000
+LOWER_IS_BETTER = ("loss", "val_loss")
+INLINE_FIELDS = ("data", "labels")            # request fields holding the dataset itself
+MAX_FINISHED_SWEEPS = int(os.environ.get("NN_MAX_FINISHED_SWEEPS", 20))
+
+# sweep states
+RUNNING, COMPLETED, CANCELLED, FAILED = "running", "completed", "cancelled", "failed"
+
+
+# ------------------------------------------------ search space ------------------------------------------------ #
+
+def _cast(field, v):
+    return int(round(v)) if field in INT_FIELDS and v is not None else v
+
+
+def _grid_values(field, spec):
+    if isinstance(spec, list):
+        return spec
+    if "num" not in spec:
+        raise ValueError(f"grid range for {field} needs 'num'")
+    space = np.geomspace if spec.get("log") else np.linspace
+    return [_cast(field, float(v)) for v in space(spec["min"], spec["max"], int(spec["num"]))]
+
+
+def _draw(field, spec, rng):
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    lo, hi = float(spec["min"]), float(spec["max"])
+    v = np.exp(rng.uniform(np.log(lo), np.log(hi))) if spec.get("log") else rng.uniform(lo, hi)
+    return _cast(field, float(v))
+
+
+def sample_space(space: dict, strategy: str = "grid", n_trials: int | None = None, seed=None) -> list[dict]:
+    """Expand a search space into a list of `{field: value}` trial overrides."""
+    unknown = set(space) - set(SWEEP_FIELDS)
+    if unknown:
+        raise ValueError(f"Can't sweep over {sorted(unknown)}; allowed: {SWEEP_FIELDS}")
+    if strategy == "grid":
+        fields = list(space)
+        trials = [dict(zip(fields, combo)) for combo in itertools.product(*(_grid_values(f, space[f]) for f in fields))]
+        if n_trials:
+            trials = trials[:n_trials]
+    elif strategy == "random":
+        if not n_trials:
+            raise ValueError("random search needs n_trials")
+        rng = np.random.default_rng(seed)
+        trials = [{f: _draw(f, spec, rng) for f, spec in space.items()} for _ in range(n_trials)]
+    else:
+        raise ValueError(f"Unknown sweep strategy: {strategy}")
+    if len(trials) > MAX_TRIALS:
+        raise ValueError(f"{len(trials)} trials; the limit is {MAX_TRIALS}")
+    return trials
+
+
+# ------------------------------------------------ halving schedule ------------------------------------------------ #
+
+def halving_rungs(max_epochs: int, min_epochs: int | None = None, eta: int = 3) -> list[int]:
+    """Epoch budgets of one halving bracket: `max_epochs * eta**-s`, ..., `max_epochs / eta`, `max_epochs`."""
+    eta = max(2, int(eta))
+    min_epochs = max(1, min(min_epochs or max_epochs // eta ** 2, max_epochs))
+    s = int(np.log(max_epochs / min_epochs) / np.log(eta) + 1e-9)
+    return [max(1, int(round(max_epochs / eta ** (s - i)))) for i in range(s + 1)]
+
+
+def hyperband_brackets(space: dict, max_epochs: int, min_epochs: int | None = None, eta: int = 3,
+                       seed=None) -> tuple[list[dict], list[tuple[list[int], list[int]]]]:
+    """Hyperband: one halving bracket per starting budget, each over its own random configs.
+
+    Returns `(trials, brackets)`, a bracket being `(trial indices, rung budgets)`."""
+    rungs = halving_rungs(max_epochs, min_epochs, eta)
+    s_max = len(rungs) - 1
+    seeds = np.random.SeedSequence(seed).spawn(s_max + 1)
+    trials, brackets = [], []
+    for s in range(s_max, -1, -1):
+        n = int(np.ceil((s_max + 1) / (s + 1) * eta ** s))
+        brackets.append((list(range(len(trials), len(trials) + n)), rungs[s_max - s:]))
+        trials += sample_space(space, "random", n, seeds[s])
+    if len(trials) > MAX_TRIALS:
+        raise ValueError(f"{len(trials)} trials; the limit is {MAX_TRIALS}")
+    return trials, brackets
+
+
+# ------------------------------------------------ shared data ------------------------------------------------ #
+
+class SharedArrays:
+    """Named shared-memory copies of a few arrays; `specs` is what workers need to map them."""
+
+    def __init__(self, arrays: dict) -> None:
+        self._blocks, self.specs = [], {}
+        for key, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, a.nbytes))
+            np.ndarray(a.shape, a.dtype, buffer=shm.buf)[...] = a
+            self._blocks.append(shm)
+            self.specs[key] = (shm.name, a.shape, a.dtype.str)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+
+# ------------------------------------------------ sweep ------------------------------------------------ #
+
+class Sweep:
+    """One sweep: prepares + shares the data, runs the trials on its own pool, keeps the table.
+
+    `brackets` = `[(trial indices, rung epoch budgets), ...]`, run one after the other;
+    the default is one single-rung bracket of every trial at `epochs` (scheduler "full").
+    """
+
+    def __init__(self, base: dict, trials: list[dict], max_workers: int | None = None,
+                 rank_by: str | None = None, brackets: list | None = None, eta: int = 3,
+                 scheduler: str = "full") -> None:
+        self.sweep_id = uuid.uuid4().hex
+        self.base, self.trials = base, trials
+        self.brackets = brackets or [(list(range(len(trials))), [base["epochs"]])]
+        self.eta, self.scheduler = max(2, int(eta)), scheduler
+        self.max_workers = max(1, min(max_workers or int(os.environ.get("NN_TRAIN_WORKERS", 2)), len(trials)))
+        self.rank_by = rank_by or ("val_loss" if base.get("validation_split") else "loss")
+        self.status, self.error = RUNNING, None
+        self.results: dict[int, dict] = {}          # trial index -> latest row
+        self.position = (0, 0)                      # (bracket, rung) being run
+        self.started_at, self.finished_at = time.time(), None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"sweep-{self.sweep_id[:8]}", daemon=True).start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        shared = None
+        try:
+            b = self.base
+            data, labels, stats = load_dataset(b.get("data"), b.get("labels"), b.get("dataset_id"))
+            X, y, output_size, _ = prepare_dataset(data, labels, b["mode_id"], b["output_size"], b.get("dtype", "float64"), stats)
+            shared = SharedArrays({"X": X, "y": y})
+            self._drop_inline_data()                  # the trials only need the shared copy
+            del data, labels, X, y, b
+            base = {k: v for k, v in self.base.items() if k != "dataset_id"}
+            base["output_size"] = output_size
+            if any(len(rungs) > 1 for _, rungs in self.brackets):
+                base["early_stopping"] = False
+
+            threads = max(1, deployment_cap() // self.max_workers)
+            with ProcessPoolExecutor(self.max_workers, mp_context=mp.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(shared.specs, threads)) as pool:
+                for bracket, (ids, rungs) in enumerate(self.brackets):
+                    self._halve(pool, base, bracket, ids, rungs)
+                    if self._cancel.is_set():
+                        break
+            self.status = CANCELLED if self._cancel.is_set() else COMPLETED
+        except Exception as e:
+            self.status, self.error = FAILED, repr(e)
+        finally:
+            self._drop_inline_data()
+            if shared is not None:
+                shared.close()
+            self.finished_at = time.time()
+
+    def _drop_inline_data(self):
+        self.base = {k: v for k, v in self.base.items() if k not in INLINE_FIELDS}
+
+    def _halve(self, pool, base, bracket, ids, rungs):
+        """Successive halving: run `ids` up to each rung's budget, continue the best 1/eta."""
+        alive, states = list(ids), {}
+        for rung, budget in enumerate(rungs):
+            self.position = (bracket, rung)
+            last = rung == len(rungs) - 1
+            futures = {pool.submit(run_trial, i, {**base, **self.trials[i]}, budget, states.pop(i, None), not last): i
+                       for i in alive}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    row = fut.result()
+                except Exception as e:
+                    row = {"trial": i, "error": repr(e)}
+                if "state" in row:
+                    states[i] = row.pop("state")
+                self._record(i, row, bracket, rung, budget)
+                if self._cancel.is_set():
+                    for f in futures:
+                        f.cancel()
+                    return
+            if not last:
+                with self._lock:
+                    ranked = sorted((self.results[i] for i in alive if i in states), key=self._rank_key)
+                alive = [r["trial"] for r in ranked[:max(1, len(alive) // self.eta)]]
+                states = {i: states[i] for i in alive}
+
+    def _record(self, i, row, bracket, rung, budget):
+        with self._lock:
+            prev = self.results.get(i, {})
+            wall = prev.get("wall_time", 0.0) + row.get("wall_time", 0.0)     # summed over rungs
+            self.results[i] = {**row, "wall_time": wall, "budget": budget, "bracket": bracket, "rung": rung,
+                               "params": self.trials[i]}
+
+    def _rank_key(self, r):
+        # failed trials last, then the ones that got further, then the metric
+        sign = 1 if self.rank_by in LOWER_IS_BETTER else -1
+        return ("error" in r, -r.get("budget", 0), r.get(self.rank_by) is None, sign * (r.get(self.rank_by) or 0.0))
+
+    def table(self) -> list[dict]:
+        """Trials with at least one finished rung, best first (failed trials last)."""
+        with self._lock:
+            rows = list(self.results.values())
+        ranked = sorted(rows, key=self._rank_key)
+        return [{"rank": i + 1, **r} for i, r in enumerate(ranked)]
+
+    def snapshot(self) -> dict:
+        table = self.table()
+        return {
+            "sweep_id": self.sweep_id,
+            "status": self.status,
+            "error": self.error,
+            "scheduler": self.scheduler,
+            "rank_by": self.rank_by,
+            "trials": len(self.trials),
+            "finished": len(table),
+            "brackets": [{"trials": len(ids), "rungs": rungs} for ids, rungs in self.brackets],
+            "position": {"bracket": self.position[0], "rung": self.position[1]},
+            "max_workers": self.max_workers,
+            "elapsed": (self.finished_at or time.time()) - self.started_at,
+            "cpu_seconds": sum(r.get("wall_time", 0.0) for r in table),
+            "epochs_trained": sum(r.get("epochs_run", 0) for r in table),
+            "epochs_full": len(self.trials) * self.base["epochs"],
+            "best": table[0] if table and "error" not in table[0] else None,
+            "results": table,
+        }
+
+
+# sweep id -> Sweep
+SWEEPS: dict[str, Sweep] = {}
+
+
+def remember(sweep: Sweep) -> Sweep:
+    """Register a sweep in `SWEEPS`, dropping the oldest finished ones past `MAX_FINISHED_SWEEPS`."""
+    SWEEPS[sweep.sweep_id] = sweep
+    finished = [sid for sid, s in list(SWEEPS.items()) if s.finished_at is not None]
+    for sid in finished[:max(0, len(finished) - MAX_FINISHED_SWEEPS)]:
+        SWEEPS.pop(sid, None)
+    return sweep
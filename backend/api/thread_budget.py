@@ -0,0 +1,83 @@
+"""thread_budget.py - BLAS thread budget for concurrent training jobs
+===================================================================
+Every NumPy matmul runs on the BLAS thread pool, which defaults to one
+thread per core *per process*. Two or three training workers then
+oversubscribe the box, while a small network gains nothing from 16 threads.
+
+* `NN_BLAS_THREADS` caps the threads all jobs share (default: every core).
+* `wanted_threads()` sizes a job from its biggest matmul (batch rows x
+  fan-in x fan-out): below `FLOPS_PER_THREAD` of work a second thread is
+  pure overhead.
+* `allocate()` splits the cap over the running jobs (water-filling: small
+  jobs take what they need, the rest is shared by the big ones).
+  `JobManager` re-runs it whenever a job starts or finishes and publishes
+  the numbers; workers pick up their new budget at the next progress tick.
+* A data-parallel job splits its grant over its ranks (`rank_threads()`),
+  rank 0 included; worker ranks keep the split the job started with.
+* Applying a budget needs `threadpoolctl`. Without it, workers fall back
+  to the `*_NUM_THREADS` env vars set when the pool starts - an even,
+  fixed `cap // max_workers` split that can't change at runtime.
+"""
+from __future__ import annotations
+import contextlib
+import os
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:                    # optional: static env-var split instead
+    threadpool_limits = None
+
+FLOPS_PER_THREAD = 1 << 21             # multiply-adds per matmul worth one more BLAS thread
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+def deployment_cap() -> int:
+    return max(1, int(os.environ.get("NN_BLAS_THREADS", 0)) or os.cpu_count() or 1)
+
+
+def wanted_threads(job: dict, cap: int | None = None, n_samples: int | None = None) -> int:
+    """Threads a `run_training_from_api` kwargs dict can use, from its layer sizes and batch rows."""
+    cap = cap or deployment_cap()
+    dims = [job["input_size"]] + [job["hidden_size"]] * job["num_layers"] + [job["output_size"]]
+    rows = job.get("batch_size") or n_samples or len(job.get("data") or ()) or 1
+    work = rows * max(fi * fo for fi, fo in zip(dims[:-1], dims[1:]))
+    return int(min(cap, max(1, work // FLOPS_PER_THREAD)))
+
+
+def allocate(wanted: dict, cap: int | None = None) -> dict:
+    """Split `cap` threads over jobs (`job id -> wanted`); every job gets at least one."""
+    cap = cap or deployment_cap()
+    out, remaining = {}, cap
+    order = sorted(wanted, key=wanted.get)
+    for i, job_id in enumerate(order):
+        share = max(1, remaining // (len(order) - i))
+        out[job_id] = min(wanted[job_id], share)
+        remaining = max(0, remaining - out[job_id])
+    return out
+
+
+def rank_threads(granted: int, ranks: int = 1) -> int:
+    """Each rank's share of a job's thread grant."""
+    return max(1, int(granted) // max(1, int(ranks)))
+
+
+def limit_env(n: int) -> None:
+    """Pool initializer: pin BLAS threads via env vars (before the worker imports NumPy)."""
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(n)
+
+
+def set_blas_threads(n: int) -> bool:
+    """Resize the running BLAS pool; False when threadpoolctl isn't installed."""
+    if threadpool_limits is None:
+        return False
+    threadpool_limits(limits=int(n), user_api="blas")
+    return True
+
+
+def blas_limit(n: int | None):
+    """Context manager: BLAS pool at `n` threads inside, previous size after (no-op without threadpoolctl)."""
+    if threadpool_limits is None or not n:
+        return contextlib.nullcontext()
+    return threadpool_limits(limits=int(n), user_api="blas")
@@ -1,11 +1,108 @@
 import numpy as np
 import json
+import os
+import time
 from models.network import NeuralNetwork
+from models.ensemble import StackedEnsemble
+from models.data_parallel import DataParallel
+from models.morphism import warm_start
 from utils.config import MODES
 from utils.winit import random_init, xavier_init, he_init
+from utils.optimizers import OPTIMIZER_NAMES
+from utils.datasets import Dataset
+from utils.convergence import EarlyStopping
+from utils.profiling import Profiler
+from utils.checkpoint import CheckpointWriter, checkpoint_fields, checkpoint_path, read_checkpoint
+from utils.model_loader import find_base_model, load_full_model
+from .model_registry import MODEL_REGISTRY
+from .dataset_registry import DATASET_REGISTRY
+from .thread_budget import blas_limit, deployment_cap, limit_env, rank_threads
 
 WEIGHT_INITS = {1: random_init, 2: xavier_init, 3: he_init}
-OPT_MAP  = {"SGD":1, "RMSProp":2, "Adam":3}
+OPT_MAP  = {name: i for i, name in OPTIMIZER_NAMES.items()}
+
+def prepare_dataset(data, labels, mode_id, output_size, dtype="float64", stats=None):
+    """Shape labels for the mode, z-score the features if asked; returns (data, labels, output_size, norm_stats).
+
+    `stats` = precomputed float64 `(mean, std)` (e.g. from the dataset registry) skips the stats pass.
+    Arrays already in the right dtype (e.g. the registry's memmaps) pass through uncopied; only
+    z-scoring makes a new array.
+    """
+    config = MODES[mode_id]
+
+    # ------------------------------------------------- labels ↔ output_size
+    labels  = np.asarray(labels, dtype=np.float64)
+    if labels.ndim == 1:                               # scalar labels → maybe one-hot
+        if mode_id == 5:                               # softmax case → one-hot
+            n_classes = int(labels.max()) + 1
+            labels    = np.eye(n_classes)[labels.astype(int)]
+            output_size = n_classes                    # ✅ keep sizes in sync
+        else:
+            labels = labels.reshape(-1, 1)             # column-vector for binary/regs
+            output_size = 1
+
+    labels = np.asarray(labels, dtype=dtype)
+    if labels.ndim == 2 and labels.shape[1] == 1:
+        labels = labels.reshape(-1)
+
+    # ------------------------------------------------- data normalisation
+    # stats are always computed in float64, then the data drops to the compute dtype
+    norm_stats = None               # default: no scaling
+    data = np.asarray(data, dtype=np.float64 if config.get("normalize") else dtype)
+    if config.get("normalize"):
+        if stats is not None:
+            mu, sigma = (np.asarray(s, dtype=np.float64) for s in stats)
+        else:
+            mu, sigma = data.mean(axis=0), data.std(axis=0) + 1e-8
+        data = (data - mu) / sigma                     # a new array: the caller's (or the mmap's) is untouched
+        norm_stats = {"method": "zscore", "mean": mu, "std": sigma}
+    data = data.astype(dtype, copy=False)
+
+    return data, labels, output_size, norm_stats
+
+
+def prepare_stream(dataset, mode_id, output_size, stats=None):
+    """`prepare_dataset` for an out-of-core `Dataset`: stats come from one streaming pass (or `stats`)."""
+    config = MODES[mode_id]
+    norm_stats = None
+    if mode_id == 5 and dataset.n_classes:
+        output_size = dataset.n_classes
+    elif mode_id != 5:
+        output_size = 1
+    if config.get("normalize"):
+        mu, sigma = dataset.compute_stats() if stats is None else (np.asarray(s, dtype=np.float64) for s in stats)
+        dataset.norm = (mu, sigma)               # applied batch by batch on the prefetch thread
+        norm_stats = {"method": "zscore", "mean": mu, "std": sigma}
+    return dataset, output_size, norm_stats
+
+
+def load_dataset(data, labels, dataset_id=None):
+    """Inline `(data, labels)`, or the registry's mmapped arrays + stats for `dataset_id`."""
+    if dataset_id is None:
+        return data, labels, None
+    X, y, meta = DATASET_REGISTRY.load(dataset_id)
+    print("DATASET: " + dataset_id[:12] + " (" + str(meta["n_samples"]) + " x " + str(meta["n_features"]) + ")")
+    return X, y, (meta["mean"], meta["std"])
+
+
+def build_network(input_size, output_size, hidden_size, num_layers, dropout, optimizer_choice,
+                  mode_id, learn_rate, init_id, use_scheduler=False, dtype="float64", seed=None):
+    """`NeuralNetwork` for the API's field names (init_id -> WEIGHT_INITS, mode_id -> MODES)."""
+    return NeuralNetwork(
+        input_dim=input_size,
+        hidden_units=hidden_size,
+        hidden_layers_count=num_layers,
+        output_dim=output_size,
+        mode_cfg=MODES[mode_id],
+        dropout_rate=dropout,
+        init_fn=WEIGHT_INITS[init_id],
+        optimizer_choice=optimizer_choice,
+        use_scheduler=use_scheduler,   # pass the scheduler flag
+        learn_rate=learn_rate,         # pass your 0.001 base LR
+        dtype=dtype,
+        seed=seed,
+    )
+
 
 def run_training_from_api(
     input_size,
@@ -19,17 +116,45 @@ def run_training_from_api(
     learn_rate,
     epochs,
     init_id,          # int 1-3 from the UI
-    data,
+    data,             # nested lists / array, or a utils.datasets.Dataset (labels then ignored)
     labels,
     save_after_train=False,
     filename="latest_model.npz",
     use_scheduler=False,
     on_epoch_end=None,
+    dtype="float64",  # compute dtype: "float64" | "float32"
+    metrics="eval",   # "eval" (dropout-free pass) | "running" (from training mini-batches)
+    eval_every=1,
+    eval_subsample=None,
+    shuffle="full",   # "full" | "block" | "none", see utils/batching.py
+    block_size=None,
+    validation_split=0.0,
+    early_stopping=False,
+    patience=10,
+    min_delta=0.0,
+    restore_best_weights=True,
+    plateau_window=None,
+    plateau_tol=1e-3,
+    seed=None,        # seeds init, shuffling and dropout; None = nondeterministic
+    model_format="npz",  # "npz" | "nnm" (memory-mappable, utils/model_format.py)
+    dataset_id=None,  # uploaded dataset (api/dataset_registry.py) instead of data / labels
+    profile=False,    # time each phase of train() (utils/profiling.py); summary in result["profile"]
+    trace_file=None,  # with profile: also write a Chrome trace JSON here
+    data_parallel=None,  # split each mini-batch over this many local processes (models/data_parallel.py)
+    checkpoint=False,    # write full checkpoints (utils/checkpoint.py) every `checkpoint_every` epochs + at the end
+    checkpoint_every=10,
+    checkpoint_file=None,  # default: saved_checkpoints/<filename>.npz
+    resume_from=None,    # checkpoint name / job id: continue that run (architecture + optimizer from the file)
+    base_model=None,     # saved model / checkpoint / job id to warm-start from (models/morphism.py)
+    lr_horizon=None,     # epochs the cosine schedule spans; default `epochs` (the checkpoint's when resuming)
+    blas_threads=None,   # this job's BLAS thread grant (api/thread_budget.py); None = the deployment cap
 ):
-    # ------------------------------------------------- config + init
-    weight_init_fn = WEIGHT_INITS[init_id]     # weight init function
-    config = MODES[mode_id]   
-    
+    """Build, train and optionally save one network from the API's fields; returns the result dict.
+
+    Resuming (`resume_from`) keeps the checkpoint's architecture, normalisation and LR schedule:
+    its `lr_horizon` and `lr_min` carry over unless `lr_horizon` is given, so extending a
+    finished run continues at the end of its cosine curve instead of restarting it.
+    """
     # ------------------------------------------------- for debugging
     print("\nBATCH SIZE: " +  str(batch_size))
     print("EPOCHS: " + str(epochs))
@@ -37,9 +162,7 @@ def run_training_from_api(
     print("\n-\n")
     print("LEARNING RATE: " + str(learn_rate))
     print("LR SCHEDULER: " + str(use_scheduler))
-    print("\n-\n")
-    print("FEATURE SHAPE: " + str(np.array(data).shape))
-    print("LABELS SHAPE: " + str(np.array(labels).shape))
+    print("DTYPE: " + str(dtype))
     print("\n-\n")
     print("INPUT SIZE: " + str(input_size))
     print("OUTPUT SIZE: " + str(output_size))
@@ -58,12 +181,8 @@ def run_training_from_api(
     elif mode_id == 5:
         print("5: ReLU + softmax + CE\n")
     
-    if optimizer_choice == 1:
-        print("SGD\n")
-    elif optimizer_choice == 2:
-        print("RMSProp\n")
-    elif optimizer_choice == 3:
-        print("Adam\n")
+    if optimizer_choice in OPTIMIZER_NAMES:
+        print(OPTIMIZER_NAMES[optimizer_choice] + "\n")
 
     if init_id == 1:
         print("Random init\n")
@@ -73,70 +192,223 @@ def run_training_from_api(
         print("He init\n")
     
     print("Model Training:\n")
-    
-    # ------------------------------------------------- labels ↔ output_size
-    labels  = np.array(labels, dtype=np.float64)
-    if labels.ndim == 1:                               # scalar labels → maybe one-hot
-        if mode_id == 5:                               # softmax case → one-hot
-            n_classes = int(labels.max()) + 1
-            labels    = np.eye(n_classes)[labels.astype(int)]
-            output_size = n_classes                    # ✅ keep sizes in sync
-        else:
-            labels = labels.reshape(-1, 1)             # column-vector for binary/regs
-            output_size = 1
 
-    labels = np.array(labels, dtype=np.float64)
-    if labels.ndim == 2 and labels.shape[1] == 1:
-        labels = labels.reshape(-1)
+    # ------------------------------------------------- resume: the checkpoint's build config wins
+    resume_state = None
+    lr_min = 1e-4
+    if resume_from:
+        resume_state, meta = read_checkpoint(checkpoint_path(resume_from))
+        if meta["epoch"] >= epochs:
+            raise ValueError(f"Checkpoint {meta['file']} is already at epoch {meta['epoch']}; ask for more epochs")
+        cfg = meta["config"]
+        input_size, hidden_size, num_layers = cfg["input_size"], cfg["hidden_size"], cfg["num_layers"]
+        dropout, optimizer_choice, mode_id = cfg["dropout"], cfg["optimizer_choice"], cfg["mode_id"]
+        learn_rate, init_id, use_scheduler = cfg["learn_rate"], cfg["init_id"], cfg["use_scheduler"]
+        dtype, seed = cfg["dtype"], cfg["seed"]
+        lr_horizon = lr_horizon or meta["lr_horizon"]
+        if meta["lr_min"] is not None:
+            lr_min = meta["lr_min"]
+        print("RESUMING: " + meta["file"] + " at epoch " + str(meta["epoch"]) + "\n")
 
-    # ------------------------------------------------- data normalisation
-    data = np.array(data, dtype=np.float64)
-    if config.get("normalize"):
-        mu, sigma = data.mean(axis=0), data.std(axis=0) + 1e-8
-        data = (data - mu) / sigma
+    # ------------------------------------------------- warm start: the base model's weights + normalisation
+    base = None
+    if base_model and resume_state is None:
+        found = find_base_model(base_model)
+        if found is None:
+            raise FileNotFoundError(f"Base model {base_model} not found")
+        base_file, base_dir = found
+        base, base_config = load_full_model(base_file, directory=base_dir)
+        print("WARM START FROM: " + os.path.join(base_dir, base_file) + "\n")
+
+    data, labels, stats = load_dataset(data, labels, dataset_id)
+    if resume_state is not None and meta["stats"] is not None:
+        stats = meta["stats"]                    # normalise exactly as the checkpointed run did
+    elif (base is not None and base.norm_method == "zscore" and base_config is MODES[mode_id]
+          and base.in_dim == input_size):
+        stats = (base.norm_mean, base.norm_std)  # the base model's weights expect its scaling
+    if isinstance(data, Dataset):
+        data, output_size, norm_stats = prepare_stream(data, mode_id, output_size, stats)
+        labels = None
+        print("DATASET: " + type(data).__name__ + " with " + str(data.n_features) + " features\n")
+    else:
+        data, labels, output_size, norm_stats = prepare_dataset(data, labels, mode_id, output_size, dtype, stats)
+        print("FEATURE SHAPE: " + str(data.shape))
+        print("LABELS SHAPE: " + str(labels.shape) + "\n")
 
     # ------------------------------------------------- create + train
-    network = NeuralNetwork(
-        input_dim=input_size,
-        hidden_units=hidden_size,
-        hidden_layers_count=num_layers,
-        output_dim=output_size,
-        mode_cfg=config,
-        dropout_rate=dropout,
-        init_fn=weight_init_fn,
-        optimizer_choice=optimizer_choice,
-        use_scheduler=use_scheduler,   # pass the scheduler flag
-        learn_rate=learn_rate,         # pass your 0.001 base LR
-    )
-                    
-    network.train(X=data, y=labels, epochs=epochs, batch_size=batch_size, lr_min=1e-4, on_epoch_end=on_epoch_end)
+    network = build_network(input_size, output_size, hidden_size, num_layers, dropout, optimizer_choice,
+                            mode_id, learn_rate, init_id, use_scheduler, dtype, seed)
+    start_epoch = network.load_train_state(resume_state) if resume_state is not None else 0
+    warm = None
+    if base is not None:
+        warm = {"base_model": base_model, **warm_start(network, base, X=data, y=labels)}
+        print("WARM START: " + warm["method"] + (" (" + warm["reason"] + ")" if "reason" in warm else "") + "\n")
 
+    # ------------------------------------------------- periodic checkpoints (written off-thread)
+    writer, callback = None, on_epoch_end
+    if checkpoint:
+        writer = CheckpointWriter(checkpoint_file or checkpoint_path(os.path.splitext(filename)[0]))
+        build_cfg = {"input_size": input_size, "output_size": output_size, "hidden_size": hidden_size,
+                     "num_layers": num_layers, "dropout": dropout, "optimizer_choice": optimizer_choice,
+                     "mode_id": mode_id, "learn_rate": learn_rate, "init_id": init_id,
+                     "use_scheduler": use_scheduler, "dtype": np.dtype(dtype).name, "seed": seed, "epochs": epochs}
+        every = max(1, int(checkpoint_every))
 
-    # ------------------------------------------------- optional save
-    
-    if save_after_train:
-        norm_stats = None               # default: no scaling
+        def callback(epoch, logs):
+            if (epoch + 1) % every == 0:
+                writer.submit(checkpoint_fields(network, mode_id, norm_stats, build_cfg, epoch + 1))
+            return on_epoch_end(epoch, logs) if on_epoch_end is not None else False
+
+    stopper = EarlyStopping(patience, min_delta, restore_best_weights) if early_stopping else None
+    profiler = Profiler(trace=trace_file is not None) if profile else None
+    # data-parallel ranks (this process included) split the job's BLAS grant; the
+    # single-process reference step dp.stats()["speedup"] is measured against gets all of it
+    dp, rank_limit = None, blas_limit(None)
+    if data_parallel and data_parallel > 1:
+        grant = blas_threads or deployment_cap()
+        per_rank = rank_threads(grant, data_parallel)
+        dp = DataParallel(mode_id, data_parallel, initializer=limit_env, initargs=(per_rank,),
+                          reference_limit=lambda: blas_limit(grant))
+        rank_limit = blas_limit(per_rank)
+    t0 = time.perf_counter()
+    try:
+        with rank_limit:
+            network.train(X=data, y=labels, epochs=epochs, batch_size=batch_size, lr_min=lr_min, on_epoch_end=callback,
+                          metrics=metrics, eval_every=eval_every, eval_subsample=eval_subsample,
+                          shuffle=shuffle, block_size=block_size,
+                          validation_split=validation_split, early_stopping=stopper,
+                          plateau_window=plateau_window, plateau_tol=plateau_tol, profiler=profiler,
+                          data_parallel=dp, initial_epoch=start_epoch, lr_horizon=lr_horizon)
+        if writer is not None:
+            # last state too (end of run, early stop or cancel - the point a resume continues from)
+            writer.submit(checkpoint_fields(network, mode_id, norm_stats, build_cfg))
+    finally:
+        if dp is not None:
+            dp.close()
+        if writer is not None:
+            writer.close()
+    train_seconds = time.perf_counter() - t0
+
+    profile_summary = None
+    if profiler is not None:
+        profile_summary = profiler.summary()
+        if trace_file is not None:
+            profile_summary["trace_file"] = profiler.export_chrome_trace(trace_file)
 
-        # if the mode asked for z-score normalisation we already computed mu & sigma
-        if config.get("normalize"):
-            norm_stats = {
-                "method": "zscore",
-                "mean": mu,
-                "std":  sigma
-            }
 
-        network.save_model(filename, mode_id, norm_stats)
+    # ------------------------------------------------- optional save
+    
+    model_file = None
+    if save_after_train and network.stop_reason != "callback":     # a cancelled run is never saved
+        network.save_model(filename, mode_id, norm_stats, fmt=model_format)
+        model_file = f"{filename}.{model_format}"
+        MODEL_REGISTRY.invalidate(model_file)      # /predict must not serve the old weights
 
 
     return {
         "message":        "Training complete",
-        "samples":        len(data),
+        "samples":        _n_samples(data),
         "epochs":         epochs,
         "mode":           mode_id,
+        "dtype":          np.dtype(dtype).name,
         "output_size":    output_size,
         "loss_history":   getattr(network, "loss_history", []),
         "acc_history": getattr(network, "acc_history", []),
         "lr_history": getattr(network, "lr_history", []),
+        "metric_epochs": getattr(network, "metric_epochs", []),
+        "metrics_schedule": getattr(network, "metrics_schedule", {}),
+        "val_loss_history": getattr(network, "val_loss_history", []),
+        "val_acc_history": getattr(network, "val_acc_history", []),
+        "epochs_run":     len(network.lr_history),
+        "stopped_epoch":  network.stopped_epoch,
+        "stop_reason":    network.stop_reason,
+        "best_epoch":     network.best_epoch,
+        "model_file":     model_file,
+        "profile":        profile_summary,
+        "train_seconds":  train_seconds,
+        "data_parallel":  dp.stats() if dp is not None else None,
+        "checkpoint":     writer.stats() if writer is not None else None,
+        "resumed_from_epoch": start_epoch if resume_state is not None else None,
+        "warm_start":     warm,
         **getattr(network, "final_metrics", {}),
     }
 
+
+def _n_samples(data):
+    try:
+        return len(data)
+    except TypeError:                            # streaming dataset of unknown length
+        return None
+
+
+def run_stacked_training_from_api(
+    input_size,
+    output_size,
+    hidden_size,
+    num_layers,
+    dropout,
+    optimizer_choice,
+    mode_id,
+    batch_size,
+    learn_rate,
+    epochs,
+    init_id,
+    data,
+    labels,
+    variants,         # [{"seed": .., "learn_rate": .., "dropout": ..}, ...] - missing keys use the shared value
+    save_after_train=False,
+    filename="latest_model.npz",
+    use_scheduler=False,
+    dtype="float64",
+    seed=None,
+    model_format="npz",
+    dataset_id=None,
+):
+    """Train K variants of one architecture as a single `StackedEnsemble` job.
+
+    Returns one result per variant, shaped like `run_training_from_api`'s.
+    """
+    config = MODES[mode_id]
+    data, labels, stats = load_dataset(data, labels, dataset_id)
+    data, labels, output_size, norm_stats = prepare_dataset(data, labels, mode_id, output_size, dtype, stats)
+    print(f"Stacked training: {len(variants)} models, {epochs} epochs")
+
+    networks = []
+    for k, v in enumerate(variants):
+        networks.append(NeuralNetwork(
+            input_dim=input_size,
+            hidden_units=hidden_size,
+            hidden_layers_count=num_layers,
+            output_dim=output_size,
+            mode_cfg=config,
+            dropout_rate=v.get("dropout", dropout),
+            init_fn=WEIGHT_INITS[init_id],
+            optimizer_choice=optimizer_choice,
+            use_scheduler=use_scheduler,
+            learn_rate=v.get("learn_rate", learn_rate),
+            dtype=dtype,
+            seed=v.get("seed", None if seed is None else seed + k),   # distinct per variant
+        ))
+
+    ensemble = StackedEnsemble(networks)
+    ensemble.train(X=data, y=labels, epochs=epochs, batch_size=batch_size, lr_min=1e-4)
+
+    if save_after_train:
+        ensemble.unstack_into(networks)
+        for k, network in enumerate(networks):
+            network.save_model(f"{filename}_{k}", mode_id, norm_stats, fmt=model_format)
+            MODEL_REGISTRY.invalidate(f"{filename}_{k}.{model_format}")
+
+    return [
+        {
+            "message":        "Training complete",
+            "samples":        len(data),
+            "epochs":         epochs,
+            "mode":           mode_id,
+            "dtype":          np.dtype(dtype).name,
+            "output_size":    output_size,
+            "variant":        v,
+            **hist,
+        }
+        for v, hist in zip(variants, ensemble.histories())
+    ]
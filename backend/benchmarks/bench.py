@@ -0,0 +1,415 @@
+"""bench.py - throughput / memory benchmarks for the NumPy engine
+===============================================================
+Run from `backend/`:
+
+    python -m benchmarks.bench                      # full suite, prints a table
+    python -m benchmarks.bench --quick -k train/    # subset, fewer repeats
+    python -m benchmarks.bench --save-baseline      # write benchmarks/baselines/default.json
+    python -m benchmarks.bench --compare            # exit 1 on a regression vs that baseline
+
+Quick checklist
+---------------
+* Cases (one factor varied at a time around a small base network):
+    train/mode-*     all five `MODES`
+    train/opt-*      every optimizer in `OPTIMIZER_NAMES`
+    train/batch-*    mini-batch sizes (incl. full batch)
+    train/width-*    hidden units
+    train/depth-*    hidden layers
+    train/float32    compute dtype
+    infer/*          `InferenceModel.predict` at several request sizes
+    parallel/*       data-parallel training (`models/data_parallel.py`) on a
+                     wide net with big batches; workers-1 is the plain
+                     single-process path and the others report their
+                     speedup over it
+    api/*            `/train` (job submit -> done) and `/predict` over HTTP
+                     against a local uvicorn server in a temp dir
+* Each case: warm-up, then `repeat` timed samples; a sample repeats the
+  case's work until it lasts at least `MIN_SAMPLE_S`, so tiny cases aren't
+  timer noise. Throughput = samples (or requests) per second, from the
+  median and from the best sample. One extra run under `tracemalloc` gives
+  peak allocated MB (kept out of the timings).
+* Baselines are plain JSON. `--compare` flags a case whose best-sample
+  throughput dropped more than `--threshold` (default 15%) below the
+  baseline. Baselines are per machine - save one on the box you compare on.
+* Machine speed drifts (turbo, noisy neighbours on shared runners), so each
+  run also times a fixed NumPy reference workload before and after the
+  cases; ratios are divided by the reference's own ratio unless
+  `--no-normalize`. A flagged case is re-measured (`--retries`, best run
+  kept) before it counts, so one noisy sample doesn't fail the run.
+* CPU-only, stdlib + the backend's own requirements.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from models.network import NeuralNetwork          # noqa: E402
+from models.inference import InferenceModel        # noqa: E402
+from models.data_parallel import DataParallel      # noqa: E402
+from utils.config import MODES                     # noqa: E402
+from utils.optimizers import OPTIMIZER_NAMES       # noqa: E402
+from utils.winit import xavier_init, he_init       # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "default.json")
+
+# base network every train/* case varies one factor of
+BASE = {"mode_id": 2, "width": 32, "depth": 2, "batch_size": 64, "optimizer": 3, "dtype": "float64"}
+
+MIN_SAMPLE_S = {True: 0.05, False: 0.2}           # per timed sample, by --quick
+
+CASES: dict = {}
+
+
+def case(name):
+    """Register `fn(quick) -> (run, units)`: `run()` does the work once, `units` = samples it processed."""
+    def deco(fn):
+        CASES[name] = fn
+        return fn
+    return deco
+
+
+# ------------------------------------------------- data ------------------------------------------------- #
+
+def make_data(n, d, mode_id, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, d))
+    if mode_id == 5:
+        y = np.eye(3)[np.digitize(X[:, 0], [-0.4, 0.4])]
+    elif mode_id == 3:
+        y = np.tanh(X[:, 0] - X[:, 1])
+    else:
+        y = (X[:, 0] + X[:, 1] > 0).astype(float)
+    return X, y
+
+
+def build(cfg, n_in=16, seed=0):
+    mode_id = cfg["mode_id"]
+    return NeuralNetwork(
+        input_dim=n_in, hidden_units=cfg["width"], hidden_layers_count=cfg["depth"],
+        output_dim=3 if mode_id == 5 else 1, mode_cfg=MODES[mode_id], dropout_rate=0.0,
+        init_fn=he_init if mode_id in (4, 5) else xavier_init, optimizer_choice=cfg["optimizer"],
+        learn_rate=0.01, dtype=cfg["dtype"], seed=seed,
+    )
+
+
+def train_case(quick, **overrides):
+    cfg = {**BASE, **overrides}
+    n, epochs = (1024, 2) if quick else (4096, 4)
+    X, y = make_data(n, 16, cfg["mode_id"])
+    net = build(cfg)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            net.train(X, y, epochs=epochs, batch_size=cfg["batch_size"])
+    return run, n * epochs
+
+
+# ------------------------------------------------- cases ------------------------------------------------- #
+
+for _m in MODES:
+    case(f"train/mode-{_m}")(lambda quick, m=_m: train_case(quick, mode_id=m))
+for _o, _name in OPTIMIZER_NAMES.items():
+    case(f"train/opt-{_name.lower()}")(lambda quick, o=_o: train_case(quick, optimizer=o))
+for _b in (16, 64, 256, None):
+    case(f"train/batch-{_b or 'full'}")(lambda quick, b=_b: train_case(quick, batch_size=b))
+for _w in (16, 64, 256):
+    case(f"train/width-{_w}")(lambda quick, w=_w: train_case(quick, width=w))
+for _d in (1, 4, 8):
+    case(f"train/depth-{_d}")(lambda quick, d=_d: train_case(quick, depth=d))
+case("train/float32")(lambda quick: train_case(quick, dtype="float32"))
+
+
+def infer_case(quick, rows):
+    net = build({**BASE, "width": 64})
+    model = InferenceModel.from_network(net)
+    X = make_data(rows, 16, BASE["mode_id"])[0]
+    reps = max(1, (256 if quick else 2048) // rows)
+
+    def run():
+        for _ in range(reps):
+            model.predict(X)
+    return run, rows * reps
+
+
+for _r in (1, 64, 4096):
+    case(f"infer/rows-{_r}")(lambda quick, r=_r: infer_case(quick, r))
+
+
+# ------------------------------------------------- data parallel ------------------------------------------------- #
+
+_POOLS: list = []            # DataParallel workers, stopped at the end of the run
+
+
+def parallel_case(quick, workers):
+    cfg = {**BASE, "width": 256, "depth": 3, "batch_size": 1024}
+    n, epochs = (4096, 1) if quick else (16384, 2)
+    X, y = make_data(n, 64, cfg["mode_id"])
+    net = build(cfg, n_in=64)
+    dp = None
+    if workers > 1:
+        dp = DataParallel(cfg["mode_id"], workers)
+        _POOLS.append(dp)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            net.train(X, y, epochs=epochs, batch_size=cfg["batch_size"], data_parallel=dp)
+    return run, n * epochs
+
+
+for _n in (1, 2, 4):
+    case(f"parallel/workers-{_n}")(lambda quick, k=_n: parallel_case(quick, k))
+
+
+# ------------------------------------------------- API ------------------------------------------------- #
+
+class LocalServer:
+    """uvicorn serving `api.api:app` from a temp working dir (saved_models / datasets stay there)."""
+
+    def __init__(self):
+        self.tmp = tempfile.TemporaryDirectory(prefix="nn-bench-")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ, PYTHONPATH=BACKEND_DIR, NN_TRAIN_WORKERS="1")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.api:app", "--port", str(self.port), "--log-level", "warning"],
+            cwd=self.tmp.name, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(100):
+            try:
+                self.call("/models/cache")
+                return
+            except OSError:
+                time.sleep(0.1)
+        self.close()
+        raise RuntimeError("API server did not start")
+
+    def call(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        req = urllib.request.Request(f"http://127.0.0.1:{self.port}{path}", data, {"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=60) as r:
+            return json.loads(r.read())
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait()
+        self.tmp.cleanup()
+
+
+_SERVER = None
+
+
+def server():
+    global _SERVER
+    if _SERVER is None:
+        _SERVER = LocalServer()
+    return _SERVER
+
+
+def train_body(n, epochs, **extra):
+    X, y = make_data(n, 16, BASE["mode_id"])
+    return {
+        "input_size": 16, "output_size": 1, "hidden_size": BASE["width"], "num_layers": BASE["depth"],
+        "dropout": 0.0, "optimizer_choice": BASE["optimizer"], "mode_id": BASE["mode_id"], "init_id": 2,
+        "learn_rate": 0.01, "epochs": epochs, "batch_size": BASE["batch_size"], "seed": 0,
+        "data": X.tolist(), "labels": y.tolist(), **extra,
+    }
+
+
+def wait_job(srv, job_id):
+    while srv.call(f"/jobs/{job_id}")["status"] not in ("completed", "cancelled", "failed"):
+        time.sleep(0.01)
+
+
+@case("api/train")
+def api_train(quick):
+    srv = server()
+    body = train_body(512, 5 if quick else 20)
+
+    def run():
+        wait_job(srv, srv.call("/train", body)["job_id"])
+    return run, 1
+
+
+@case("api/predict")
+def api_predict(quick):
+    srv = server()
+    wait_job(srv, srv.call("/train", train_body(256, 2, save_after_train=True, filename="bench"))["job_id"])
+    rows = make_data(8, 16, BASE["mode_id"])[0].tolist()
+    n = 20 if quick else 200
+
+    def run():
+        for _ in range(n):
+            srv.call("/predict", {"model_path": "bench", "test_data": rows})
+    return run, n
+
+
+# ------------------------------------------------- harness ------------------------------------------------- #
+
+def measure(setup, quick, repeat):
+    run, units = setup(quick)
+    t = time.perf_counter()
+    run()                                            # warm-up (allocations, BLAS init, model cache)
+    inner = max(1, int(MIN_SAMPLE_S[quick] / max(time.perf_counter() - t, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(inner):
+            run()
+        times.append((time.perf_counter() - t) / inner)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    med = statistics.median(times)
+    return {
+        "median_s": med,
+        "min_s": min(times),
+        "units": units,
+        "inner": inner,
+        "throughput": units / med,
+        "best_throughput": units / min(times),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def reference_speed(quick):
+    """Ops/sec of a fixed matmul + elementwise mix - the yardstick for machine-speed drift."""
+    rng = np.random.default_rng(0)
+    A, B = rng.standard_normal((64, 64)), rng.standard_normal((64, 64))
+
+    def run():
+        for _ in range(50):
+            C = A @ B
+            np.tanh(C, out=C)
+    return measure(lambda q: (run, 50), quick, 5)["best_throughput"]
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "node": platform.node(),
+    }
+
+
+def run_suite(pattern="", quick=False, repeat=None, names=None):
+    repeat = repeat or (3 if quick else 7)
+    results = {}
+    ref_before = reference_speed(quick)
+    try:
+        for name, setup in CASES.items():
+            if pattern not in name or (names is not None and name not in names):
+                continue
+            try:
+                results[name] = measure(setup, quick, repeat)
+            except Exception as e:                  # e.g. API case without uvicorn
+                results[name] = {"error": repr(e)}
+            r = results[name]
+            line = f"{name:<22} " + (f"{r['throughput']:>14,.0f} /s  {r['median_s'] * 1e3:>9.2f} ms  {r['peak_mb']:>8.2f} MB"
+                                     if "error" not in r else f"skipped: {r['error']}")
+            print(line, flush=True)
+    finally:
+        global _SERVER
+        if _SERVER is not None:
+            _SERVER.close()
+            _SERVER = None
+        while _POOLS:
+            _POOLS.pop().close()
+    single = results.get("parallel/workers-1", {})
+    for name, r in results.items():
+        if name.startswith("parallel/") and "error" not in r and "best_throughput" in single:
+            r["speedup"] = r["best_throughput"] / single["best_throughput"]
+            print(f"{name:<22} {r['speedup']:>7.2f}x single-process")
+    reference = (ref_before + reference_speed(quick)) / 2
+    return {"environment": environment(), "quick": quick, "repeat": repeat, "reference": reference, "results": results}
+
+
+def compare(current, baseline, threshold=0.15, normalize=True):
+    """`(rows, regressions)`: per-case throughput ratio vs the baseline."""
+    rows, regressions = [], []
+    drift = current["reference"] / baseline["reference"] if normalize else 1.0
+    for name, r in current["results"].items():
+        b = baseline["results"].get(name)
+        if "error" in r or not b or "error" in b:
+            continue
+        ratio = r["best_throughput"] / b["best_throughput"] / drift
+        rows.append((name, ratio))
+        if ratio < 1 - threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the NumPy training / inference engine")
+    ap.add_argument("-k", "--filter", default="", help="only cases whose name contains this")
+    ap.add_argument("--quick", action="store_true", help="smaller workloads, fewer repeats")
+    ap.add_argument("--repeat", type=int, default=None)
+    ap.add_argument("--out", help="write this run's results JSON here")
+    ap.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="store results as a baseline")
+    ap.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed throughput drop (fraction)")
+    ap.add_argument("--no-normalize", action="store_true", help="don't correct for machine-speed drift")
+    ap.add_argument("--retries", type=int, default=2, help="re-measure a flagged case this many times")
+    ap.add_argument("--list", action="store_true", help="list case names and exit")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    current = run_suite(args.filter, args.quick, args.repeat)
+    for path in (args.out, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"wrote {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != current["quick"]:
+            print("warning: baseline and this run use different --quick settings")
+        rows, regressions = compare(current, baseline, args.threshold, not args.no_normalize)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            print(f"re-measuring {len(regressions)} flagged case(s)")
+            again = run_suite(quick=args.quick, repeat=args.repeat, names=set(regressions))
+            for name, r in again["results"].items():
+                old = current["results"][name]
+                if "error" not in r and r["best_throughput"] / again["reference"] > old["best_throughput"] / current["reference"]:
+                    current["results"][name] = {**r, "best_throughput": r["best_throughput"] * current["reference"] / again["reference"]}
+            rows, regressions = compare(current, baseline, args.threshold, not args.no_normalize)
+        print(f"\nvs {args.compare} (fail below {1 - args.threshold:.0%} of baseline throughput; "
+              f"machine speed {current['reference'] / baseline['reference']:.2f}x of baseline)")
+        for name, ratio in rows:
+            print(f"{name:<22} {ratio:>7.2f}x{'  REGRESSION' if name in regressions else ''}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""data_parallel.py - synchronous data-parallel training across local processes
+==========================================================================
+One `train()` call runs on one Python process; for big batches the forward /
+backward matmuls are the whole epoch. `DataParallel` splits every
+mini-batch over N ranks - this process plus N-1 spawned workers - and
+all-reduces the gradients before the single optimizer step:
+
+    with DataParallel(mode_id, n_workers=4) as dp:
+        net.train(X, y, batch_size=1024, data_parallel=dp)
+
+Quick checklist
+---------------
+* The flat `params` buffer moves into shared memory for the duration of
+  train(): every rank's replica views the same weights, so nothing is
+  copied per step; `detach()` (end of train) gives the network a private
+  copy back.
+* Each rank writes its shard's gradient (already weighted by
+  shard rows / batch rows) into its own row of a shared `(N, n_params)`
+  buffer; this process sums the rows into `network.grads` and runs the one
+  `_step` - results match single-process training up to summation order.
+* Dropout: every rank draws the full-batch mask from a copy of the
+  network's mask RNG and keeps its rows, so masks are identical to the
+  single-process run too.
+* Batches are copied into a shared batch buffer (workers' rows only); the
+  loader / shuffling / metrics / eval stay in this process unchanged.
+* Workers are spawned once, on the first batch, and reused by later train()
+  calls with the same layout; `close()` (or leaving the `with`) stops them
+  and frees the shared memory. `mode_id` rebuilds the activations / loss
+  on the worker side (the network itself holds lambdas and can't be
+  pickled); `initializer(*initargs)` runs in each worker before NumPy
+  loads (e.g. to pin BLAS threads).
+* Only pays off when a shard's matmuls dwarf the per-step pipe round-trip
+  (wide layers, large batches) - see the parallel/* benchmark cases.
+  `stats()["speedup"]` measures it per run against the single-process path:
+  every `reference_every` steps the same batch is also run through this
+  process alone (into scratch gradients - training is unaffected), under
+  `reference_limit()` (e.g. the job's whole BLAS thread grant); speedup =
+  reference wall time / sharded wall time of those steps. Each reference
+  step costs about one single-process step.
+"""
+from __future__ import annotations
+import contextlib
+import copy
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def shard_bounds(m: int, n: int) -> list[int]:
+    """Row offsets of `n` contiguous near-equal shards of `m` rows (empty shards last)."""
+    q, r = divmod(m, n)
+    out = [0]
+    for k in range(n):
+        out.append(out[-1] + q + (k < r))
+    return out
+
+
+# ------------------------------------------------ one rank ------------------------------------------------ #
+
+class Shard:
+    """A replica's side of one step: forward + backward over rows `[lo, hi)` of a batch of `m`."""
+
+    def __init__(self, replica, params, grads, capacity: int) -> None:
+        self.net = replica
+        replica.params, replica.grads = params, grads
+        replica._bind_views()
+        replica._ws, replica._masks = None, None
+        self._full = np.empty((capacity, replica.hid_units), replica.dtype) if replica.dropout > 0 else None
+        self._rows = (0, 0)
+        replica._dropout_mask = self._dropout_mask          # instance override
+
+    def _dropout_mask(self, shape, out=None):
+        # draw the whole batch's mask (same stream position as a single process) and keep our rows
+        m, lo = self._rows
+        n = out.shape[0] if out is not None else shape[0]
+        full = self._full[:m]
+        self.net._mask_rng.random(out=full, dtype=full.dtype)
+        if out is None:
+            out = np.empty(shape, self.net.dtype)
+        np.greater_equal(full[lo:lo + n], self.net.dropout, out=out)
+        out *= 1.0 / (1.0 - self.net.dropout)
+        return out
+
+    def run(self, X, y, m: int, lo: int):
+        """Gradient of rows `[lo, lo + len(X))`, scaled to its share of the batch mean; returns predictions."""
+        net = self.net
+        self._rows = (m, lo)
+        if len(X) == 0:
+            # idle rank (batch smaller than N): keep the mask stream in step, contribute nothing
+            for _ in range(net.n_hidden if self._full is not None else 0):
+                net._mask_rng.random(out=self._full[:m], dtype=net.dtype)
+            net.grads[...] = 0
+            return None
+        ws = net._workspace(len(X)) if net.use_workspace else None
+        zs, acts = net._forward(X, ws)
+        net._backward(zs, acts, y, ws)
+        net.grads *= len(X) / m
+        return acts[-1]
+
+
+# ------------------------------------------------ coordinator ------------------------------------------------ #
+
+class DataParallel:
+    """N-rank data parallelism for `NeuralNetwork.train(data_parallel=...)`; rank 0 is this process."""
+
+    def __init__(self, mode_id: int, n_workers: int = 2, initializer=None, initargs=(),
+                 reference_every: int | None = 25, reference_limit=None) -> None:
+        self.mode_id = mode_id
+        self.n = max(1, int(n_workers))
+        self.initializer, self.initargs = initializer, initargs
+        self.reference_every = reference_every      # None / 0 = never time the single-process path
+        self.reference_limit = reference_limit      # fn() -> context manager the reference step runs in
+        self.net = None
+        self._layout = None
+        self._blocks, self._procs, self._conns = [], [], []
+        self._local = self._ref = None
+        self._capacity = 0
+        self.steps = 0
+        self.wait_seconds = 0.0            # time rank 0 spent waiting for the slowest worker
+        self.step_seconds = 0.0            # wall time of the sharded steps (copies, compute, all-reduce)
+        self.reference_steps = 0
+        self.reference_seconds = 0.0       # the same batches through this process alone ...
+        self.paired_seconds = 0.0          # ... and their sharded wall time
+
+    # -------- lifecycle
+    def attach(self, network, batch_rows: int) -> None:
+        """Called by train() before the first batch; workers start lazily on that batch."""
+        self.net = network
+        self._capacity = max(self._capacity, int(batch_rows))
+        self._local = self._ref = None       # (re)bound to this network on the first batch
+
+    def detach(self) -> None:
+        """Give the network a private copy of its weights (the shared block may be freed after)."""
+        net = self.net
+        if net is not None and self._blocks and np.shares_memory(net.params, self._P):
+            net.params = net.params.copy()
+            net._bind_views()
+        self.net, self._local, self._ref = None, None, None
+
+    def close(self) -> None:
+        self.detach()
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self._procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        for conn in self._conns:
+            conn.close()
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks, self._procs, self._conns = [], [], []
+        self._layout = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------- setup
+    def _alloc(self, key, shape, dtype):
+        dtype = np.dtype(dtype)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._blocks.append(shm)
+        self._specs[key] = (shm.name, tuple(shape), dtype.str)
+        return np.ndarray(shape, dtype, buffer=shm.buf)
+
+    def _start(self, X_b, y_b):
+        net = self.net
+        layout = (tuple(net.layer_dims), net.dtype.str, net.dropout, net.use_workspace,
+                  X_b.shape[1:], y_b.shape[1:], self._capacity)
+        if layout == self._layout:
+            return
+        self.close()                         # new layout / bigger batch: fresh buffers + workers
+        self.net, self._local, self._ref = net, None, None
+        cap = self._capacity
+        self._specs = {}
+        self._P = self._alloc("P", (net.n_params,), net.dtype)
+        self._G = self._alloc("G", (self.n, net.n_params), net.dtype)
+        self._X = self._alloc("X", (cap,) + X_b.shape[1:], net.dtype)
+        self._Y = self._alloc("Y", (cap,) + y_b.shape[1:], net.dtype)
+        self._O = self._alloc("O", (cap, net.out_dim), net.dtype)
+        spec = {
+            "dims": (net.in_dim, net.hid_units, net.n_hidden, net.out_dim), "mode_id": self.mode_id,
+            "dropout": net.dropout, "dtype": net.dtype.str, "use_workspace": net.use_workspace,
+            "capacity": cap, "buffers": self._specs,
+        }
+        from models.dp_worker import serve
+        ctx = mp.get_context("spawn")
+        for rank in range(1, self.n):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=serve, args=(rank, spec, child, self.initializer, self.initargs),
+                            name=f"dp-rank{rank}", daemon=True)
+            p.start()
+            child.close()
+            self._procs.append(p)
+            self._conns.append(parent)
+        self._layout = layout
+
+    def _bind(self):
+        """Move the network's weights into the shared block and sync the workers' mask RNGs."""
+        net = self.net
+        np.copyto(self._P, net.params)
+        net.params = self._P
+        net._bind_views()
+        self._local = Shard(copy.copy(net), self._P, self._G[0], self._capacity)
+        self._local.net._mask_rng = net._mask_rng            # rank 0 advances the network's own stream
+        state = net._mask_rng.bit_generator.state
+        for conn in self._conns:
+            conn.send(("sync", state))
+        self._collect(self._conns)
+
+    def _collect(self, conns):
+        t = time.perf_counter()
+        for rank, conn in enumerate(conns, 1):
+            try:
+                reply = conn.recv()
+            except EOFError:
+                reply = "worker exited"
+            if reply is not None:
+                raise RuntimeError(f"data-parallel rank {rank}: {reply}")
+        self.wait_seconds += time.perf_counter() - t
+
+    def _reference(self, X_b, y_b):
+        """Wall time of the whole batch through this process alone (scratch gradients, copied mask RNG)."""
+        if self._ref is None:
+            net = self.net
+            self._ref = Shard(copy.copy(net), self._P, np.empty_like(net.grads), self._capacity)
+        self._ref.net._mask_rng = copy.deepcopy(self.net._mask_rng)     # the real stream doesn't move
+        limit = self.reference_limit() if self.reference_limit is not None else contextlib.nullcontext()
+        with limit:
+            t = time.perf_counter()
+            self._ref.run(X_b, y_b, len(X_b), 0)
+            return time.perf_counter() - t
+
+    # -------- one step
+    def gradients(self, X_b, y_b):
+        """Sharded forward + backward of one batch; leaves the mean gradient in `network.grads`.
+
+        Returns the batch predictions (for running metrics)."""
+        if self.net is None:
+            raise RuntimeError("DataParallel.gradients() outside train(): call attach() first")
+        if len(X_b) > self._capacity:
+            self._capacity = len(X_b)
+        self._start(X_b, y_b)
+        if self._local is None:
+            self._bind()
+        t0 = time.perf_counter()                 # worker start-up / binding is not a step
+        m = len(X_b)
+        bounds = shard_bounds(m, self.n)
+        lo = bounds[1]
+        np.copyto(self._X[lo:m], X_b[lo:])
+        np.copyto(self._Y[lo:m], y_b[lo:])
+        for rank, conn in enumerate(self._conns, 1):
+            conn.send(("grad", m, bounds[rank], bounds[rank + 1]))
+        out = self._O[:m]
+        out[:lo] = self._local.run(X_b[:lo], y_b[:lo], m, 0)
+        self._collect(self._conns)
+        # all-reduce: shard gradients are pre-weighted, so the batch mean is their sum
+        np.sum(self._G, axis=0, out=self.net.grads)
+        dt = time.perf_counter() - t0
+        self.steps += 1
+        self.step_seconds += dt
+        # the first step pays one-off costs (workspace / BLAS warm-up), so sample from the second on
+        if self.reference_every and self.steps % self.reference_every == 2 % self.reference_every:
+            self.reference_seconds += self._reference(X_b, y_b)
+            self.paired_seconds += dt
+            self.reference_steps += 1
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.n,
+            "steps": self.steps,
+            "wait_seconds": self.wait_seconds,
+            "step_seconds": self.step_seconds,
+            "reference_steps": self.reference_steps,
+            "reference_seconds": self.reference_seconds,
+            # single-process wall time / sharded wall time of the same batches (None until sampled)
+            "speedup": self.reference_seconds / self.paired_seconds if self.paired_seconds else None,
+        }
@@ -0,0 +1,57 @@
+"""dp_worker.py - worker side of models/data_parallel.py
+======================================================
+No top-level NumPy import, so the `initializer` (e.g. BLAS thread env vars)
+runs before NumPy loads in the spawned process.
+
+Protocol (one `Pipe` per worker, replies are None or an error string):
+    ("sync", mask_rng_state)   - start of a train() call
+    ("grad", m, lo, hi)        - gradient of batch rows [lo, hi) of m
+    None                       - exit
+"""
+from __future__ import annotations
+
+
+def serve(rank: int, spec: dict, conn, initializer=None, initargs=()):
+    if initializer is not None:
+        initializer(*initargs)
+    from multiprocessing import shared_memory
+    import numpy as np
+    from models.network import NeuralNetwork
+    from models.data_parallel import Shard
+    from utils.config import MODES
+
+    blocks, bufs = [], {}
+    for key, (name, shape, dtype) in spec["buffers"].items():
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        bufs[key] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+    in_dim, hid, n_hidden, out_dim = spec["dims"]
+    replica = NeuralNetwork(in_dim, hid, n_hidden, out_dim, MODES[spec["mode_id"]], spec["dropout"],
+                            init_fn=lambda fi, fo, rng: np.zeros((fi, fo)), use_workspace=spec["use_workspace"],
+                            dtype=np.dtype(spec["dtype"]))
+    shard = Shard(replica, bufs["P"], bufs["G"][rank], spec["capacity"])
+    X, Y, O = bufs["X"], bufs["Y"], bufs["O"]
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg is None:
+                break
+            try:
+                if msg[0] == "sync":
+                    replica._mask_rng.bit_generator.state = msg[1]
+                else:
+                    _, m, lo, hi = msg
+                    pred = shard.run(X[lo:hi], Y[lo:hi], m, lo)
+                    if pred is not None:
+                        O[lo:hi] = pred
+                conn.send(None)
+            except Exception as e:
+                conn.send(repr(e))
+    finally:
+        del X, Y, O, bufs, shard, replica
+        for shm in blocks:
+            shm.close()
@@ -0,0 +1,201 @@
+"""ensemble.py - K same-shape networks trained as one stacked job
+=================================================================
+Sweeps and the "Edit & Re-train" loop train many small networks that share
+the dataset and layer shapes but differ in seed / learning rate / dropout.
+`StackedEnsemble` holds all K of them as 3-D arrays and runs forward,
+backward and the optimizer step for every model in one batched `matmul`
+per layer, so K serial Python loops over tiny matmuls become one BLAS job.
+
+Quick checklist
+---------------
+* `params` is `(K, n_params)` with the same [W0 | b0 | W1 | ...] layout as
+  `NeuralNetwork.params`; `weights[i]` is a `(K, fan_in, fan_out)` view.
+* Every mini-batch / shuffle order is shared by all K models (`utils/batching.py`).
+* Learning rates (and the cosine schedule) are per model: `lr` is `(K, 1)`.
+* Dropout rates are per model; a rate of 0 simply keeps every unit. Masks come
+  from the ensemble's own seeded Generator and are reused in backward.
+* `histories()` returns one dict per model shaped like
+  `run_training_from_api`'s history fields.
+"""
+from __future__ import annotations
+import numpy as np
+from utils.lr_scheduler import cosine_decay
+from utils.metrics import accuracy, multiclass_accuracy
+from utils.optimizers import make_optimizer
+from utils.batching import BatchLoader
+from models.network import NeuralNetwork
+
+
+class StackedEnsemble:
+    """Vectorised trainer for K `NeuralNetwork`s with identical architecture."""
+
+    def __init__(self, networks: list[NeuralNetwork], seed: int | None = None) -> None:
+        if not networks:
+            raise ValueError("StackedEnsemble needs at least one network")
+        ref = networks[0]
+        for net in networks[1:]:
+            if net.layer_dims != ref.layer_dims or net.dtype != ref.dtype:
+                raise ValueError("All stacked networks must share layer sizes and dtype")
+            if net.optimizer.name != ref.optimizer.name or net.f_h is not ref.f_h or net.loss is not ref.loss:
+                raise ValueError("All stacked networks must share mode and optimizer")
+
+        self.k = len(networks)
+        self.layer_dims = ref.layer_dims
+        self.n_hidden = ref.n_hidden
+        self.out_dim = ref.out_dim
+        self.dtype = ref.dtype
+        self.scheduler = ref.scheduler
+        self.f_h, self.d_f_h = ref.f_h, ref.d_f_h
+        self.f_o, self.d_f_o = ref.f_o, ref.d_f_o
+        self.keep_z_h, self.keep_z_o = ref.keep_z_h, ref.keep_z_o
+        self.loss, self.loss_grad = ref.loss, ref.loss_grad
+
+        # -------- per-model hyper-params as broadcastable columns
+        self.base_lr = np.array([[net.base_lr] for net in networks], dtype=np.float64)
+        self.dropout = np.array([net.dropout for net in networks], dtype=np.float64)
+        self._drop_p = self.dropout.reshape(-1, 1, 1).astype(self.dtype)
+        self._keep_scale = (1.0 / (1.0 - self.dropout)).reshape(-1, 1, 1).astype(self.dtype)
+        self._masks = None
+
+        # -------- RNG for shuffling / dropout (defaults to the first network's seed)
+        seed = ref.seed if seed is None else seed
+        self.rng, self._mask_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+
+        # -------- stacked flat buffers + 3-D views
+        self.params = np.stack([net.params for net in networks])
+        self.grads = np.zeros_like(self.params)
+        self.weights, self.biases = self._views(self.params)
+        self.dWs, self.dBs = self._views(self.grads)
+        self.optimizer = make_optimizer(ref.optimizer.name)
+
+        self.loss_history = [[] for _ in range(self.k)]
+        self.acc_history = [[] for _ in range(self.k)]
+        self.lr_history = [[] for _ in range(self.k)]
+
+    def _views(self, buf):
+        Ws, Bs, off = [], [], 0
+        for fi, fo in zip(self.layer_dims[:-1], self.layer_dims[1:]):
+            Ws.append(buf[:, off: off + fi * fo].reshape(self.k, fi, fo))
+            off += fi * fo
+            Bs.append(buf[:, off: off + fo])
+            off += fo
+        return Ws, Bs
+
+    # ------------------------------------------------ forward -------------------------------------------------- #
+    def _forward(self, X: np.ndarray, training: bool = True):
+        """X is `(n, in_dim)` and shared; every activation is `(K, n, width)`."""
+        acts = [X]
+        zs = []
+        A = X
+        drop = training and self.dropout.any()
+        self._masks = [] if drop else None
+        for i in range(self.n_hidden):
+            Z = np.matmul(A, self.weights[i])          # (n,d)@(K,d,h) broadcasts to (K,n,h)
+            Z += self.biases[i][:, None, :]
+            A = self.f_h(Z) if self.keep_z_h else self.f_h(Z, out=Z)
+            if drop:
+                # scaled keep-mask at the compute dtype, one threshold per model
+                mask = self._mask_rng.random(A.shape, dtype=self.dtype)
+                np.greater_equal(mask, self._drop_p, out=mask)
+                mask *= self._keep_scale
+                A *= mask
+                self._masks.append(mask)
+            zs.append(Z if self.keep_z_h else None)
+            acts.append(A)
+        Z_out = np.matmul(A, self.weights[-1])
+        Z_out += self.biases[-1][:, None, :]
+        acts.append(self.f_o(Z_out) if self.keep_z_o else self.f_o(Z_out, out=Z_out))
+        zs.append(Z_out if self.keep_z_o else None)
+        return zs, acts
+
+    # ------------------------------------------------ backward ------------------------------------------------- #
+    def _hidden_deriv(self, i, zs, acts):
+        """f_h'(z_i) from the cached activation (see `NeuralNetwork._hidden_deriv`)."""
+        if self.keep_z_h:
+            return self.d_f_h(zs[i])
+        a = acts[i + 1]
+        if self._masks is not None:
+            a = a * (1 - self._drop_p)        # undo the per-model dropout scaling
+            return self.d_f_h(a, out=a)
+        return self.d_f_h(a)
+
+    def _backward(self, zs, acts, y_true):
+        batch = y_true.shape[0]
+        y_pred = acts[-1]
+        if self.out_dim == 1 and y_true.ndim == 1:
+            y_true = y_true.reshape(-1, 1)
+
+        # ---- output delta (same fast paths as NeuralNetwork._backward)
+        if self.out_dim == 1 and self.f_o.__name__ == "sigmoid" and self.loss.__name__ == "bce_loss":
+            delta = y_pred - y_true
+        elif self.f_o.__name__ == "softmax" and self.loss.__name__ == "cross_entropy":
+            delta = y_pred - y_true
+        else:
+            delta = self.loss_grad(y_pred, y_true)
+            if self.d_f_o is not None:
+                delta *= self.d_f_o(zs[-1] if self.keep_z_o else y_pred)
+
+        for i in reversed(range(self.n_hidden + 1)):
+            A_prev = acts[i]
+            A_prev_T = A_prev.T if A_prev.ndim == 2 else A_prev.transpose(0, 2, 1)
+            np.matmul(A_prev_T, delta, out=self.dWs[i])
+            self.dWs[i] /= batch
+            np.mean(delta, axis=1, out=self.dBs[i])
+            if i > 0:
+                delta = np.matmul(delta, self.weights[i].transpose(0, 2, 1))
+                delta *= self._hidden_deriv(i - 1, zs, acts)
+                if self._masks is not None:
+                    delta *= self._masks[i - 1]
+
+    # ---------------------------------------------- training loop --------------------------------------------- #
+    def train(self, X, y, epochs: int = 1000, batch_size: int | None = None, lr_min: float = 1e-4,
+              shuffle: str = "full", block_size: int | None = None):
+        X = np.asarray(X, dtype=self.dtype)
+        y = np.asarray(y, dtype=self.dtype)
+        loader = BatchLoader(X, y, batch_size, shuffle=shuffle, block_size=block_size)
+
+        for epoch in range(epochs):
+            lr = (cosine_decay(epoch, epochs, self.base_lr, lr_min)
+                  if self.scheduler else self.base_lr)
+
+            for X_b, y_b in loader.epoch(self.rng):
+                zs, acts = self._forward(X_b)
+                self._backward(zs, acts, y_b)
+                self.optimizer.step(self.params, self.grads, lr)
+
+            # dropout-free full-data metrics, one row of the stacked output per model
+            _, acts_full = self._forward(X, training=False)
+            for k in range(self.k):
+                y_pred = acts_full[-1][k]
+                if self.out_dim == 1:
+                    loss_val = float(self.loss(y.reshape(-1, 1), y_pred))
+                    acc_val = float(accuracy(y, y_pred.flatten()))
+                else:
+                    loss_val = float(self.loss(y, y_pred))
+                    acc_val = float(multiclass_accuracy(y, y_pred))
+                self.loss_history[k].append(loss_val)
+                self.acc_history[k].append(acc_val)
+                self.lr_history[k].append(float(lr[k, 0]))
+
+            if epoch % 100 == 0:
+                best = int(np.argmin([h[-1] for h in self.loss_history]))
+                print(f"Epoch {epoch}/{epochs} - {self.k} models - best #{best} Loss: {self.loss_history[best][-1]:.6f}")
+
+    # --------------------------------------------------- results ---------------------------------------------------- #
+    def histories(self) -> list[dict]:
+        return [
+            {
+                "loss_history": self.loss_history[k],
+                "acc_history": self.acc_history[k],
+                "lr_history": self.lr_history[k],
+                "loss": self.loss_history[k][-1] if self.loss_history[k] else None,
+                "accuracy": self.acc_history[k][-1] if self.acc_history[k] else None,
+                "learning_rate": self.lr_history[k][-1] if self.lr_history[k] else None,
+            }
+            for k in range(self.k)
+        ]
+
+    def unstack_into(self, networks: list[NeuralNetwork]) -> None:
+        """Copy each model's trained parameters back into its `NeuralNetwork` (e.g. to save it)."""
+        for k, net in enumerate(networks):
+            net.params[...] = self.params[k]
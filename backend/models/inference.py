@@ -0,0 +1,129 @@
+"""inference.py - frozen forward-only model
+==========================================
+`NeuralNetwork` carries everything training needs (gradients, optimizer
+state, dropout, per-layer z / activation lists). Serving a prediction
+needs none of that, so `InferenceModel` is a compiled copy of just the
+forward pass.
+
+Quick checklist
+---------------
+* Weights / biases are one private contiguous copy of the network's flat
+  `params` (later training of the source network doesn't leak in) - or,
+  for `.nnm` files, views straight into the read-only memory map.
+* No dropout, no `zs` / `acts` lists: each layer writes into one of two
+  ping-pong scratch buffers and the activation runs in place.
+* Inputs are processed in chunks of `chunk_size` rows so the scratch
+  buffers stay cache-sized; the last layer writes straight into the result.
+* The saved normalisation stats (`norm_method` / `norm_*`) are applied on
+  the way in, so callers pass raw features.
+* Scratch buffers are shared state; `predict` holds a per-model lock, so one
+  cached model can serve several request threads (one pass at a time).
+"""
+from __future__ import annotations
+import threading
+import numpy as np
+
+# scratch buffers are sized to roughly this many bytes each (fits in L2 on most CPUs)
+CHUNK_BYTES = 1 << 18
+
+
+class InferenceModel:
+    """Vectorised, allocation-free (per chunk) forward pass of a trained network."""
+
+    def __init__(self, params, layer_dims, f_h, f_o, dtype=np.float64, norm=None,
+                 chunk_size: int | None = None, copy: bool = True) -> None:
+        self.dtype = np.dtype(dtype)
+        self.layer_dims = tuple(int(d) for d in layer_dims)
+        self.in_dim, self.out_dim = self.layer_dims[0], self.layer_dims[-1]
+        self.f_h, self.f_o = f_h, f_o
+
+        # -------- contiguous weights: [W0 | b0 | W1 | b1 | ...]
+        # (copy=False keeps e.g. a read-only memory-mapped blob as-is when it already fits)
+        self.params = np.array(params, dtype=self.dtype, copy=True if copy else None, order="C")
+        self.weights, self.biases, off = [], [], 0
+        for fi, fo in zip(self.layer_dims[:-1], self.layer_dims[1:]):
+            self.weights.append(self.params[off: off + fi * fo].reshape(fi, fo))
+            off += fi * fo
+            self.biases.append(self.params[off: off + fo])
+            off += fo
+        if off != self.params.size:
+            raise ValueError("params don't match layer_dims")
+
+        # -------- normalisation stats: zscore -> (mean, std), max -> (None, max)
+        self.norm_method, self._norm = "none", None
+        if norm is not None and norm.get("method", "none") != "none":
+            self.norm_method = norm["method"]
+            if self.norm_method == "zscore":
+                std = np.asarray(norm["std"], dtype=self.dtype)
+                mean = np.asarray(norm["mean"], dtype=self.dtype)
+                self._norm = (mean, std)
+            elif self.norm_method == "max":
+                self._norm = (None, np.asarray(norm["max"], dtype=self.dtype))
+            else:
+                raise ValueError(f"Unknown norm method: {self.norm_method}")
+
+        # -------- ping-pong scratch (flat so every (n, d) carve-out is C-contiguous)
+        width = max(self.layer_dims)
+        if chunk_size is None:
+            chunk_size = int(np.clip(CHUNK_BYTES // (width * self.dtype.itemsize), 16, 4096))
+        self.chunk_size = int(chunk_size)
+        self._buf = [np.empty(self.chunk_size * width, self.dtype) for _ in range(2)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_network(cls, net, chunk_size: int | None = None) -> "InferenceModel":
+        """Freeze a trained / loaded `NeuralNetwork` (including any norm stats it carries)."""
+        method = getattr(net, "norm_method", "none")
+        norm = {"method": method}
+        if method == "zscore":
+            norm.update(mean=net.norm_mean, std=net.norm_std)
+        elif method == "max":
+            norm.update(max=net.norm_max)
+        return cls(net.params, net.layer_dims, net.f_h, net.f_o, net.dtype, norm, chunk_size)
+
+    # ------------------------------------------------ forward -------------------------------------------------- #
+    def _scratch(self, k: int, n: int, d: int):
+        return self._buf[k][: n * d].reshape(n, d)
+
+    def _forward_chunk(self, X, out):
+        n = X.shape[0]
+        A = self._scratch(0, n, self.in_dim)
+        if self.norm_method == "zscore":
+            mean, std = self._norm
+            np.subtract(X, mean, out=A)
+            A /= std
+        elif self.norm_method == "max":
+            np.divide(X, self._norm[1], out=A)
+        else:
+            A[...] = X
+        k = 1
+        for W, b in zip(self.weights[:-1], self.biases[:-1]):
+            Z = np.matmul(A, W, out=self._scratch(k, n, W.shape[1]))
+            Z += b
+            A = self.f_h(Z, out=Z)
+            k ^= 1
+        np.matmul(A, self.weights[-1], out=out)
+        out += self.biases[-1]
+        self.f_o(out, out=out)
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        """Raw outputs `(n, out_dim)` for raw (un-normalised) inputs `(n, in_dim)`."""
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.in_dim:
+            raise ValueError(f"Expected {self.in_dim} features, got {X.shape[1]}")
+        out = np.empty((X.shape[0], self.out_dim), self.dtype)
+        with self._lock:
+            for lo in range(0, X.shape[0], self.chunk_size):
+                hi = min(lo + self.chunk_size, X.shape[0])
+                self._forward_chunk(X[lo:hi], out[lo:hi])
+        return out
+
+    def predict_classes(self, X) -> np.ndarray:
+        """Hard labels: threshold 0.5 for a single output, argmax otherwise."""
+        probs = self.predict(X)
+        if self.out_dim == 1:
+            return (probs[:, 0] >= 0.5).astype(int)
+        return np.argmax(probs, axis=1)
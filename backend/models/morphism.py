@@ -0,0 +1,124 @@
+"""morphism.py - warm starts and function-preserving growth (Net2Net)
+====================================================================
+Re-training after an edit used to start from random weights. `warm_start`
+initialises a new network from a trained one instead:
+
+    same layout   -> copy the weights (and the optimizer state when the
+                     optimizer is unchanged): training simply continues
+    wider         -> Net2WiderNet: every new hidden unit copies an existing
+                     one; the copies share that unit's outgoing weights
+    deeper        -> Net2DeeperNet: new hidden layers go in just before the
+                     output layer, initialised to (nearly) the identity
+
+Quick checklist
+---------------
+* Widening is exact: the outgoing weights of a copied unit are split over
+  its copies with random positive shares summing to 1, so the function is
+  unchanged and the copies still learn apart (equal splits would keep them
+  identical forever).
+* Deepening with ReLU is exact (relu(I @ a) == a for a >= 0). Sigmoid /
+  tanh aren't idempotent, so the new layers run them in their linear
+  region: the first takes eps * (a - f(0)), the output layer undoes the
+  slope / offset. Both are odd around f(0), so a layer is off by
+  O(eps^2) relative (O(eps^3) in the pre-activation).
+* The undoing multiplies the output layer by 1 / (slope * eps); past
+  `DEEPEN_MAX_SCALE` Adam's first near-unit steps wreck the function, so
+  eps = min(1, 1 / (slope * DEEPEN_MAX_SCALE)): tanh 0.25, sigmoid 1 (its
+  inputs are centred, which keeps it close). Several new layers are
+  inserted together so that scale is paid once, not per layer.
+* `warm_start(..., X, y)` reports the loss before / after the morph, so
+  whatever deepening costs is visible in the result.
+* Input / output size, mode and "never smaller" are checked by
+  `compatible()`; anything else is a fresh start (the caller decides).
+* Growth needs at least one hidden layer in the source: with none, a new
+  layer would have to copy raw (signed, any width) inputs.
+"""
+from __future__ import annotations
+import numpy as np
+from utils.datasets import Dataset
+
+DEEPEN_MAX_SCALE = 4.0       # cap on the output layer's compensating scale (see above)
+
+
+def compatible(src, dst) -> str | None:
+    """None if `dst` can be initialised from `src`, else the reason it can't."""
+    if (src.in_dim, src.out_dim) != (dst.in_dim, dst.out_dim):
+        return f"input/output size changed ({src.in_dim}->{src.out_dim} vs {dst.in_dim}->{dst.out_dim})"
+    if src.f_h is not dst.f_h or src.f_o is not dst.f_o or src.loss is not dst.loss:
+        return "activation / loss (mode) changed"
+    if dst.n_hidden < src.n_hidden or (dst.n_hidden and dst.hid_units < src.hid_units):
+        return "the new network is smaller (only widening / deepening preserve the function)"
+    if src.n_hidden == 0 and dst.n_hidden > 0:
+        return "the base model has no hidden layer to grow from"
+    return None
+
+
+def widen(Ws, Bs, width: int, rng):
+    """Net2WiderNet over every hidden layer: per-layer `(W, b)` lists -> the same function at `width`."""
+    Ws, Bs = list(Ws), list(Bs)
+    h = Ws[0].shape[1]
+    for i in range(len(Ws) - 1):
+        # new unit j copies old unit g[j]; the first h units map to themselves
+        g = np.concatenate([np.arange(h), rng.integers(0, h, width - h)])
+        share = rng.uniform(0.5, 1.5, width)
+        share /= np.bincount(g, weights=share, minlength=h)[g]     # copies of one unit sum to 1
+        Ws[i], Bs[i] = Ws[i][:, g], Bs[i][g]
+        Ws[i + 1] = Ws[i + 1][g, :] * share[:, None]
+    return Ws, Bs
+
+
+def deepen(Ws, Bs, f_h, n: int = 1, max_scale: float = DEEPEN_MAX_SCALE):
+    """Net2DeeperNet: `n` more hidden layers before the output layer, (near) identity."""
+    Ws, Bs = list(Ws), list(Bs)
+    h = Ws[-1].shape[0]
+    W_out, b_out = Ws[-1], Bs[-1]
+    probe = np.array([-1.0, 0.0, 1.0])
+    if np.array_equal(f_h(probe.copy()), np.maximum(probe, 0)):        # relu: exact identity
+        new_W, new_b = [np.eye(h)] * n, [np.zeros(h)] * n
+    else:
+        # f(z) ~ c + d * z near 0: z1 = eps * (a - c), then z_k+1 = (f(z_k) - c) / d keeps z ~ eps * (a - c)
+        c = float(f_h(np.zeros(1))[0])
+        d = float((f_h(np.array([1e-6]))[0] - f_h(np.array([-1e-6]))[0]) / 2e-6)
+        eps = min(1.0, 1.0 / (d * max_scale))
+        new_W = [np.eye(h) * eps] + [np.eye(h) / d] * (n - 1)
+        new_b = [np.full(h, -eps * c)] + [np.full(h, -c / d)] * (n - 1)
+        # a ~ (f(z_n) - c) / (d * eps) + c
+        scaled = W_out / (d * eps)
+        b_out = b_out + c * (W_out.sum(axis=0) - scaled.sum(axis=0))
+        W_out = scaled
+    return Ws[:-1] + new_W + [W_out], Bs[:-1] + new_b + [b_out]
+
+
+def _loss(net, X, y):
+    return net._evaluate_stream(X, 4096)[0] if isinstance(X, Dataset) else net._evaluate(X, y)[0]
+
+
+def warm_start(dst, src, rng=None, X=None, y=None) -> dict:
+    """Initialise `dst`'s weights from `src` (see the module doc). Returns what was done.
+
+    With training data `X` / `y` (arrays or a Dataset) it also holds `loss_before` (src) and
+    `loss_after` (dst, untrained) - equal for a continue / widen / ReLU deepen."""
+    reason = compatible(src, dst)
+    if reason is not None:
+        return {"method": "none", "reason": reason}
+    rng = dst.rng if rng is None else rng
+    Ws = [np.asarray(W, np.float64) for W in src.weights]
+    Bs = [np.asarray(b, np.float64) for b in src.biases]
+    steps = []
+    if dst.n_hidden and dst.hid_units > src.hid_units:
+        Ws, Bs = widen(Ws, Bs, dst.hid_units, rng)
+        steps.append(f"widen {src.hid_units}->{dst.hid_units}")
+    if dst.n_hidden > src.n_hidden:
+        Ws, Bs = deepen(Ws, Bs, dst.f_h, dst.n_hidden - src.n_hidden)
+        steps.append(f"deepen {src.n_hidden}->{dst.n_hidden}")
+    dst.set_params(Ws, Bs)
+
+    out = {"method": "+".join(steps) or "continue", "optimizer_state": False}
+    if not steps and src.optimizer.name == dst.optimizer.name:
+        state = src.optimizer.state_dict()
+        dst.optimizer.load_state_dict({k: np.asarray(v, dst.dtype) if isinstance(v, np.ndarray) else v
+                                       for k, v in state.items()})
+        out["optimizer_state"] = True
+    if X is not None:
+        out["loss_before"], out["loss_after"] = float(_loss(src, X, y)), float(_loss(dst, X, y))
+    return out
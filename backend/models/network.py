@@ -7,27 +7,53 @@ All shapes are kept consistent so loss/accuracy metrics behave.
 Quick checklist
 ---------------
 * Each layer ⇢ `(W, b)` NumPy arrays.
-* Forward pass returns `zs` (pre-activations) & `acts` (post-activations).
+* Forward pass returns `zs` (pre-activations) & `acts` (post-activations);
+  a `zs` entry is None when the activation's derivative comes from its
+  output (`utils.activation.ACTIVATIONS`), which is every built-in mode.
 * Back-prop uses delta notation
   otherwise generic `loss_grad * d_act`.
 * Gradients are averaged over the mini-batch.
 * Accuracy logging reshapes vectors so broadcasting can't explode.
+* Randomness (init, shuffling, dropout) comes from the network's own
+  `np.random.Generator`s seeded by `seed`, never the global RNG.
+* Dropout keeps its scaled keep-mask from the forward pass and applies it
+  to the deltas in backward.
+* `use_workspace=True` runs train() through preallocated buffers
+  (`models/workspace.py`) so the hot loop doesn't hit the allocator.
+* All W / b live as views into one flat `params` buffer (gradients likewise
+  in `grads`), so optimizers (`utils/optimizers.py`) update everything with
+  a few whole-buffer ops.
+* `train(data_parallel=DataParallel(...))` splits each mini-batch over
+  local processes (`models/data_parallel.py`).
+* `train_state()` / `load_train_state()` + `train(initial_epoch=...)`
+  continue a run where it stopped (weights, optimizer slots, RNG streams).
 """
 from __future__ import annotations
 import numpy as np
 import os
+from typing import Callable
 from utils.lr_scheduler import cosine_decay
 from utils.metrics import accuracy, multiclass_accuracy
+from utils.optimizers import Optimizer, make_optimizer
+from utils.batching import BatchLoader
+from utils.datasets import Dataset
+from utils.convergence import EarlyStopping, detect_plateau
+from utils.profiling import Profiler
+from utils.model_format import write_model
+from models.workspace import Workspace
+from models.data_parallel import DataParallel     # no cycle: data_parallel only imports network in its workers
 
 # --------------------------------------------------- helper --------------------------------------------------- #
 
-def _zeros(shape):
-    return np.zeros(shape, dtype=np.float64)
+def _zeros(shape, dtype=np.float64):
+    return np.zeros(shape, dtype=dtype)
 
 # --------------------------------------------------- class ---------------------------------------------------- #
 
 class NeuralNetwork:
-    """Fully-vectorised feed-forward network supporting SGD / RMSprop / Adam."""
+    """Fully-vectorised feed-forward network supporting SGD / momentum / RMSprop / Adam / AdamW."""
+
+    HISTORIES = ("loss_history", "acc_history", "val_loss_history", "val_acc_history", "metric_epochs", "lr_history")
 
     def __init__(
         self,
@@ -38,9 +64,12 @@ class NeuralNetwork:
         mode_cfg: dict,
         dropout_rate: float = 0.0,
         init_fn=None,
-        optimizer_choice: int = 1,   # 1=SGD  2=RMSprop  3=Adam
+        optimizer_choice: int | Optimizer = 1,   # 1=SGD 2=RMSprop 3=Adam 4=Momentum 5=Nesterov 6=AdamW
         use_scheduler: bool = False,
         learn_rate: float = 1e-3,
+        use_workspace: bool = True,
+        dtype=np.float64,            # compute dtype: np.float64 | np.float32
+        seed: int | None = None,     # None = fresh OS entropy
     ) -> None:
         # -------- hyper‑params
         self.in_dim = input_dim
@@ -48,58 +77,173 @@ class NeuralNetwork:
         self.n_hidden = hidden_layers_count
         self.out_dim = output_dim
         self.dropout = dropout_rate
-        self.init_fn = init_fn or (lambda fan_in, fan_out: np.random.randn(fan_in, fan_out) * 0.01)
+        self.init_fn = init_fn or (lambda fan_in, fan_out, rng: rng.standard_normal((fan_in, fan_out)) * 0.01)
         self.opt = optimizer_choice
         self.scheduler = use_scheduler
         self.base_lr = learn_rate
+        self.use_workspace = use_workspace   # reuse preallocated buffers in train()
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f"Unsupported compute dtype: {self.dtype}")
+        self._ws = None
+        self._masks = None
+
+        # -------- RNG: one stream for init / shuffling, an independent one for dropout masks
+        self.seed = seed
+        self.rng, self._mask_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
 
         # -------- activations / loss from mode cfg
-        self.f_h = mode_cfg["hidden_activation"]
-        self.d_f_h = mode_cfg["hidden_deriv"]
-        self.f_o = mode_cfg["output_activation"]
-        self.d_f_o = mode_cfg["output_deriv"]
+        # (specs from utils.activation.ACTIVATIONS: derivatives are taken from the cached
+        # activations, so z is only kept for an activation whose spec says it "needs" the input)
+        hidden, output = mode_cfg["hidden"], mode_cfg["output"]
+        self.f_h, self.d_f_h = hidden["fn"], hidden["deriv"]
+        self.f_o, self.d_f_o = output["fn"], output["deriv"]
+        self.keep_z_h = hidden["needs"] == "input"
+        self.keep_z_o = output["needs"] == "input"
         self.loss = mode_cfg["loss"]
         self.loss_grad = mode_cfg["loss_grad"]
 
-        # -------- weights & biases
-        self.weights, self.biases = [], []
-        prev = input_dim
-        for _ in range(self.n_hidden):
-            self.weights.append(self.init_fn(prev, hidden_units))
-            self.biases.append(_zeros(hidden_units))
-            prev = hidden_units
-        self.weights.append(self.init_fn(prev, output_dim))
-        self.biases.append(_zeros(output_dim))
-
-        # -------- optimizer state (per‑layer)
-        self.state = [{"m": _zeros(W.shape), "v": _zeros(W.shape),
-                       "mb": _zeros(b.shape), "vb": _zeros(b.shape)}
-                      for W, b in zip(self.weights, self.biases)]
-        self.t = 1  # Adam timestep
+        # -------- weights & biases (views into one flat buffer, grads mirror the layout)
+        self.params = _zeros(self.n_params, self.dtype)
+        self.grads = _zeros(self.n_params, self.dtype)
+        self._bind_views()
+        dims = self.layer_dims
+        for W, fan_in, fan_out in zip(self.weights, dims[:-1], dims[1:]):
+            W[...] = self._init_weights(fan_in, fan_out)
+
+        # -------- optimizer (state is allocated lazily on the first step)
+        self.optimizer = make_optimizer(optimizer_choice)
 
         # history
         self.loss_history, self.acc_history = [], []
 
+    def _init_weights(self, fan_in, fan_out):
+        return np.asarray(self.init_fn(fan_in, fan_out, rng=self.rng), dtype=self.dtype)
+
+    # ------------------------------------------- flat parameters ----------------------------------------------- #
+    @property
+    def layer_dims(self):
+        return [self.in_dim] + [self.hid_units] * self.n_hidden + [self.out_dim]
+
+    @property
+    def n_params(self) -> int:
+        dims = self.layer_dims
+        return sum(fi * fo + fo for fi, fo in zip(dims[:-1], dims[1:]))
+
+    def _views(self, buf):
+        """Split a flat buffer into per-layer `(W, b)` views: [W0 | b0 | W1 | b1 | ...]."""
+        Ws, Bs, off = [], [], 0
+        dims = self.layer_dims
+        for fi, fo in zip(dims[:-1], dims[1:]):
+            Ws.append(buf[off: off + fi * fo].reshape(fi, fo))
+            off += fi * fo
+            Bs.append(buf[off: off + fo])
+            off += fo
+        return Ws, Bs
+
+    def _bind_views(self):
+        self.weights, self.biases = self._views(self.params)
+        self.dWs, self.dBs = self._views(self.grads)
+
+    def set_params(self, weights, biases):
+        """Copy per-layer arrays into the flat buffer (keeps the views intact)."""
+        for dst, src in zip(self.weights + self.biases, list(weights) + list(biases)):
+            dst[...] = src
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for k in ("weights", "biases", "dWs", "dBs", "_ws", "_masks"):
+            state.pop(k, None)
+        return state
+
+    def __setstate__(self, state):
+        # copies / pickles get fresh views onto their own flat buffers
+        self.__dict__.update(state)
+        self._ws = None
+        self._masks = None
+        self._bind_views()
+
+    # ----------------------------------------------- workspace ------------------------------------------------- #
+
+    def _workspace(self, n_rows: int):
+        """Return a workspace big enough for `n_rows`, allocating only on first use / growth."""
+        dims, dropout = self.layer_dims, self.dropout > 0
+        keep_z = self.keep_z_h or self.keep_z_o
+        if self._ws is None or not self._ws.fits(dims, n_rows, dropout, self.dtype, keep_z):
+            self._ws = Workspace(dims, n_rows, dropout, self.dtype, keep_z)
+        return self._ws
+
+    def _dropout_mask(self, shape, out=None):
+        """Scaled keep-mask (0 or 1/(1-p)) drawn straight at the compute dtype."""
+        if out is None:
+            out = np.empty(shape, self.dtype)
+        self._mask_rng.random(out=out, dtype=out.dtype)
+        np.greater_equal(out, self.dropout, out=out)
+        out *= 1.0 / (1.0 - self.dropout)
+        return out
+
     # ------------------------------------------------ forward -------------------------------------------------- #
-    def _forward(self, X: np.ndarray):
+    def _forward(self, X: np.ndarray, ws: Workspace | None = None, training: bool = True):
+        if ws is not None:
+            return self._forward_ws(X, ws, training)
         acts = [X]
         zs = []
         A = X
+        drop = training and self.dropout > 0
+        self._masks = [] if drop else None
         for i in range(self.n_hidden):
             Z = A @ self.weights[i] + self.biases[i]
-            A = self.f_h(Z)
-            if self.dropout > 0:
-                mask = (np.random.rand(*A.shape) >= self.dropout).astype(np.float64)
-                A = A * mask / (1.0 - self.dropout)
-            zs.append(Z)
+            # derivative-from-output activations overwrite Z in place; z is only kept if needed
+            A = self.f_h(Z) if self.keep_z_h else self.f_h(Z, out=Z)
+            if drop:
+                mask = self._dropout_mask(A.shape)
+                A *= mask
+                self._masks.append(mask)
+            zs.append(Z if self.keep_z_h else None)
             acts.append(A)
         Z_out = A @ self.weights[-1] + self.biases[-1]
-        zs.append(Z_out)
-        acts.append(self.f_o(Z_out))
+        acts.append(self.f_o(Z_out) if self.keep_z_o else self.f_o(Z_out, out=Z_out))
+        zs.append(Z_out if self.keep_z_o else None)
+        return zs, acts
+
+    def _forward_ws(self, X: np.ndarray, ws: Workspace, training: bool = True):
+        """Same as `_forward` but writes every Z / A into the workspace buffers."""
+        n = X.shape[0]
+        zs, outs = ws.rows(ws.z, n), ws.rows(ws.a, n)    # `a` aliases `z` when no z is kept
+        acts = [X]
+        A = X
+        drop = training and self.dropout > 0
+        self._masks = ws.rows(ws.mask, n) if drop else None
+        for i in range(self.n_hidden):
+            Z = np.matmul(A, self.weights[i], out=zs[i])
+            Z += self.biases[i]
+            A = self.f_h(Z, out=outs[i])
+            if drop:
+                A *= self._dropout_mask(None, out=self._masks[i])
+            acts.append(A)
+        Z_out = np.matmul(A, self.weights[-1], out=zs[-1])
+        Z_out += self.biases[-1]
+        acts.append(self.f_o(Z_out, out=outs[-1]))
         return zs, acts
 
     # ------------------------------------------------ backward ------------------------------------------------- #
-    def _backward(self, zs, acts, y_true):
+    def _hidden_deriv(self, i, zs, acts, out=None):
+        """f_h'(z_i), from the cached activation unless the activation needs z."""
+        if self.keep_z_h:
+            return self.d_f_h(zs[i], out=out)
+        a = acts[i + 1]
+        if self._masks is not None:
+            # kept units were scaled by 1/(1-p) - undo that; dropped units are zeroed by the mask anyway
+            a = np.multiply(a, 1.0 - self.dropout, out=out)
+            return self.d_f_h(a, out=a)
+        return self.d_f_h(a, out=out)
+
+    def _output_deriv(self, zs, acts, out=None):
+        return self.d_f_o(zs[-1] if self.keep_z_o else acts[-1], out=out)
+
+    def _backward(self, zs, acts, y_true, ws: Workspace | None = None):
+        if ws is not None:
+            return self._backward_ws(zs, acts, y_true, ws)
         batch = y_true.shape[0]
         dWs = [None] * len(self.weights)
         dBs = [None] * len(self.biases)
@@ -117,7 +261,7 @@ class NeuralNetwork:
         else:
             delta = self.loss_grad(y_pred, y_true)
             if self.d_f_o is not None:
-                delta *= self.d_f_o(zs[-1])
+                delta *= self._output_deriv(zs, acts)
 
         # gradients for output layer
         dWs[-1] = acts[-2].T @ delta / batch
@@ -125,40 +269,92 @@ class NeuralNetwork:
 
         # ---- hidden layers
         for i in reversed(range(self.n_hidden)):
-            delta = (delta @ self.weights[i + 1].T) * self.d_f_h(zs[i])
+            delta = (delta @ self.weights[i + 1].T) * self._hidden_deriv(i, zs, acts)
+            if self._masks is not None:
+                delta *= self._masks[i]          # dropped units pass no gradient
             dWs[i] = acts[i].T @ delta / batch
             dBs[i] = delta.mean(axis=0)
+
+        # land them in the flat gradient buffer the optimizer reads
+        for dst, src in zip(self.dWs + self.dBs, dWs + dBs):
+            dst[...] = src
+        return self.dWs, self.dBs
+
+    def _backward_ws(self, zs, acts, y_true, ws: Workspace):
+        """In-place `_backward`: deltas and gradients land in workspace buffers."""
+        batch = y_true.shape[0]
+        deltas = ws.rows(ws.delta, batch)
+        dWs, dBs = self.dWs, self.dBs
+
+        y_pred = acts[-1]
+        if self.out_dim == 1 and y_true.ndim == 1:
+            y_true = y_true.reshape(-1, 1)
+
+        # ---- output delta
+        delta = deltas[-1]
+        if self.out_dim == 1 and self.f_o.__name__ == "sigmoid" and self.loss.__name__ == "bce_loss":
+            np.subtract(y_pred, y_true, out=delta)
+        elif self.f_o.__name__ == "softmax" and self.loss.__name__ == "cross_entropy":
+            np.subtract(y_pred, y_true, out=delta)
+        else:
+            np.copyto(delta, self.loss_grad(y_pred, y_true))
+            if self.d_f_o is not None:
+                delta *= self._output_deriv(zs, acts, out=ws.deriv(batch, self.out_dim))
+
+        np.matmul(acts[-2].T, delta, out=dWs[-1])
+        dWs[-1] /= batch
+        np.mean(delta, axis=0, out=dBs[-1])
+
+        # ---- hidden layers
+        for i in reversed(range(self.n_hidden)):
+            nxt = deltas[i]
+            np.matmul(delta, self.weights[i + 1].T, out=nxt)
+            nxt *= self._hidden_deriv(i, zs, acts, out=ws.deriv(batch, self.hid_units))
+            if self._masks is not None:
+                nxt *= self._masks[i]            # dropped units pass no gradient
+            delta = nxt
+            np.matmul(acts[i].T, delta, out=dWs[i])
+            dWs[i] /= batch
+            np.mean(delta, axis=0, out=dBs[i])
         return dWs, dBs
 
     # -------------------------------------------- optimizer step ---------------------------------------------- #
-    def _step(self, dWs, dBs, lr):
-        eps = 1e-8
-        beta1, beta2 = 0.9, 0.999
-        self.t += 1
-        for i in range(len(self.weights)):
-            if self.opt == 1:  # SGD
-                self.weights[i] -= lr * dWs[i]
-                self.biases[i] -= lr * dBs[i]
-            elif self.opt == 2:  # RMSprop
-                s = self.state[i]
-                s["v"] = 0.9 * s["v"] + 0.1 * (dWs[i] ** 2)
-                s["vb"] = 0.9 * s["vb"] + 0.1 * (dBs[i] ** 2)
-                self.weights[i] -= lr * dWs[i] / (np.sqrt(s["v"]) + eps)
-                self.biases[i] -= lr * dBs[i] / (np.sqrt(s["vb"]) + eps)
-            else:  # Adam
-                s = self.state[i]
-                s["m"] = beta1 * s["m"] + (1 - beta1) * dWs[i]
-                s["v"] = beta2 * s["v"] + (1 - beta2) * (dWs[i] ** 2)
-                s["mb"] = beta1 * s["mb"] + (1 - beta1) * dBs[i]
-                s["vb"] = beta2 * s["vb"] + (1 - beta2) * (dBs[i] ** 2)
-
-                m_hat = s["m"] / (1 - beta1 ** self.t)
-                v_hat = s["v"] / (1 - beta2 ** self.t)
-                mb_hat = s["mb"] / (1 - beta1 ** self.t)
-                vb_hat = s["vb"] / (1 - beta2 ** self.t)
-
-                self.weights[i] -= lr * m_hat / (np.sqrt(v_hat) + eps)
-                self.biases[i] -= lr * mb_hat / (np.sqrt(vb_hat) + eps)
+    def _step(self, lr):
+        """Apply one optimizer update from the gradients currently in `self.grads`."""
+        self.optimizer.step(self.params, self.grads, lr)
+
+    # ---------------------------------------------- metrics -------------------------------------------------- #
+    def _metrics(self, y_true, y_pred):
+        """(loss, accuracy) of one prediction block against its labels."""
+        if self.out_dim == 1:
+            loss_val = float(self.loss(y_true.reshape(-1, 1), y_pred))
+            acc_val = float(accuracy(y_true, y_pred.flatten()))
+        else:
+            loss_val = float(self.loss(y_true, y_pred))
+            acc_val = float(multiclass_accuracy(y_true, y_pred))
+        return loss_val, acc_val
+
+    def _evaluate(self, X, y, ws: Workspace | None = None):
+        """Dropout-free metrics pass (reuses the workspace when `X` fits in it)."""
+        if ws is not None and len(X) > ws.capacity:
+            ws = None
+        _, acts = self._forward(X, ws, training=False)
+        return self._metrics(y, acts[-1])
+
+    def _evaluate_stream(self, dataset: Dataset, batch_size: int, ws: Workspace | None = None):
+        """Dropout-free metrics over an out-of-core dataset, weighted by batch size."""
+        tot_loss = tot_acc = 0.0
+        n = 0
+        batches = dataset.prefetch(batch_size, shuffle=False, dtype=self.dtype)
+        try:
+            for X_b, y_b in batches:
+                loss_val, acc_val = self._evaluate(X_b, y_b, ws)
+                tot_loss += loss_val * len(X_b)
+                tot_acc += acc_val * len(X_b)
+                n += len(X_b)
+        finally:
+            batches.close()
+        return tot_loss / n, tot_acc / n
 
     # ---------------------------------------------- training loop --------------------------------------------- #
     def train(
@@ -168,109 +364,330 @@ class NeuralNetwork:
         epochs: int = 1000,
         batch_size: int | None = None,
         lr_min: float = 1e-4,
-        on_epoch_end: Callable[[int, float], None] | None = None,
+        on_epoch_end: Callable[[int, dict], bool | None] | None = None,
         end_on_epoch: int = 1,
+        metrics: str = "eval",
+        eval_every: int = 1,
+        eval_subsample: int | None = None,
+        shuffle: str = "full",
+        block_size: int | None = None,
+        validation_split: float = 0.0,
+        validation_data=None,
+        early_stopping: EarlyStopping | None = None,
+        plateau_window: int | None = None,
+        plateau_tol: float = 1e-3,
+        profiler: Profiler | None = None,
+        initial_epoch: int = 0,
+        lr_horizon: int | None = None,
+        data_parallel: DataParallel | None = None,
     ):
         """
         Train the network for a given number of epochs.
 
         Parameters:
-        - X: input data, shape (n_samples, n_features)
-        - y: true labels, shape (n_samples,) or (n_samples, n_outputs)
+        - X: input data, shape (n_samples, n_features) - or a `utils.datasets.Dataset`
+          (memory-mapped / CSV / generator) streamed through a background prefetch thread
+        - y: true labels, shape (n_samples,) or (n_samples, n_outputs); ignored for a Dataset
         - epochs: total epochs to train
         - batch_size: mini-batch size; if None, use full batch
         - lr_min: minimum learning rate for cosine decay
-        - loss_history: list to store loss values
-        - acc_history: list to store accuracy values
-        - lr_history: list to store learning rates
+        - metrics: how loss / accuracy are measured each epoch
+            "eval"    - separate dropout-free pass (exact numbers for the weights at epoch end)
+            "running" - averaged from the mini-batch outputs training already computed (free,
+                        but reflects dropout and weights that moved during the epoch)
+        - eval_every: with "eval", only evaluate every N epochs (the last epoch always is)
+        - eval_subsample: with "eval", evaluate on a fixed random subset of this many rows
+          (arrays only; a Dataset is evaluated with one streaming pass)
+        - shuffle / block_size: mini-batch order, see `utils/batching.py` ("full" | "block" | "none")
+        - validation_split: hold out this fraction of the rows (the tail, as views - no copy)
+        - validation_data: `(X_val, y_val)` or a Dataset; overrides validation_split
+        - early_stopping: `utils.convergence.EarlyStopping` checked on every evaluated epoch
+          (monitors val loss when there is validation data, else training loss)
+        - plateau_window / plateau_tol: also stop once training loss improved by less than
+          `plateau_tol` (relative) over the last `plateau_window` evaluated epochs
+        - on_epoch_end: `fn(epoch, logs)` every `end_on_epoch` epochs (and the last one);
+          `logs` has "epochs" / "learning_rate", plus loss / accuracy (/ val_*) on evaluated
+          epochs. Returning True stops training (stop_reason "callback")
+        - profiler: `utils.profiling.Profiler` timing each phase of the loop (None = no timing)
+        - initial_epoch: continue a run at this epoch (after `load_train_state` or an earlier
+          train() call): histories and the early-stopping record are extended, not reset
+        - lr_horizon: epochs the cosine schedule spans (default `epochs`), so a run trained
+          in pieces follows the same schedule as one call; epochs past it stay at `lr_min`
+        - data_parallel: `models.data_parallel.DataParallel` - each mini-batch's forward +
+          backward is split over its processes and all-reduced before the step (the profiler
+          then charges all of it to "forward")
+
+        Histories:
+        - loss_history / acc_history: one entry per evaluated epoch
+        - val_loss_history / val_acc_history: same schedule, when there is validation data
+        - metric_epochs: the epoch index each of those entries belongs to
+        - lr_history: learning rate of every epoch
+        - stopped_epoch / stop_reason / best_epoch: where and why training ended
         """
-        # initialize histories
-        self.loss_history = []
-        self.acc_history = []
-        self.lr_history = []
-
-        # determine batch size
-        if batch_size is None or batch_size < 1:
-            batch_size = len(X)
-
-        for epoch in range(epochs):
+        if metrics not in ("eval", "running"):
+            raise ValueError(f"Unknown metrics strategy: {metrics}")
+        eval_every = max(1, int(eval_every))
+        end_on_epoch = max(1, int(end_on_epoch))
+
+        initial_epoch = max(0, int(initial_epoch))
+        lr_horizon = self.lr_horizon = lr_horizon or epochs
+        self.lr_min = lr_min
+
+        # initialize histories (a continued run appends to the ones it has)
+        if initial_epoch == 0 or not hasattr(self, "lr_history"):
+            self.loss_history = []
+            self.acc_history = []
+            self.lr_history = []
+            self.metric_epochs = []
+            self.val_loss_history, self.val_acc_history = [], []
+            if early_stopping is not None:
+                early_stopping.reset()
+        self.metrics_schedule = {"strategy": metrics, "eval_every": eval_every, "eval_subsample": eval_subsample}
+        self.stopped_epoch, self.stop_reason, self.best_epoch = None, None, None
+
+        if isinstance(X, Dataset):
+            # out-of-core: batches are read / normalised / cast on a prefetch thread
+            dataset = X
+            if batch_size is None or batch_size < 1:
+                raise ValueError("Training from a Dataset needs a batch_size")
+            if validation_split and validation_data is None:
+                raise ValueError("validation_split needs in-memory arrays; pass validation_data instead")
+            epoch_batches = lambda: dataset.prefetch(batch_size, rng=self.rng, dtype=self.dtype)
+            evaluate = lambda: self._evaluate_stream(dataset, batch_size, ws)
+        else:
+            # everything in the hot loop runs at the compute dtype (no copy if it already matches)
+            X = np.asarray(X, dtype=self.dtype)
+            y = np.asarray(y, dtype=self.dtype)
+            if validation_split and validation_data is None:
+                n_train = len(X) - max(1, int(round(len(X) * validation_split)))
+                validation_data = (X[n_train:], y[n_train:])
+                X, y = X[:n_train], y[:n_train]
+
+            # batches are gathered into reused buffers (or are plain views) - never a shuffled copy
+            loader = BatchLoader(X, y, batch_size, shuffle=shuffle, block_size=block_size)
+            batch_size = loader.batch_size
+            epoch_batches = lambda: loader.epoch(self.rng)
+
+            # fixed evaluation set, picked once so epoch-to-epoch numbers stay comparable
+            X_eval, y_eval = X, y
+            if metrics == "eval" and eval_subsample and eval_subsample < len(X):
+                idx = np.sort(self.rng.choice(len(X), eval_subsample, replace=False))
+                X_eval, y_eval = X[idx], y[idx]
+            evaluate = lambda: self._evaluate(X_eval, y_eval, ws)
+
+        # validation pass (always dropout-free, on the same schedule as the metrics)
+        evaluate_val = None
+        if isinstance(validation_data, Dataset):
+            evaluate_val = lambda: self._evaluate_stream(validation_data, batch_size, ws)
+        elif validation_data is not None:
+            X_val = np.asarray(validation_data[0], dtype=self.dtype)
+            y_val = np.asarray(validation_data[1], dtype=self.dtype)
+            evaluate_val = lambda: self._evaluate(X_val, y_val, ws)
+        monitor_val = evaluate_val is not None and (
+            early_stopping is None or early_stopping.monitor in ("auto", "val_loss"))
+
+        # buffers sized once for this batch shape; the last short batch uses a prefix view
+        ws = self._workspace(batch_size) if self.use_workspace else None
+        dp = data_parallel
+        if dp is not None:
+            dp.attach(self, batch_size)
+
+        prof = profiler
+        if prof:
+            prof.start()
+        for epoch in range(initial_epoch, epochs):
             # update learning rate
             lr = (
-                cosine_decay(epoch, epochs, self.base_lr, lr_min)
+                cosine_decay(min(epoch, lr_horizon), lr_horizon, self.base_lr, lr_min)
                 if getattr(self, 'scheduler', False)
                 else self.base_lr
             )
 
-            # shuffle data
-            perm = np.random.permutation(len(X))
-            X_shuf, y_shuf = X[perm], y[perm]
-
             # mini-batch updates
-            for start in range(0, len(X_shuf), batch_size):
-                end = start + batch_size
-                zs, acts = self._forward(X_shuf[start:end])
-                dWs, dBs = self._backward(zs, acts, y_shuf[start:end])
-                self._step(dWs, dBs, lr)
-
-            # compute full-data metrics
-            _, acts_full = self._forward(X_shuf)
-            y_pred_full = acts_full[-1]
-            if self.out_dim == 1:
-                y_true = y_shuf.reshape(-1, 1)
-                loss_val = float(self.loss(y_true, y_pred_full))
-                acc_val = accuracy(y_shuf, y_pred_full.flatten())
-            else:
-                loss_val = float(self.loss(y_shuf, y_pred_full))
-                acc_val = multiclass_accuracy(y_shuf, y_pred_full)
-
-            # record histories
-            self.loss_history.append(loss_val)
-            self.acc_history.append(acc_val)
+            run_loss = run_acc = 0.0
+            seen = 0
+            if prof:
+                prof.mark()
+            batches = epoch_batches()
+            try:
+                for X_b, y_b in batches:
+                    if prof:
+                        prof.lap("data")
+                    if dp is not None:
+                        y_out = dp.gradients(X_b, y_b)   # sharded forward + backward, all-reduced into grads
+                    else:
+                        zs, acts = self._forward(X_b, ws)
+                        y_out = acts[-1]
+                    if prof:
+                        prof.lap("forward")
+                    if metrics == "running":
+                        b_loss, b_acc = self._metrics(y_b, y_out)
+                        run_loss += b_loss * len(X_b)
+                        run_acc += b_acc * len(X_b)
+                        seen += len(X_b)
+                        if prof:
+                            prof.lap("metrics")
+                    if dp is None:
+                        self._backward(zs, acts, y_b, ws)
+                    if prof:
+                        prof.lap("backward")
+                    self._step(lr)
+                    if prof:
+                        prof.lap("step", rows=len(X_b))
+            finally:
+                batches.close()                    # an error / interrupt mid-epoch stops the prefetch thread too
+            if prof:
+                prof.lap("data")                   # end of the batch stream (prefetch shutdown)
             self.lr_history.append(lr)
-            self.final_metrics = {
-                "loss": loss_val,
-                "accuracy": acc_val,
-                "learning_rate": lr,
-            }
-            
-            if epoch % 100 == 0:
-                print(f"Epoch {epoch}/{epochs} - Loss: {loss_val:.6f} - Accuracy: {acc_val:.3f} - Learning Rate: {lr:.4f}")
-    
-                
-    # ---------------------------------------------- save model --------------------------------------------- #
-    def save_model(self, filename: str, mode_id: int,
-                norm_stats: dict | None = None):
-        import os, numpy as np
-        os.makedirs("saved_models", exist_ok=True)
-        fp = f"saved_models/{filename}.npz"
 
-        params = {
+            # epoch metrics according to the chosen strategy
+            evaluated = metrics == "running" or epoch % eval_every == 0 or epoch == epochs - 1
+            if metrics == "running":
+                loss_val, acc_val = run_loss / seen, run_acc / seen
+            elif evaluated:
+                loss_val, acc_val = evaluate()
+
+            if evaluated:
+                # record histories
+                self.loss_history.append(loss_val)
+                self.acc_history.append(acc_val)
+                self.metric_epochs.append(epoch)
+                self.final_metrics = {
+                    "loss": loss_val,
+                    "accuracy": acc_val,
+                    "learning_rate": lr,
+                }
+                if evaluate_val is not None:
+                    val_loss, val_acc = evaluate_val()
+                    self.val_loss_history.append(val_loss)
+                    self.val_acc_history.append(val_acc)
+                    self.final_metrics.update(val_loss=val_loss, val_accuracy=val_acc)
+                if prof:
+                    prof.lap("eval")
+
+                if epoch % 100 == 0:
+                    print(f"Epoch {epoch}/{epochs} - Loss: {loss_val:.6f} - Accuracy: {acc_val:.3f} - Learning Rate: {lr:.4f}")
+
+                # convergence checks
+                if early_stopping is not None:
+                    monitored = self.val_loss_history[-1] if monitor_val else loss_val
+                    if early_stopping.update(epoch, monitored, self.params):
+                        self.stop_reason = "early_stopping"
+                if self.stop_reason is None and plateau_window and detect_plateau(self.loss_history, plateau_window, plateau_tol):
+                    self.stop_reason = "plateau"
+
+            # per-epoch callback (metrics only on evaluated epochs); returning True stops training
+            if on_epoch_end is not None and (epoch % end_on_epoch == 0 or epoch == epochs - 1):
+                logs = {"epochs": epochs, "learning_rate": lr}
+                if evaluated:
+                    logs.update(self.final_metrics)
+                if on_epoch_end(epoch, logs) and self.stop_reason is None:
+                    self.stop_reason = "callback"
+            if prof:
+                prof.lap("callback")
+                prof.epoch_end(epoch)
+
+            if self.stop_reason is not None:
+                print(f"Stopping at epoch {epoch}/{epochs} ({self.stop_reason})")
+                break
+
+        if prof:
+            prof.stop()
+        if dp is not None:
+            dp.detach()
+        self.stopped_epoch = epoch if epochs > initial_epoch else None
+        self.epochs_done = epoch + 1 if epochs > initial_epoch else initial_epoch
+        if early_stopping is not None:
+            self.best_epoch = early_stopping.best_epoch
+            if self.stop_reason is not None and early_stopping.restore(self.params):
+                # report the metrics of the weights we actually keep
+                loss_val, acc_val = evaluate()
+                self.final_metrics.update(loss=loss_val, accuracy=acc_val)
+                if evaluate_val is not None:
+                    val_loss, val_acc = evaluate_val()
+                    self.final_metrics.update(val_loss=val_loss, val_accuracy=val_acc)
+
+    # ---------------------------------------------- training state ------------------------------------------ #
+    def train_state(self, epoch: int | None = None) -> dict:
+        """Everything a later `train(initial_epoch=...)` needs to continue this run exactly:
+        weights, optimizer slots + timestep, both RNG streams, epoch count, LR-schedule
+        position and histories. Plain arrays / lists only, so it pickles (the network itself
+        holds lambdas). `epoch` = epochs completed, for a snapshot taken inside `on_epoch_end`."""
+        return {
+            "params": self.params.copy(),
+            "optimizer": {k: (v.copy() if isinstance(v, np.ndarray) else v)
+                          for k, v in self.optimizer.state_dict().items()},
+            "rng": self.rng.bit_generator.state,
+            "mask_rng": self._mask_rng.bit_generator.state,
+            "epoch": getattr(self, "epochs_done", 0) if epoch is None else int(epoch),
+            "lr_horizon": getattr(self, "lr_horizon", None),
+            "lr_min": getattr(self, "lr_min", None),
+            "histories": {k: list(getattr(self, k, [])) for k in self.HISTORIES},
+        }
+
+    def load_train_state(self, state: dict) -> int:
+        """Restore a `train_state()` snapshot; returns the epoch to pass as `initial_epoch`."""
+        np.copyto(self.params, state["params"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.rng.bit_generator.state = state["rng"]
+        self._mask_rng.bit_generator.state = state["mask_rng"]
+        for k, v in state.get("histories", {}).items():
+            setattr(self, k, list(v))
+        self.epochs_done = int(state["epoch"])
+        return self.epochs_done
+
+    # ---------------------------------------------- save model --------------------------------------------- #
+    def model_fields(self, mode_id: int, norm_stats: dict | None = None, include_optimizer: bool = True,
+                     state: dict | None = None) -> dict:
+        """The named arrays a saved model holds (checkpoints add to them, `utils/checkpoint.py`);
+        taken from `state` (a `train_state()` snapshot) instead of the live buffers when given."""
+        fields = {
             "in_dim":   self.in_dim,
             "hid_units": self.hid_units,
             "n_hidden": self.n_hidden,
             "out_dim":  self.out_dim,
             "mode_id":  mode_id,
+            "dtype":    self.dtype.name,
+            "params":   state["params"] if state else self.params,   # flat [W0 | b0 | W1 | b1 | ...]
+            "optimizer": self.optimizer.name,
         }
 
-        # layer params
-        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
-            params[f"W{i}"] = W
-            params[f"b{i}"] = b
+        # optimizer timestep + whatever state it has allocated so far
+        if include_optimizer:
+            for k, v in (state["optimizer"] if state else self.optimizer.state_dict()).items():
+                if k != "name":
+                    fields[f"opt_{k}"] = v
 
         # add normalization meta
         if norm_stats:
-            params["norm_method"] = norm_stats["method"]          # "max" | "zscore"
+            fields["norm_method"] = norm_stats["method"]          # "max" | "zscore"
             for k, v in norm_stats.items():
                 if k != "method":
-                    params[f"norm_{k}"] = v
+                    fields[f"norm_{k}"] = np.asarray(v, dtype=self.dtype)
+        return fields
 
-        np.savez(fp, **params)
+    def save_model(self, filename: str, mode_id: int,
+                norm_stats: dict | None = None, include_optimizer: bool = True, fmt: str = "npz"):
+        """fmt="npz" (np.savez archive) or "nnm" (memory-mappable, see utils/model_format.py)."""
+        import os, numpy as np
+        if fmt not in ("npz", "nnm"):
+            raise ValueError(f"Unknown model format: {fmt}")
+        os.makedirs("saved_models", exist_ok=True)
+        fp = f"saved_models/{filename}.{fmt}"
+
+        params = self.model_fields(mode_id, norm_stats, include_optimizer)
+
+        if fmt == "nnm":
+            write_model(fp, params)
+        else:
+            np.savez(fp, **params)
         print(f"Model has been successfully saved to {fp}")
 
     def _apply_norm(self, X):
-        if getattr(self, "norm_method", "none") == "max":
+        method = getattr(self, "norm_method", "none")
+        if method == "max":
             return X / self.norm_max
-        if self.norm_method == "zscore":
+        if method == "zscore":
             return (X - self.norm_mean) / self.norm_std
         return X
 
@@ -278,4 +695,4 @@ class NeuralNetwork:
 
     # ---------------------------------------------- inference -------------------------------------------------- #
     def predict(self, X):
-        return self._forward(X)[1][-1]
+        return self._forward(X, training=False)[1][-1]
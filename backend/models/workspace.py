@@ -0,0 +1,54 @@
+"""workspace.py - preallocated scratch buffers for NeuralNetwork
+================================================================
+A `Workspace` owns the batch-shaped arrays the training hot loop writes to:
+
+* per-layer pre-activations `z`, activations `a` and dropout masks
+  (`a` is the same list as `z` when pre-activations needn't be kept),
+* per-layer deltas plus one derivative scratch buffer.
+
+Gradients and optimizer scratch are batch independent and live with the
+network's flat `grads` buffer / the optimizer instead.
+
+Batch-shaped buffers are sized for `capacity` rows once; a shorter batch
+(e.g. the last one of an epoch) just uses the leading `n` rows, which are
+still C-contiguous, so `np.matmul(..., out=)` works without reallocating.
+"""
+from __future__ import annotations
+import numpy as np
+
+
+class Workspace:
+    """Scratch buffers for one network layout and a maximum batch size."""
+
+    def __init__(self, layer_dims, capacity: int, dropout: bool = False, dtype=np.float64,
+                 keep_z: bool = True) -> None:
+        # layer_dims = [in_dim, hid, ..., hid, out_dim]
+        self.layer_dims = tuple(layer_dims)
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        outs = self.layer_dims[1:]
+        n_hidden = len(outs) - 1
+
+        # -------- batch-shaped buffers (rows = capacity)
+        self.z = [np.empty((capacity, d), dtype) for d in outs]
+        # activations whose derivative comes from their output are computed over z in place
+        self.a = [np.empty((capacity, d), dtype) for d in outs] if keep_z else self.z
+        self.keep_z = keep_z
+        self.delta = [np.empty((capacity, d), dtype) for d in outs]
+        self._deriv = np.empty(capacity * max(outs), dtype)
+        self.mask = [np.empty((capacity, d), dtype) for d in outs[:n_hidden]] if dropout else None
+
+    def fits(self, layer_dims, n_rows: int, dropout: bool, dtype, keep_z: bool = True) -> bool:
+        return (tuple(layer_dims) == self.layer_dims
+                and keep_z == self.keep_z
+                and np.dtype(dtype) == self.dtype
+                and n_rows <= self.capacity
+                and dropout == (self.mask is not None))
+
+    def rows(self, bufs, n: int):
+        """Leading-`n`-row views of a list of batch-shaped buffers."""
+        return [buf[:n] for buf in bufs]
+
+    def deriv(self, n: int, d: int):
+        """Contiguous `(n, d)` derivative scratch carved from one flat buffer."""
+        return self._deriv[: n * d].reshape(n, d)
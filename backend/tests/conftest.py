@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from models.network import NeuralNetwork
+from utils.config import MODES
+from utils.winit import xavier_init
+
+
+def make_net(mode_id=2, in_dim=5, hid=8, layers=2, out_dim=1, **kw):
+    kw.setdefault("init_fn", xavier_init)
+    kw.setdefault("seed", 0)
+    return NeuralNetwork(in_dim, hid, layers, out_dim, MODES[mode_id], **kw)
+
+
+def make_data(n=120, in_dim=5, mode_id=2, seed=0):
+    """Small separable-ish problem shaped for `mode_id` (one-hot labels for mode 5)."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, in_dim))
+    score = X[:, 0] - 0.5 * X[:, 1]
+    if mode_id == 5:
+        return X, np.eye(3)[np.digitize(score, [-0.5, 0.5])]
+    if mode_id == 3:
+        return X, np.tanh(score)
+    return X, (score > 0).astype(float)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in a scratch dir: saved_models/ and saved_checkpoints/ are relative paths."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "saved_models").mkdir()
+    return tmp_path
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from utils.activation import ACTIVATIONS, deriv_relu, deriv_sig, deriv_tanh
+
+Z = np.linspace(-6, 6, 101)
+Z = Z[np.abs(Z) > 1e-3]          # keep finite differences off the ReLU kink
+INPUT_DERIVS = {"sigmoid": deriv_sig, "tanh": deriv_tanh, "relu": deriv_relu}
+
+
+@pytest.mark.parametrize("name", ["sigmoid", "tanh", "relu"])
+def test_output_derivative_matches_numeric(name):
+    spec = ACTIVATIONS[name]
+    f, h = spec["fn"], 1e-6
+    numeric = (f(Z + h) - f(Z - h)) / (2 * h)
+    assert spec["needs"] == "output"
+    np.testing.assert_allclose(spec["deriv"](f(Z)), numeric, atol=1e-8)
+    np.testing.assert_allclose(INPUT_DERIVS[name](Z), numeric, atol=1e-8)
+
+
+@pytest.mark.parametrize("name", ["sigmoid", "tanh", "relu", "softmax"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_in_place_evaluation(name, dtype):
+    spec = ACTIVATIONS[name]
+    x = np.linspace(-3, 3, 12, dtype=dtype).reshape(3, 4)
+    expected = spec["fn"](x.copy())
+    buf = x.copy()
+    assert spec["fn"](buf, out=buf) is buf and buf.dtype == dtype
+    np.testing.assert_allclose(buf, expected)
+    if spec["deriv"] is not None:
+        expected = spec["deriv"](buf.copy())
+        assert spec["deriv"](buf, out=buf) is buf
+        np.testing.assert_allclose(buf, expected)
+
+
+def test_sigmoid_does_not_overflow_float32():
+    with np.errstate(over="raise"):
+        out = ACTIVATIONS["sigmoid"]["fn"](np.array([-200.0, 200.0], np.float32))
+    np.testing.assert_allclose(out, [0.0, 1.0], atol=1e-30)
+
+
+def test_softmax_rows_sum_to_one():
+    x = np.random.default_rng(0).standard_normal((5, 4)) * 50
+    np.testing.assert_allclose(ACTIVATIONS["softmax"]["fn"](x).sum(axis=1), 1.0)
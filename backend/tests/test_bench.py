@@ -0,0 +1,34 @@
+import json
+from benchmarks import bench
+
+
+def _run(reference, **throughputs):
+    return {"reference": reference, "quick": True,
+            "results": {k: ({"best_throughput": v} if v else {"error": "skipped"}) for k, v in throughputs.items()}}
+
+
+def test_compare_flags_drops_beyond_the_threshold():
+    baseline = _run(100.0, a=1000.0, b=1000.0, c=1000.0)
+    current = _run(100.0, a=900.0, b=800.0, c=None)
+    rows, regressions = bench.compare(current, baseline, threshold=0.15)
+    assert dict(rows) == {"a": 0.9, "b": 0.8}             # errored cases are skipped
+    assert regressions == ["b"]
+
+
+def test_compare_corrects_for_machine_speed():
+    baseline = _run(100.0, a=1000.0)
+    slower_box = _run(50.0, a=500.0)
+    assert bench.compare(slower_box, baseline) == ([("a", 1.0)], [])
+    assert bench.compare(slower_box, baseline, normalize=False)[1] == ["a"]
+
+
+def test_suite_round_trips_through_a_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench, "MIN_SAMPLE_S", {True: 0.001, False: 0.001})
+    path = str(tmp_path / "base.json")
+    assert bench.main(["-k", "infer/rows-64", "--quick", "--repeat", "2", "--save-baseline", path]) == 0
+    with open(path) as f:
+        saved = json.load(f)
+    r = saved["results"]["infer/rows-64"]
+    assert set(saved["results"]) == {"infer/rows-64"} and r["units"] == 256 and r["throughput"] > 0   # 4 predicts of 64 rows
+    assert bench.main(["-k", "infer/rows-64", "--quick", "--repeat", "2", "--compare", path,
+                       "--threshold", "0.99"]) == 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from api.train_runner import run_training_from_api
+from utils.checkpoint import CheckpointWriter, checkpoint_fields, read_checkpoint
+from conftest import make_net, make_data
+
+X, Y = make_data(160)
+BASE = dict(input_size=5, output_size=1, hidden_size=8, num_layers=2, dropout=0.2, optimizer_choice=3, mode_id=2,
+            batch_size=32, learn_rate=0.01, epochs=20, init_id=2, data=X.tolist(), labels=Y.tolist(), seed=3,
+            use_scheduler=True)
+
+
+def run(**kw):
+    return run_training_from_api(**{**BASE, **kw})
+
+
+def test_resume_matches_uninterrupted_run(workdir):
+    full = run()
+    cut = run(checkpoint=True, checkpoint_file="saved_checkpoints/a.npz", on_epoch_end=lambda e, logs: e == 11)
+    assert cut["stop_reason"] == "callback"
+    assert read_checkpoint("saved_checkpoints/a.npz")[1]["epoch"] == 12
+
+    resumed = run(resume_from="a")
+    assert resumed["resumed_from_epoch"] == 12
+    assert resumed["loss_history"] == full["loss_history"]
+    assert resumed["lr_history"] == full["lr_history"]
+
+
+def test_extending_a_finished_run_keeps_its_schedule(workdir):
+    run(checkpoint=True, checkpoint_file="saved_checkpoints/b.npz")
+    _, meta = read_checkpoint("saved_checkpoints/b.npz")
+    assert (meta["epoch"], meta["lr_horizon"], meta["lr_min"]) == (20, 20, 1e-4)
+
+    more = run(resume_from="b", epochs=30)
+    lrs = more["lr_history"]
+    assert len(lrs) == 30
+    assert all(a >= b for a, b in zip(lrs, lrs[1:]))           # never warms back up
+    assert lrs[20:] == [pytest.approx(1e-4)] * 10
+
+    fresh_curve = run(resume_from="b", epochs=30, lr_horizon=30)["lr_history"]
+    assert fresh_curve[20] > lrs[20]                           # an explicit horizon still wins
+
+
+def test_resume_needs_more_epochs(workdir):
+    run(checkpoint=True, checkpoint_file="saved_checkpoints/c.npz", epochs=5)
+    with pytest.raises(ValueError):
+        run(resume_from="c", epochs=5)
+
+
+def test_writer_keeps_newest_snapshot(workdir):
+    net = make_net()
+    writer = CheckpointWriter("saved_checkpoints/w.npz")
+    for epoch in range(1, 6):
+        writer.submit(checkpoint_fields(net, 2, epoch=epoch))
+    writer.close()
+    stats = writer.stats()
+    assert stats["error"] is None
+    assert stats["written"] + stats["superseded"] == 5
+    state, meta = read_checkpoint("saved_checkpoints/w.npz")
+    assert meta["epoch"] == 5
+    np.testing.assert_array_equal(state["params"], net.params)
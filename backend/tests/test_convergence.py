@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from utils.convergence import EarlyStopping, detect_plateau
+from conftest import make_net, make_data
+
+
+def test_detect_plateau():
+    assert not detect_plateau([1.0, 0.9, 0.8], window=3)          # not enough history yet
+    assert detect_plateau([1.0, 0.9995, 0.9992, 0.9991], window=3, rel_tol=1e-3)
+    assert not detect_plateau([1.0, 0.99, 0.98, 0.97], window=3, rel_tol=1e-3)
+
+
+def test_early_stopping_counts_checks_without_improvement():
+    es = EarlyStopping(patience=2, min_delta=0.01)
+    params = np.zeros(3)
+    assert not es.update(0, 1.0, params)
+    params[:] = 1
+    assert not es.update(1, 0.995, params)             # within min_delta: no improvement
+    assert es.update(2, 0.999, params)
+    assert es.best_epoch == 0
+    assert es.restore(params) and (params == 0).all()
+    es.reset()
+    assert es.best_epoch is None and not es.restore(params)
+
+
+def test_train_restores_the_best_weights():
+    X, y = make_data(100)
+    net = make_net(optimizer_choice=3, learn_rate=0.05)
+    snaps = {}
+    es = EarlyStopping(patience=2, min_delta=1.0)       # nothing after epoch 0 counts as better
+    net.train(X, y, epochs=20, batch_size=20, early_stopping=es,
+              on_epoch_end=lambda e, logs: snaps.update({e: net.params.copy()}))
+    assert (net.stop_reason, net.stopped_epoch, net.best_epoch) == ("early_stopping", 2, 0)
+    np.testing.assert_array_equal(net.params, snaps[0])
+    assert net.final_metrics["loss"] == pytest.approx(net._evaluate(X, y)[0])   # metrics of the kept weights
+
+
+def test_early_stopping_monitors_validation_loss():
+    X, y = make_data(100)
+    net = make_net(optimizer_choice=3, learn_rate=0.05)
+    es = EarlyStopping(patience=3)
+    net.train(X, y, epochs=15, batch_size=20, validation_split=0.2, early_stopping=es)
+    assert es.best == min(net.val_loss_history)
+    assert len(net.val_loss_history) == len(net.loss_history)
+
+
+def test_train_stops_on_a_plateau():
+    X, y = make_data(100)
+    net = make_net()
+    net.train(X, y, epochs=50, batch_size=20, plateau_window=3, plateau_tol=1.0)
+    assert net.stop_reason == "plateau" and net.stopped_epoch == 3
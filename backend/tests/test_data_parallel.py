@@ -0,0 +1,51 @@
+from contextlib import nullcontext
+import numpy as np
+import pytest
+from models.data_parallel import DataParallel, shard_bounds
+from conftest import make_net, make_data
+
+
+def test_shard_bounds():
+    assert shard_bounds(10, 3) == [0, 4, 7, 10]
+    assert shard_bounds(2, 4) == [0, 1, 2, 2, 2]        # empty shards last
+
+
+@pytest.mark.parametrize("dropout", [0.0, 0.3])
+def test_matches_single_process(dropout):
+    # a reference step on every batch: timing the single-process path must not move training
+    X, y = make_data(200)
+    single = make_net(dropout_rate=dropout, optimizer_choice=3)
+    single.train(X, y, epochs=3, batch_size=50)
+
+    net = make_net(dropout_rate=dropout, optimizer_choice=3)
+    limits = []
+    with DataParallel(2, n_workers=3, reference_every=1, reference_limit=lambda: limits.append(1) or nullcontext()) as dp:
+        net.train(X, y, epochs=3, batch_size=50, data_parallel=dp)
+        stats = dp.stats()
+        assert not np.shares_memory(net.params, dp._P)   # detached after train()
+    np.testing.assert_allclose(net.params, single.params, atol=1e-10)   # summation order only
+    assert net.loss_history == pytest.approx(single.loss_history, abs=1e-10)
+
+    assert stats["workers"] == 3 and stats["steps"] == 12
+    assert stats["reference_steps"] == len(limits) == 12 and stats["reference_seconds"] > 0
+    assert stats["speedup"] > 0
+
+
+def test_reference_is_sampled_from_the_second_step():
+    X, y = make_data(200)
+    with DataParallel(2, n_workers=2, reference_every=5) as dp:
+        make_net().train(X, y, epochs=3, batch_size=50, data_parallel=dp)     # steps 1..12
+        assert dp.stats()["reference_steps"] == 3                             # steps 2, 7, 12
+    with DataParallel(2, n_workers=2, reference_every=None) as dp:
+        make_net().train(X, y, epochs=1, batch_size=50, data_parallel=dp)
+        assert dp.stats()["reference_steps"] == 0 and dp.stats()["speedup"] is None
+
+
+def test_close_frees_workers_and_memory():
+    X, y = make_data(60)
+    dp = DataParallel(2, n_workers=2)
+    make_net().train(X, y, epochs=1, batch_size=30, data_parallel=dp)
+    procs = list(dp._procs)
+    dp.close()
+    assert not dp._blocks and not any(p.is_alive() for p in procs)
+    assert dp.stats()["speedup"] is not None
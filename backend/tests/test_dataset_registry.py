@@ -0,0 +1,70 @@
+import io
+import numpy as np
+import pytest
+from api.dataset_registry import DatasetRegistry, parse_upload
+from api.train_runner import prepare_dataset
+
+M = np.column_stack([np.arange(12.0).reshape(6, 2), [0, 1, 1, 2, 0, 1]])
+
+
+def _npy(a):
+    buf = io.BytesIO()
+    np.save(buf, a)
+    return buf.getvalue()
+
+
+def test_formats_parse_to_the_same_arrays():
+    csv = "\n".join(",".join(f"{v:g}" for v in row) for row in M).encode()
+    for X, y in (parse_upload(_npy(M)), parse_upload(csv, fmt="csv"),
+                 parse_upload(M.astype("<f4").tobytes(), fmt="raw", n_columns=3, dtype="float32")):
+        np.testing.assert_array_equal(X, M[:, :2])
+        np.testing.assert_array_equal(y, M[:, 2])
+    X, y = parse_upload(_npy(M), label_column=0)
+    np.testing.assert_array_equal(y, M[:, 0])
+
+
+@pytest.mark.parametrize("body,kw", [
+    (_npy(np.arange(5.0)), {}),                                   # not a matrix
+    (_npy(np.array([[1.0, np.nan]])), {}),
+    (np.zeros(5).tobytes(), dict(fmt="raw", n_columns=2)),        # ragged
+    (b"1,2", dict(fmt="xml")),
+])
+def test_bad_uploads_are_rejected(body, kw):
+    with pytest.raises(ValueError):
+        parse_upload(body, **kw)
+
+
+def test_content_addressed_and_memory_mapped(tmp_path):
+    registry = DatasetRegistry(str(tmp_path))
+    meta, created = registry.put_bytes(_npy(M))
+    assert created and meta["n_samples"] == 6 and meta["n_features"] == 2
+    assert meta["class_counts"] == {"0": 2, "1": 3, "2": 1} and meta["n_classes"] == 3
+    np.testing.assert_allclose(meta["mean"], M[:, :2].mean(0))
+
+    again, created = registry.put(M[:, :2], M[:, 2])          # same values, however they arrived
+    assert not created and again["dataset_id"] == meta["dataset_id"]
+
+    X, y, _ = registry.load(meta["dataset_id"])
+    assert isinstance(X, np.memmap) and not X.flags.writeable
+    np.testing.assert_array_equal(y, M[:, 2])
+    assert [m["dataset_id"] for m in registry.entries()] == [meta["dataset_id"]]
+    assert registry.delete(meta["dataset_id"]) and meta["dataset_id"] not in registry
+
+
+def test_prepare_dataset_reads_the_memmap_in_place(tmp_path):
+    registry = DatasetRegistry(str(tmp_path))
+    meta, _ = registry.put(M[:, :2], M[:, 2] % 2)
+    X, y, meta = registry.load(meta["dataset_id"])
+    stats = (meta["mean"], meta["std"])
+    data, _, _, norm = prepare_dataset(X, y, 3, 1, stats=stats)             # tanh mode: no z-scoring
+    assert norm is None and np.shares_memory(data, X)
+    data, _, _, norm = prepare_dataset(X, y, 2, 1, stats=stats)
+    assert norm and not np.shares_memory(data, X)
+    np.testing.assert_array_equal(X, M[:, :2])                              # the registry copy is untouched
+
+
+def test_ids_cannot_escape_the_root(tmp_path):
+    registry = DatasetRegistry(str(tmp_path))
+    assert "../etc" not in registry
+    with pytest.raises(KeyError):
+        registry.load("../" + "a" * 61)
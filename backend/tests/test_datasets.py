@@ -0,0 +1,79 @@
+import threading
+import time
+import numpy as np
+import pytest
+from utils.datasets import NpyDataset, Prefetcher
+from conftest import make_net, make_data
+
+
+def _prefetch_threads():
+    return [t for t in threading.enumerate() if t.name == "batch-prefetch" and t.is_alive()]
+
+
+def _npy(tmp_path, n=400):
+    X, y = make_data(n)
+    np.save(tmp_path / "X.npy", X)
+    np.save(tmp_path / "y.npy", y)
+    return NpyDataset(str(tmp_path / "X.npy"), str(tmp_path / "y.npy"), shard_size=32)
+
+
+def test_prefetcher_yields_everything_in_order():
+    with Prefetcher(iter(range(50)), depth=2) as p:
+        assert list(p) == list(range(50))
+
+
+def test_prefetcher_close_releases_the_source():
+    released = threading.Event()
+
+    def source():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            released.set()
+
+    p = Prefetcher(source(), depth=1)
+    assert next(p) == 0
+    p.close()
+    assert released.wait(2)
+    assert not p._thread.is_alive()
+
+
+def test_prefetcher_surfaces_worker_errors():
+    def source():
+        yield 1
+        raise OSError("bad shard")
+
+    with Prefetcher(source()) as p:
+        assert next(p) == 1
+        with pytest.raises(OSError):
+            next(p)
+
+
+def test_error_mid_epoch_stops_the_prefetch_thread(tmp_path):
+    dataset = _npy(tmp_path)
+    net = make_net()
+    calls = {"n": 0}
+    forward = net._forward
+
+    def failing_forward(X, ws=None, training=True):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("boom")
+        return forward(X, ws, training=training)
+
+    net._forward = failing_forward
+    with pytest.raises(RuntimeError):
+        net.train(dataset, None, epochs=2, batch_size=8)
+    deadline = time.monotonic() + 2
+    while _prefetch_threads() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not _prefetch_threads()
+
+
+def test_streamed_training_runs_clean(tmp_path):
+    dataset = _npy(tmp_path)
+    net = make_net()
+    net.train(dataset, None, epochs=3, batch_size=32)
+    assert len(net.loss_history) == 3 and np.isfinite(net.loss_history).all()
+    assert not _prefetch_threads()
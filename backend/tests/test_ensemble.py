@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from models.ensemble import StackedEnsemble
+from conftest import make_net, make_data
+
+
+@pytest.mark.parametrize("mode_id,optimizer_choice", [(2, 3), (4, 4), (5, 2)])
+def test_stacked_matches_separate_runs(mode_id, optimizer_choice):
+    out_dim = 3 if mode_id == 5 else 1
+    X, y = make_data(100, mode_id=mode_id)
+
+    def nets():
+        return [make_net(mode_id, out_dim=out_dim, optimizer_choice=optimizer_choice, seed=s, learn_rate=lr,
+                         use_scheduler=True) for s, lr in ((0, 0.01), (1, 0.05), (2, 0.002))]
+
+    separate = nets()
+    for net in separate:                 # fixed batch order: each net's shuffle RNG differs from the ensemble's
+        net.train(X, y, epochs=4, batch_size=32, shuffle="none")
+
+    stacked_nets = nets()
+    ens = StackedEnsemble(stacked_nets)
+    ens.train(X, y, epochs=4, batch_size=32, shuffle="none")
+    ens.unstack_into(stacked_nets)
+    for net, ref, hist in zip(stacked_nets, separate, ens.histories()):
+        np.testing.assert_allclose(net.params, ref.params, atol=1e-12)
+        assert hist["loss_history"] == pytest.approx(ref.loss_history, abs=1e-12)
+        assert hist["lr_history"] == pytest.approx(ref.lr_history)
+
+
+def test_dropout_rates_are_per_model():
+    X, y = make_data(64)
+    ens = StackedEnsemble([make_net(dropout_rate=p) for p in (0.0, 0.5)])
+    ens._forward(X.astype(ens.dtype))
+    masks = ens._masks[0]
+    assert (masks[0] == 1).all()                     # rate 0 keeps every unit
+    assert set(np.unique(masks[1])) == {0.0, 2.0}
+
+
+@pytest.mark.parametrize("kw", [dict(hid=6), dict(optimizer_choice=1), dict(mode_id=3), dict(dtype=np.float32)])
+def test_mismatched_networks_are_rejected(kw):
+    with pytest.raises(ValueError):
+        StackedEnsemble([make_net(optimizer_choice=3), make_net(**{"optimizer_choice": 3, **kw})])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from models.inference import InferenceModel
+from conftest import make_net, make_data
+
+
+@pytest.mark.parametrize("mode_id", [1, 3, 4, 5])
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_matches_network_predict(mode_id, chunk_size):
+    out_dim = 3 if mode_id == 5 else 1
+    X, _ = make_data(50, mode_id=mode_id)
+    net = make_net(mode_id, out_dim=out_dim, layers=3)
+    model = InferenceModel.from_network(net, chunk_size=chunk_size)
+    np.testing.assert_allclose(model.predict(X), net.predict(X), atol=1e-12)
+    np.testing.assert_array_equal(model.predict(X[3]), model.predict(X[3:4]))
+
+
+@pytest.mark.parametrize("method", ["zscore", "max"])
+def test_applies_saved_normalisation(method):
+    X, _ = make_data(20)
+    net = make_net()
+    net.norm_method = method
+    net.norm_mean, net.norm_std, net.norm_max = X.mean(0), X.std(0), np.abs(X).max(0)
+    Xn = (X - net.norm_mean) / net.norm_std if method == "zscore" else X / net.norm_max
+    np.testing.assert_allclose(InferenceModel.from_network(net).predict(X), net.predict(Xn), atol=1e-12)
+
+
+def test_is_frozen_copy_of_the_weights():
+    X, y = make_data(40)
+    net = make_net()
+    model = InferenceModel.from_network(net)
+    before = model.predict(X)
+    net.train(X, y, epochs=2, batch_size=20)
+    np.testing.assert_array_equal(model.predict(X), before)
+
+
+def test_predict_classes_and_shape_check():
+    X, _ = make_data(30, mode_id=5)
+    net = make_net(5, out_dim=3)
+    model = InferenceModel.from_network(net)
+    np.testing.assert_array_equal(model.predict_classes(X), net.predict(X).argmax(1))
+    with pytest.raises(ValueError):
+        model.predict(np.zeros((2, 4)))
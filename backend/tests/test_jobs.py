@@ -0,0 +1,79 @@
+import asyncio
+import time
+import pytest
+from api.jobs import CANCELLED, COMPLETED, FAILED, FINISHED, JobManager, Subscriber
+from conftest import make_data
+
+X, Y = make_data(80)
+JOB = dict(input_size=5, output_size=1, hidden_size=8, num_layers=2, dropout=0.0, optimizer_choice=3, mode_id=2,
+           batch_size=20, learn_rate=0.01, epochs=5, init_id=2, data=X.tolist(), labels=Y.tolist(), seed=0)
+
+
+def wait(store, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while store[job_id]["status"] not in FINISHED:
+        assert time.monotonic() < deadline, store[job_id]
+        time.sleep(0.05)
+    return store[job_id]
+
+
+@pytest.fixture
+def jobs(workdir):
+    finished = []
+    manager = JobManager({}, max_workers=1, on_finish=lambda job_id, result: finished.append(job_id))
+    manager.finished = finished
+    yield manager
+    manager.shutdown()
+
+
+def test_job_runs_in_the_pool(jobs):
+    job_id = jobs.submit(JOB)
+    job = wait(jobs.store, job_id)
+    assert job["status"] == COMPLETED and job["started_at"] is not None
+    assert len(job["loss"]) == 5 and job["final_metrics"]["loss"] == job["loss"][-1]
+    assert jobs.finished == [job_id]
+    assert "result" not in jobs.snapshot(job_id)
+
+
+def test_cancel_queued_and_running_jobs(jobs):
+    long = jobs.submit({**JOB, "epochs": 100000})
+    next_up = jobs.submit(JOB)                                 # the pool already hands this one to a worker queue
+    queued = jobs.submit(JOB)
+    assert jobs.cancel(queued) == CANCELLED                  # never reached a worker
+    jobs.cancel(next_up)
+    while jobs.store[long]["progress"] is None:
+        time.sleep(0.05)
+    jobs.cancel(long)
+    job = wait(jobs.store, long)
+    assert job["status"] == CANCELLED and job["result"]["stop_reason"] == "callback"
+    assert 0 < len(job["loss"]) < 100000                      # partial histories are kept
+    assert jobs.finished == []
+
+
+def test_failed_job_reports_the_error(jobs):
+    job = wait(jobs.store, jobs.submit({**JOB, "mode_id": 99}))
+    assert job["status"] == FAILED and job["error"]
+
+
+def test_subscriber_keeps_only_the_newest_frame():
+    async def main():
+        sub = Subscriber(asyncio.get_running_loop())
+        for i in range(3):
+            sub.publish({"i": i})
+        return await sub.next(), sub.dropped
+
+    assert asyncio.run(main()) == ({"i": 2}, 2)
+
+
+def test_subscribe_streams_to_the_done_frame(jobs):
+    async def main():
+        job_id = jobs.submit(JOB)
+        sub = jobs.subscribe(job_id, asyncio.get_running_loop())
+        frames = [await sub.next()]
+        while frames[-1]["type"] != "done":
+            frames.append(await asyncio.wait_for(sub.next(), 60))
+        return frames
+
+    frames = asyncio.run(main())
+    assert frames[0]["type"] == "status"
+    assert frames[-1]["status"] == COMPLETED and frames[-1]["epochs_run"] == 5
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from utils.model_format import convert_npz, read_model
+from utils.model_loader import load_full_model, load_inference_model
+from conftest import make_net, make_data
+
+
+def _save_legacy(net, path, norm):
+    # the layout before the flat buffer: per-layer W{i} / b{i}, no dtype / optimizer fields
+    fields = {"in_dim": net.in_dim, "hid_units": net.hid_units, "n_hidden": net.n_hidden,
+              "out_dim": net.out_dim, "mode_id": 2, "norm_method": "zscore",
+              "norm_mean": norm[0], "norm_std": norm[1]}
+    for i, (W, b) in enumerate(zip(net.weights, net.biases)):
+        fields[f"W{i}"], fields[f"b{i}"] = W, b
+    np.savez(path, **fields)
+
+
+@pytest.mark.parametrize("fmt", ["npz", "nnm"])
+def test_save_load_round_trip(workdir, fmt):
+    X, y = make_data()
+    net = make_net(optimizer_choice=3)
+    net.train(X, y, epochs=3, batch_size=32)
+    net.save_model("m", 2, {"method": "zscore", "mean": X.mean(0), "std": X.std(0)}, fmt=fmt)
+
+    loaded, _ = load_full_model(f"m.{fmt}")
+    np.testing.assert_array_equal(loaded.params, net.params)
+    assert loaded.optimizer.t == net.optimizer.t
+    for k, v in net.optimizer.state.items():
+        np.testing.assert_array_equal(loaded.optimizer.state[k], v)
+    model, _ = load_inference_model(f"m.{fmt}")
+    np.testing.assert_allclose(model.predict(X), net.predict((X - X.mean(0)) / X.std(0)), atol=1e-12)
+
+
+def test_nnm_arrays_are_aligned_views(workdir):
+    net = make_net()
+    net.save_model("m", 2, fmt="nnm")
+    data = read_model("saved_models/m.nnm")
+    assert isinstance(data["params"], np.memmap) or data["params"].base is not None
+    assert data["params"].ctypes.data % 64 == 0
+
+
+def test_convert_legacy_npz(workdir):
+    X, _ = make_data()
+    net = make_net()
+    norm = (X.mean(0), X.std(0))
+    _save_legacy(net, "saved_models/old.npz", norm)
+    convert_npz("saved_models/old.npz")
+
+    want = net.predict((X - norm[0]) / norm[1])
+    for name in ("old.npz", "old.nnm"):
+        loaded, _ = load_full_model(name)
+        np.testing.assert_array_equal(loaded.params, net.params)
+        model, _ = load_inference_model(name)
+        np.testing.assert_allclose(model.predict(X), want, atol=1e-12)
+
+
+def test_convert_keeps_flat_files_unchanged(workdir):
+    net = make_net(dtype="float32")
+    net.save_model("f32", 2, fmt="npz")
+    convert_npz("saved_models/f32.npz")
+    data = read_model("saved_models/f32.nnm")
+    assert str(data["dtype"]) == "float32"
+    np.testing.assert_array_equal(data["params"], net.params)
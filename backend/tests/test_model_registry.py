@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from api.model_registry import ModelRegistry
+from utils.config import MODES
+from conftest import make_net, make_data
+
+
+def _save(*names):
+    for name in names:
+        make_net().save_model(name, 2)
+
+
+def test_lru_evicts_least_recently_used(workdir):
+    _save("a", "b", "c")
+    registry = ModelRegistry(capacity=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")                       # a is now the most recent
+    registry.get("c")
+    stats = registry.stats()
+    assert stats["models"] == ["a.npz", "c.npz"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+
+
+def test_hit_returns_the_cached_model(workdir):
+    _save("a")
+    registry = ModelRegistry()
+    model, config = registry.get("a")
+    assert registry.get("saved_models/a.npz")[0] is model        # names are normalised
+    X, _ = make_data(10)
+    assert model.predict(X).shape == (10, 1) and config is MODES[2]
+
+
+def test_invalidate_forces_a_reload(workdir):
+    _save("a", "b")
+    registry = ModelRegistry()
+    first = registry.get("a")[0]
+    registry.get("b")
+    registry.invalidate("a.npz")
+    assert registry.stats()["models"] == ["b.npz"]
+    assert registry.get("a")[0] is not first
+    registry.invalidate()
+    assert registry.stats()["size"] == 0
+
+
+def test_preload_and_unknown_models(workdir):
+    _save("a", "b")
+    registry = ModelRegistry()
+    assert registry.preload() == ["a.npz", "b.npz"]
+    assert registry.preload(["missing"]) == []
+    with pytest.raises(FileNotFoundError):
+        registry.get("missing")
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from models.morphism import DEEPEN_MAX_SCALE, warm_start
+from conftest import make_net, make_data
+
+
+def trained(mode_id, hid=8, layers=2, epochs=30):
+    out_dim = 3 if mode_id == 5 else 1
+    X, y = make_data(mode_id=mode_id)
+    net = make_net(mode_id, hid=hid, layers=layers, out_dim=out_dim, optimizer_choice=3, learn_rate=0.02)
+    net.train(X, y, epochs=epochs, batch_size=32)
+    return net, X, y
+
+
+@pytest.mark.parametrize("mode_id", [1, 2, 3, 4, 5])
+def test_widen_is_exact(mode_id):
+    src, X, y = trained(mode_id)
+    dst = make_net(mode_id, hid=20, layers=2, out_dim=src.out_dim, seed=1)
+    info = warm_start(dst, src, X=X, y=y)
+    assert info["method"] == "widen 8->20"
+    np.testing.assert_allclose(dst.predict(X), src.predict(X), atol=1e-12)
+    assert info["loss_after"] == pytest.approx(info["loss_before"], abs=1e-12)
+    # copies of one unit get different outgoing shares, so they can learn apart
+    W1 = dst.weights[1]
+    assert len({tuple(np.round(r, 12)) for r in W1}) == len(W1)
+
+
+@pytest.mark.parametrize("mode_id", [4, 5])
+def test_relu_deepen_is_exact(mode_id):
+    src, X, y = trained(mode_id)
+    dst = make_net(mode_id, hid=12, layers=4, out_dim=src.out_dim, seed=1)
+    info = warm_start(dst, src, X=X, y=y)
+    assert info["method"] == "widen 8->12+deepen 2->4"
+    np.testing.assert_allclose(dst.predict(X), src.predict(X), atol=1e-12)
+
+
+@pytest.mark.parametrize("mode_id,tol", [(1, 0.05), (2, 0.05), (3, 0.03)])
+@pytest.mark.parametrize("extra", [1, 3])
+def test_smooth_deepen_is_close_and_bounded(mode_id, tol, extra):
+    src, X, y = trained(mode_id)
+    dst = make_net(mode_id, hid=8, layers=2 + extra, seed=1)
+    info = warm_start(dst, src, X=X, y=y)
+    assert np.abs(dst.predict(X) - src.predict(X)).max() < tol * extra
+    assert abs(info["loss_after"] - info["loss_before"]) < tol
+    # the compensating scale is paid once, however many layers were added
+    assert np.abs(dst.weights[-1]).max() <= DEEPEN_MAX_SCALE * np.abs(src.weights[-1]).max() + 1e-12
+
+
+def test_deepened_net_keeps_training():
+    src, X, y = trained(1, epochs=60)
+    dst = make_net(1, hid=8, layers=4, seed=1, optimizer_choice=3, learn_rate=0.02)
+    info = warm_start(dst, src, X=X, y=y)
+    dst.train(X, y, epochs=20, batch_size=32)
+    assert dst.loss_history[-1] < 2 * info["loss_before"]
+
+
+def test_continue_copies_optimizer_state():
+    src, X, y = trained(2)
+    dst = make_net(2, optimizer_choice=3, seed=1)
+    info = warm_start(dst, src)
+    assert info == {"method": "continue", "optimizer_state": True}
+    np.testing.assert_array_equal(dst.params, src.params)
+    assert dst.optimizer.t == src.optimizer.t
+    other = make_net(2, optimizer_choice=1, seed=1)
+    assert warm_start(other, src)["optimizer_state"] is False
+
+
+@pytest.mark.parametrize("kw,reason", [
+    (dict(mode_id=3), "mode"),
+    (dict(in_dim=6), "input/output"),
+    (dict(hid=4), "smaller"),
+    (dict(layers=1), "smaller"),
+])
+def test_incompatible_base_is_reported(kw, reason):
+    src, _, _ = trained(2)
+    dst = make_net(**{"mode_id": 2, **kw})
+    before = dst.params.copy()
+    info = warm_start(dst, src)
+    assert info["method"] == "none" and reason in info["reason"]
+    np.testing.assert_array_equal(dst.params, before)
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from conftest import make_net, make_data
+
+
+def _loss(net, X, y):
+    _, acts = net._forward(X, training=False)
+    return net._metrics(y, acts[-1])[0]
+
+
+@pytest.mark.parametrize("mode_id", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("use_workspace", [True, False])
+def test_gradients_match_finite_differences(mode_id, use_workspace):
+    out_dim = 3 if mode_id == 5 else 1
+    X, y = make_data(16, mode_id=mode_id)
+    net = make_net(mode_id, out_dim=out_dim, hid=4)
+    for b in net.biases:
+        b[...] = 0.1                       # zero biases put dead ReLU rows exactly on the kink
+    ws = net._workspace(len(X)) if use_workspace else None
+    zs, acts = net._forward(X, ws)
+    net._backward(zs, acts, y, ws)
+    grads = net.grads.copy()
+
+    h = 1e-6
+    numeric = np.empty_like(grads)
+    for i in range(net.n_params):
+        old = net.params[i]
+        net.params[i] = old + h
+        up = _loss(net, X, y)
+        net.params[i] = old - h
+        down = _loss(net, X, y)
+        net.params[i] = old
+        numeric[i] = (up - down) / (2 * h)
+    np.testing.assert_allclose(grads, numeric, atol=1e-6)
+
+
+@pytest.mark.parametrize("dropout", [0.0, 0.3])
+@pytest.mark.parametrize("optimizer_choice", [1, 3])
+def test_workspace_matches_allocating_path(dropout, optimizer_choice):
+    X, y = make_data(100)                  # 100 % 32 != 0: the last batch is a prefix view
+    nets = [make_net(dropout_rate=dropout, optimizer_choice=optimizer_choice, use_workspace=ws)
+            for ws in (True, False)]
+    for net in nets:
+        net.train(X, y, epochs=5, batch_size=32)
+    np.testing.assert_array_equal(nets[0].params, nets[1].params)
+    assert nets[0].loss_history == nets[1].loss_history
+
+
+def test_workspace_is_reused_across_epochs_and_calls():
+    X, y = make_data(64)
+    net = make_net()
+    net.train(X, y, epochs=2, batch_size=16)
+    ws = net._ws
+    net.train(X, y, epochs=2, batch_size=16)
+    assert net._ws is ws
+    net.train(X, y, epochs=1, batch_size=32)         # bigger batches grow it once
+    assert net._ws is not ws and net._ws.capacity == 32
+
+
+def test_params_are_one_flat_buffer():
+    net = make_net(layers=3)
+    assert net.params.size == net.n_params
+    for W, dW in zip(net.weights, net.dWs):
+        assert np.shares_memory(W, net.params) and np.shares_memory(dW, net.grads)
+    net.params[:] = 0.5
+    assert all((W == 0.5).all() for W in net.weights)
+
+
+@pytest.mark.parametrize("mode_id", [2, 3, 5])
+def test_float32_tracks_float64(mode_id):
+    out_dim = 3 if mode_id == 5 else 1
+    X, y = make_data(mode_id=mode_id)
+    # no dropout: masks are drawn at the compute dtype, so the two runs would draw different ones
+    nets = [make_net(mode_id, out_dim=out_dim, optimizer_choice=3, learn_rate=0.01, dtype=dt)
+            for dt in (np.float64, np.float32)]
+    for net in nets:
+        net.train(X, y, epochs=10, batch_size=32)
+    np.testing.assert_allclose(nets[1].loss_history, nets[0].loss_history, rtol=1e-3)
+    np.testing.assert_allclose(nets[1].params, nets[0].params, atol=1e-3)
+
+
+def test_float32_stays_float32_end_to_end():
+    X, y = make_data()
+    net = make_net(optimizer_choice=3, dropout_rate=0.2, dtype=np.float32)
+    net.train(X, y, epochs=2, batch_size=32)     # float64 inputs are cast once, up front
+    assert net.params.dtype == net.grads.dtype == np.float32
+    assert all(buf.dtype == np.float32 for buf in net.optimizer.state.values())
+    assert net._ws.dtype == np.float32
+    assert all(m.dtype == np.float32 for m in net._ws.mask)
+    assert isinstance(net.loss_history[-1], float)
+
+
+def test_unsupported_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        make_net(dtype=np.float16)
+
+
+def test_eval_every_thins_the_metric_histories():
+    X, y = make_data()
+    net = make_net()
+    logs = {}
+    net.train(X, y, epochs=10, batch_size=32, eval_every=3, on_epoch_end=lambda e, l: logs.update({e: l}))
+    assert net.metric_epochs == [0, 3, 6, 9]                 # the last epoch is always evaluated
+    assert len(net.loss_history) == len(net.acc_history) == 4
+    assert len(net.lr_history) == 10
+    assert "loss" in logs[9] and "loss" not in logs[4]
+    assert net.final_metrics["loss"] == net.loss_history[-1] == pytest.approx(net._evaluate(X, y)[0])
+
+
+def test_running_metrics_are_batch_weighted_averages():
+    X, y = make_data(100)
+    net = make_net(learn_rate=0.0)                           # frozen weights: running == eval exactly
+    net.train(X, y, epochs=3, batch_size=32, metrics="running")
+    assert net.metric_epochs == [0, 1, 2]
+    loss, acc = net._evaluate(X, y)
+    assert net.loss_history == pytest.approx([loss] * 3) and net.acc_history == pytest.approx([acc] * 3)
+
+
+def test_eval_subsample_uses_one_fixed_subset():
+    X, y = make_data(200)
+    net = make_net(learn_rate=0.0)
+    net.train(X, y, epochs=3, batch_size=50, eval_subsample=40)
+    assert len(set(net.loss_history)) == 1                   # same rows every epoch
+    assert net.metrics_schedule == {"strategy": "eval", "eval_every": 1, "eval_subsample": 40}
+
+
+def test_unknown_metrics_strategy_is_rejected():
+    X, y = make_data(10)
+    with pytest.raises(ValueError):
+        make_net().train(X, y, epochs=1, metrics="sometimes")
+
+
+def test_annotations_resolve():
+    import inspect
+    import typing
+    from models.network import NeuralNetwork
+    for name, fn in inspect.getmembers(NeuralNetwork, inspect.isfunction):
+        typing.get_type_hints(fn)                              # NameError on an unimported annotation
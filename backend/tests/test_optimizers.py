@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from utils.optimizers import OPTIMIZERS, OPTIMIZER_IDS, Adam, AdamW, make_optimizer
+
+rng = np.random.default_rng(0)
+P0 = rng.standard_normal(50)
+GRADS = [rng.standard_normal(50) for _ in range(6)]
+
+
+def run(opt, params, grads, lr=0.01):
+    for g in grads:
+        opt.step(params, g, lr)
+    return params
+
+
+def test_adam_matches_textbook_update():
+    b1, b2, eps, lr = 0.9, 0.999, 1e-8, 0.01
+    ref, m, v = P0.copy(), np.zeros(50), np.zeros(50)
+    for t, g in enumerate(GRADS, 1):
+        m = b1 * m + (1 - b1) * g
+        v = b2 * v + (1 - b2) * g * g
+        ref -= lr * (m / (1 - b1 ** t)) / (np.sqrt(v / (1 - b2 ** t)) + eps)
+    np.testing.assert_allclose(run(Adam(), P0.copy(), GRADS, lr), ref, rtol=1e-12)
+
+
+def test_adamw_decays_before_the_adam_step():
+    lr, wd = 0.01, 0.1
+    ref = P0.copy()
+    adam = Adam()
+    for g in GRADS:
+        ref -= lr * wd * ref
+        adam.step(ref, g, lr)
+    np.testing.assert_allclose(run(AdamW(weight_decay=wd), P0.copy(), GRADS, lr), ref, rtol=1e-12)
+
+
+@pytest.mark.parametrize("choice", sorted(OPTIMIZERS))
+def test_state_dict_round_trip_continues_exactly(choice):
+    full = run(make_optimizer(choice), P0.copy(), GRADS)
+
+    first = make_optimizer(choice)
+    params = run(first, P0.copy(), GRADS[:3])
+    state = {k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in first.state_dict().items()}
+    second = make_optimizer(state["name"])
+    second.load_state_dict(state)
+    assert second.t == 3
+    np.testing.assert_array_equal(run(second, params, GRADS[3:]), full)
+
+
+@pytest.mark.parametrize("choice", sorted(OPTIMIZERS))
+def test_state_is_allocated_lazily(choice):
+    opt = make_optimizer(choice)
+    assert opt.state == {} and opt._tmp is None
+    opt.step(P0.astype(np.float32), GRADS[0].astype(np.float32), 0.01)
+    assert set(opt.state) == set(opt.slots)              # SGD never allocates a slot
+    assert all(buf.dtype == np.float32 and buf.shape == (50,) for buf in opt.state.values())
+
+
+@pytest.mark.parametrize("choice", sorted(OPTIMIZERS))
+def test_array_lr_matches_per_row_scalars(choice):
+    lrs = np.array([[0.01], [0.05]])                  # one learning rate per stacked model
+    stacked = run(make_optimizer(choice), np.stack([P0, P0]), [np.stack([g, g]) for g in GRADS], lrs)
+    for row, lr in zip(stacked, lrs[:, 0]):
+        np.testing.assert_allclose(row, run(make_optimizer(choice), P0.copy(), GRADS, lr), rtol=1e-12)
+
+
+def test_make_optimizer_accepts_ids_names_and_instances():
+    for name, i in OPTIMIZER_IDS.items():
+        assert make_optimizer(name.upper()).name == make_optimizer(i).name == name
+    adam = Adam()
+    assert make_optimizer(adam) is adam
+    with pytest.raises(ValueError):
+        make_optimizer(7)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+from api.batcher import PredictBatcher
+from api.model_registry import ModelRegistry
+from utils.model_loader import load_inference_model
+from conftest import make_net, make_data
+
+
+def _save(name="m"):
+    net = make_net()
+    net.save_model(name, 2)
+    return net
+
+
+def test_batched_matches_direct(workdir):
+    X, _ = make_data(40)
+    net = _save()
+    batcher = PredictBatcher(ModelRegistry(), max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict("m.npz", X[i:i + 4]) for i in range(0, 40, 4)))
+
+    outs = np.concatenate([out for out, _ in asyncio.run(main())])
+    np.testing.assert_allclose(outs, net.predict(X), atol=1e-12)
+    assert batcher.batches < 10                       # requests were coalesced
+
+
+def test_registry_reloads_changed_file(workdir):
+    registry = ModelRegistry()
+    _save()
+    first, _ = registry.get("m.npz")
+    assert registry.get("m.npz")[0] is first
+    _save()                                           # rewritten in place, same size
+    os.utime("saved_models/m.npz", ns=(time.time_ns(), time.time_ns() + 10**9))   # coarse-mtime filesystems
+    assert registry.peek("m.npz") is None
+    assert registry.get("m.npz")[0] is not first
+    assert registry.stats()["reloads"] == 1
+
+
+def test_cold_load_runs_off_the_event_loop(workdir):
+    _save()
+    loader_thread = []
+
+    def slow_loader(name):
+        loader_thread.append(threading.get_ident())
+        time.sleep(0.2)
+        return load_inference_model(name)
+
+    batcher = PredictBatcher(ModelRegistry(loader=slow_loader), max_wait_ms=0)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        await batcher.predict("m.npz", np.zeros((1, 5)))
+        t.cancel()
+        return ticks, threading.get_ident()
+
+    ticks, main_thread = asyncio.run(main())
+    assert loader_thread and loader_thread[0] != main_thread
+    assert ticks >= 5                                 # the loop kept running during the load
@@ -0,0 +1,48 @@
+import json
+import numpy as np
+from utils.profiling import Profiler
+from conftest import make_net, make_data
+
+
+def _profiled(metrics="eval", **kw):
+    X, y = make_data(100)
+    prof = Profiler(**kw)
+    net = make_net()
+    net.train(X, y, epochs=3, batch_size=25, metrics=metrics, profiler=prof)
+    return net, prof
+
+
+def test_phases_cover_every_batch():
+    _, prof = _profiled()
+    s = prof.summary()
+    assert s["epochs"] == 3 and s["samples"] == 300
+    for phase in ("forward", "backward", "step"):
+        assert s["phases"][phase]["calls"] == 12
+    assert s["phases"]["eval"]["calls"] == 3
+    assert "metrics" not in s["phases"]                    # only timed with metrics="running"
+    assert _profiled("running")[1].summary()["phases"]["metrics"]["calls"] == 12
+    assert sum(p["seconds"] for p in s["phases"].values()) <= s["wall_seconds"]
+
+
+def test_profiling_does_not_change_training():
+    X, y = make_data(100)
+    plain = make_net()
+    plain.train(X, y, epochs=3, batch_size=25)
+    np.testing.assert_array_equal(_profiled()[0].params, plain.params)
+
+
+def test_chrome_trace_export(tmp_path):
+    _, prof = _profiled(max_events=10)
+    path = prof.export_chrome_trace(str(tmp_path / "traces" / "run.json"))
+    with open(path) as f:
+        trace = json.load(f)
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [e["args"]["epoch"] for e in spans if e["name"] == "epoch"] == [0, 1, 2]
+    assert sum(e["cat"] == "phase" for e in spans) == 10
+    assert trace["otherData"]["summary"]["dropped_trace_events"] == prof.dropped_events > 0
+
+
+def test_trace_memory_reports_a_peak():
+    _, prof = _profiled(trace=False, trace_memory=True)
+    s = prof.summary()
+    assert s["peak_traced_mb"] > 0 and s["trace_events"] == 0
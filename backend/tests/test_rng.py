@@ -0,0 +1,61 @@
+import itertools
+import numpy as np
+import pytest
+from conftest import make_net, make_data
+
+
+def _trained(seed, **kw):
+    X, y = make_data()
+    net = make_net(seed=seed, dropout_rate=0.3, optimizer_choice=3, **kw)
+    net.train(X, y, epochs=3, batch_size=32)
+    return net
+
+
+def test_seed_makes_runs_reproducible():
+    a, b, c = _trained(7), _trained(7), _trained(8)
+    np.testing.assert_array_equal(a.params, b.params)
+    assert a.loss_history == b.loss_history
+    assert not np.array_equal(a.params, c.params)
+
+
+def test_global_rng_is_left_alone():
+    state = np.random.get_state()[1].copy()
+    _trained(3)
+    _trained(None)
+    np.testing.assert_array_equal(np.random.get_state()[1], state)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_dropout_mask_is_scaled_keep_mask(dtype):
+    net = make_net(dropout_rate=0.25, dtype=dtype)
+    mask = net._dropout_mask((200, 50))
+    assert mask.dtype == dtype
+    assert set(np.unique(mask).tolist()) == {0.0, float(np.asarray(1 / 0.75, dtype))}
+    assert (mask > 0).mean() == pytest.approx(0.75, abs=0.02)
+
+
+def test_backward_reuses_the_forward_masks():
+    X, y = make_data(16)
+    net = make_net(hid=4, dropout_rate=0.5)
+    for b in net.biases:
+        b[...] = 0.1
+    masks = [net._dropout_mask((16, 4)) for _ in range(net.n_hidden)]
+    cycle = itertools.cycle(masks)
+    net._dropout_mask = lambda shape, out=None: next(cycle)      # same masks on every forward
+    zs, acts = net._forward(X)
+    net._backward(zs, acts, y)
+    grads = net.grads.copy()
+
+    def loss():
+        _, acts = net._forward(X)
+        return net._metrics(y, acts[-1])[0]
+
+    h = 1e-6
+    for i in range(net.n_params):
+        old = net.params[i]
+        net.params[i] = old + h
+        up = loss()
+        net.params[i] = old - h
+        down = loss()
+        net.params[i] = old
+        assert grads[i] == pytest.approx((up - down) / (2 * h), abs=1e-6)
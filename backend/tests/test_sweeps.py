@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import pytest
+from api import sweep_worker, sweeps
+from api.sweeps import COMPLETED, MAX_TRIALS, Sweep, halving_rungs, hyperband_brackets, remember, sample_space
+from conftest import make_data
+
+X, Y = make_data(120)
+BASE = dict(input_size=5, output_size=1, hidden_size=8, num_layers=2, dropout=0.0, optimizer_choice=3, mode_id=2,
+            batch_size=30, learn_rate=0.01, epochs=4, init_id=2, data=X.tolist(), labels=Y.tolist(), seed=0)
+
+
+def run_sweep(trials, base=BASE, **kw):
+    sweep = Sweep(base, trials, max_workers=1, **kw)
+    sweep._run()                                  # in this thread; start() would run the same on a daemon thread
+    return sweep.snapshot()
+
+
+def test_grid_is_the_product_of_the_lists():
+    trials = sample_space({"hidden_size": [4, 8], "learn_rate": {"min": 1e-3, "max": 1e-1, "log": True, "num": 3}})
+    assert len(trials) == 6
+    assert [t["learn_rate"] for t in trials[:3]] == pytest.approx([1e-3, 1e-2, 1e-1])
+    assert sample_space({"num_layers": {"min": 1, "max": 3, "num": 4}}) == [
+        {"num_layers": v} for v in (1, 2, 2, 3)]                    # integer fields are rounded
+    assert len(sample_space({"hidden_size": [4, 8, 16]}, n_trials=2)) == 2
+
+
+def test_random_draws_are_seeded_and_in_range():
+    space = {"learn_rate": {"min": 1e-4, "max": 1e-1, "log": True}, "batch_size": [16, 32]}
+    trials = sample_space(space, "random", 20, seed=1)
+    assert trials == sample_space(space, "random", 20, seed=1)
+    assert all(1e-4 <= t["learn_rate"] <= 1e-1 and t["batch_size"] in (16, 32) for t in trials)
+
+
+@pytest.mark.parametrize("args", [
+    ({"epochs": [1, 2]},),                          # not a sweepable field
+    ({"learn_rate": {"min": 0.1, "max": 1}},),      # grid range without num
+    ({"learn_rate": [0.1]}, "random"),              # random without n_trials
+    ({"learn_rate": [0.1]}, "bayes"),
+    ({"hidden_size": list(range(MAX_TRIALS + 1))},),
+])
+def test_bad_spaces_are_rejected(args):
+    with pytest.raises(ValueError):
+        sample_space(*args)
+
+
+def test_sweep_runs_every_trial_and_ranks_them(workdir):
+    trials = sample_space({"learn_rate": [1e-4, 1e-2, 5e-2]})
+    t = time.time()
+    snap = run_sweep(trials)
+    assert snap["status"] == COMPLETED and snap["error"] is None
+    assert snap["finished"] == 3 and snap["epochs_trained"] == snap["epochs_full"] == 12
+    losses = [r["loss"] for r in snap["results"]]
+    assert losses == sorted(losses) and snap["best"]["loss"] == losses[0]
+    assert snap["best"]["params"]["learn_rate"] != 1e-4
+    assert 0 < snap["elapsed"] <= time.time() - t + 1
+
+
+def test_sweep_drops_its_inline_data(workdir):
+    sweep = Sweep(BASE, [{}], max_workers=1)
+    sweep._run()
+    assert "data" not in sweep.base and "labels" not in sweep.base
+    assert sweep.snapshot()["status"] == COMPLETED and "data" in BASE          # the caller's dict is untouched
+
+
+def test_remember_evicts_the_oldest_finished_sweeps(monkeypatch):
+    monkeypatch.setattr(sweeps, "SWEEPS", {})
+    monkeypatch.setattr(sweeps, "MAX_FINISHED_SWEEPS", 2)
+    running = remember(Sweep(BASE, [{}], max_workers=1))
+    done = []
+    for _ in range(4):
+        s = Sweep(BASE, [{}], max_workers=1)
+        s.finished_at = time.time()
+        done.append(remember(s).sweep_id)
+    assert list(sweeps.SWEEPS) == [running.sweep_id] + done[-2:]
+
+
+def test_failed_trials_rank_last(workdir):
+    snap = run_sweep([{"init_id": 2}, {"init_id": 99}])
+    assert snap["status"] == COMPLETED
+    assert [("error" in r) for r in snap["results"]] == [False, True]
+
+
+# ------------------------------------------------ schedulers ------------------------------------------------ #
+
+def test_halving_rungs():
+    assert halving_rungs(27, 1, 3) == [1, 3, 9, 27]
+    assert halving_rungs(81) == [9, 27, 81]                         # default min: max / eta**2
+    assert halving_rungs(10, 10) == [10]
+    assert halving_rungs(20, 2, 2) == [2, 5, 10, 20]
+
+
+def test_hyperband_brackets():
+    trials, brackets = hyperband_brackets({"learn_rate": {"min": 1e-3, "max": 1e-1}}, 27, 1, 3, seed=0)
+    assert [(len(ids), rungs) for ids, rungs in brackets] == [
+        (27, [1, 3, 9, 27]), (12, [3, 9, 27]), (6, [9, 27]), (4, [27])]
+    assert sorted(i for ids, _ in brackets for i in ids) == list(range(len(trials))) and len(trials) == 49
+
+
+def test_rungs_continue_the_same_run():
+    cfg = {k: v for k, v in BASE.items() if k not in ("data", "labels")}
+    cfg.update(epochs=9, dropout=0.2, use_scheduler=True)
+    sweep_worker._DATA.update(X=np.asarray(X), y=np.asarray(Y).reshape(-1, 1))
+    try:
+        full = sweep_worker.run_trial(0, cfg)
+        row = sweep_worker.run_trial(0, cfg, budget=3, keep_state=True)
+        row = sweep_worker.run_trial(0, cfg, budget=9, state=row["state"])
+    finally:
+        sweep_worker._DATA.clear()
+    assert row["epochs_run"] == full["epochs_run"] == 9
+    assert (row["loss"], row["learning_rate"]) == (full["loss"], full["learning_rate"])
+
+
+def test_halving_sweep_keeps_the_best_third(workdir):
+    trials = sample_space({"learn_rate": {"min": 1e-4, "max": 5e-2, "log": True, "num": 9}})
+    snap = run_sweep(trials, base={**BASE, "epochs": 9}, eta=3, scheduler="halving",
+                     brackets=[(list(range(9)), halving_rungs(9, 1, 3))])
+    assert snap["status"] == COMPLETED
+    assert sorted(r["budget"] for r in snap["results"]) == [1] * 6 + [3] * 2 + [9]
+    assert snap["epochs_trained"] == 6 * 1 + 2 * 3 + 9 < snap["epochs_full"] == 81
+    best = snap["best"]
+    assert best["budget"] == 9 and best["epochs_run"] == 9
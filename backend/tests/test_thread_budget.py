@@ -0,0 +1,74 @@
+import contextlib
+import os
+import pytest
+from api import thread_budget
+from api.thread_budget import FLOPS_PER_THREAD, allocate, blas_limit, deployment_cap, limit_env, rank_threads, wanted_threads
+
+JOB = dict(input_size=100, hidden_size=512, num_layers=2, output_size=1, batch_size=64)
+
+
+def test_allocate_water_fills_the_cap():
+    assert allocate({"small": 1, "big": 16, "mid": 3}, cap=8) == {"small": 1, "mid": 3, "big": 4}
+    assert allocate({"a": 16, "b": 16}, cap=8) == {"a": 4, "b": 4}
+    assert allocate({"a": 2, "b": 2}, cap=16) == {"a": 2, "b": 2}          # nobody gets more than it wants
+    assert set(allocate({str(i): 4 for i in range(5)}, cap=2).values()) == {1}   # but everyone gets one
+
+
+def test_wanted_threads_scales_with_the_biggest_matmul():
+    assert wanted_threads({**JOB, "batch_size": 1}, cap=16) == 1
+    big = {**JOB, "batch_size": 8 * FLOPS_PER_THREAD // (512 * 512)}
+    assert wanted_threads(big, cap=16) == 8
+    assert wanted_threads(big, cap=4) == 4
+    full_batch = {**JOB, "batch_size": None}
+    assert wanted_threads(full_batch, cap=16, n_samples=big["batch_size"]) == 8
+
+
+def test_deployment_cap_from_env(monkeypatch):
+    monkeypatch.setenv("NN_BLAS_THREADS", "3")
+    assert deployment_cap() == 3
+    monkeypatch.delenv("NN_BLAS_THREADS")
+    assert deployment_cap() == (os.cpu_count() or 1)
+
+
+def test_env_fallback(monkeypatch):
+    for var in thread_budget.BLAS_ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+    limit_env(2)
+    assert all(os.environ[var] == "2" for var in thread_budget.BLAS_ENV_VARS)
+    monkeypatch.setattr(thread_budget, "threadpool_limits", None)
+    assert thread_budget.set_blas_threads(2) is False
+
+
+def test_rank_threads_and_blas_limit(monkeypatch):
+    assert (rank_threads(8, 2), rank_threads(8, 3), rank_threads(1, 4), rank_threads(6)) == (4, 2, 1, 6)
+    monkeypatch.setattr(thread_budget, "threadpool_limits", None)
+    with blas_limit(4):                                       # no threadpoolctl: nothing to resize
+        pass
+
+
+def test_data_parallel_job_splits_its_grant(workdir, monkeypatch):
+    from api import train_runner
+    from conftest import make_data
+    seen, spawned = [], []
+
+    @contextlib.contextmanager
+    def fake_limits(limits=None, user_api=None):
+        seen.append(limits)
+        yield
+
+    monkeypatch.setattr(thread_budget, "threadpool_limits", fake_limits)
+
+    class RecordingDP(train_runner.DataParallel):
+        def __init__(self, *args, **kw):
+            super().__init__(*args, **{**kw, "reference_every": 1})
+            spawned.append(self.initargs)
+
+    monkeypatch.setattr(train_runner, "DataParallel", RecordingDP)
+    X, y = make_data(40)
+    result = train_runner.run_training_from_api(
+        input_size=5, output_size=1, hidden_size=8, num_layers=2, dropout=0.0, optimizer_choice=1, mode_id=2,
+        batch_size=20, learn_rate=0.01, epochs=1, init_id=2, data=X.tolist(), labels=y.tolist(), seed=0,
+        save_after_train=False, data_parallel=2, blas_threads=6)
+    assert spawned == [(3,)]                                  # each worker rank gets half the grant ...
+    assert seen[0] == 3                                       # ... and so does this process
+    assert seen[1:] == [6] * result["data_parallel"]["reference_steps"]   # the reference step gets all of it
@@ -1,27 +1,78 @@
 import numpy as np
 
-def sigmoid(x):
-    x = np.clip(x, -500, 500)  # Prevent overflow
-    return 1 / (1 + np.exp(-x))
+# every function takes an optional `out=` buffer so the training workspace can
+# evaluate activations / derivatives in place without allocating (`out` may be
+# the input itself)
 
-def deriv_sig(x):
-    sig_x = sigmoid(x)  # Ensure x is passed through sigmoid first
-    return sig_x * (1 - sig_x)
+def sigmoid(x, out=None):
+    lim = 80.0 if x.dtype == np.float32 else 500.0  # exp overflows float32 past ~88
+    out = np.clip(x, -lim, lim, out=out)  # Prevent overflow
+    np.negative(out, out=out)
+    np.exp(out, out=out)
+    out += 1
+    return np.reciprocal(out, out=out)
 
-def tanh(x): #uses built 
-    return np.tanh(x)
+def deriv_sig(x, out=None):
+    # s * (1 - s) == 0.25 - (s - 0.5)^2  -> no temporary needed
+    out = sigmoid(x, out=out)
+    out -= 0.5
+    np.square(out, out=out)
+    return np.subtract(0.25, out, out=out)
 
-def deriv_tanh(x):
-    return 1 - np.tanh(x) ** 2
+def tanh(x, out=None): #uses built
+    return np.tanh(x, out=out)
 
-def relu(x):
-    return np.maximum(0, x)
+def deriv_tanh(x, out=None):
+    out = np.tanh(x, out=out)
+    np.square(out, out=out)
+    return np.subtract(1, out, out=out)
 
-def deriv_relu(x):
-    return (x > 0).astype(float)
+def relu(x, out=None):
+    return np.maximum(0, x, out=out)
 
-def softmax(x):
-    # x: shape (batch_size, n_classes)
-    exps = np.exp(x - np.max(x, axis=1, keepdims=True))
-    return exps / np.sum(exps, axis=1, keepdims=True)
+def deriv_relu(x, out=None):
+    if out is None:
+        return (x > 0).astype(float)
+    return np.greater(x, 0, out=out)
 
+def softmax(x, out=None):
+    # x: shape (..., batch_size, n_classes) - normalised over the last axis
+    out = np.subtract(x, np.max(x, axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= np.sum(out, axis=-1, keepdims=True)
+    return out
+
+
+# ------------------------------------------ derivatives from the output ------------------------------------------ #
+# f'(z) rewritten in terms of a = f(z): backward reuses the activations the forward
+# pass already computed instead of paying for sigmoid / tanh a second time
+
+def deriv_sig_out(a, out=None):
+    # a * (1 - a) == 0.25 - (a - 0.5)^2
+    out = np.subtract(a, 0.5, out=out)
+    np.square(out, out=out)
+    return np.subtract(0.25, out, out=out)
+
+def deriv_tanh_out(a, out=None):
+    out = np.square(a, out=out)
+    return np.subtract(1, out, out=out)
+
+def deriv_relu_out(a, out=None):
+    # relu(z) > 0  <=>  z > 0
+    if out is None:
+        return (a > 0).astype(a.dtype)
+    return np.greater(a, 0, out=out)
+
+
+# ------------------------------------------------- registry ------------------------------------------------- #
+# "needs" says what backward must keep for the derivative:
+#   "output" - the activation itself (z can be overwritten in place)
+#   "input"  - the pre-activation z
+#   None     - no standalone derivative (softmax is only used through the CE shortcut)
+
+ACTIVATIONS = {
+    "sigmoid": {"name": "sigmoid", "fn": sigmoid, "deriv": deriv_sig_out,  "needs": "output"},
+    "tanh":    {"name": "tanh",    "fn": tanh,    "deriv": deriv_tanh_out, "needs": "output"},
+    "relu":    {"name": "relu",    "fn": relu,    "deriv": deriv_relu_out, "needs": "output"},
+    "softmax": {"name": "softmax", "fn": softmax, "deriv": None,           "needs": None},
+}
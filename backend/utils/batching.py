@@ -0,0 +1,86 @@
+"""batching.py - copy-free epoch shuffling / mini-batch gathering
+================================================================
+`X[perm], y[perm]` materialises a full shuffled copy of the dataset every
+epoch. `BatchLoader` instead shuffles an index array in place and gathers
+each mini-batch into a reusable buffer with `np.take(..., out=)`. The index
+array is reset to stored order before each shuffle, so an epoch's order
+depends only on the RNG state - a run resumed from a saved RNG state
+replays the same batches.
+
+Shuffle modes
+-------------
+* "full"  - uniform row shuffle; batches are gathered into the reused buffers.
+* "block" - contiguous blocks of `block_size` rows (default: one batch) are
+            visited in random order; batches are zero-copy slices of X / y,
+            which is the cache-friendly choice for large arrays. Rows that
+            share a block are always batched together.
+* "none"  - rows in stored order, zero-copy slices.
+
+If one batch covers the whole dataset the arrays are yielded as-is: the
+full-batch gradient doesn't depend on row order, so nothing is shuffled or
+copied. Yielded arrays are only valid until the next batch is requested.
+"""
+from __future__ import annotations
+import numpy as np
+
+SHUFFLE_MODES = ("full", "block", "none")
+
+
+class BatchLoader:
+    """Yields `(X_batch, y_batch)` views / reused buffers for one epoch at a time."""
+
+    def __init__(self, X, y, batch_size: int | None = None, shuffle: str = "full",
+                 block_size: int | None = None) -> None:
+        if shuffle not in SHUFFLE_MODES:
+            raise ValueError(f"Unknown shuffle mode: {shuffle}")
+        self.X, self.y = X, y
+        self.n = len(X)
+        self.batch_size = self.n if batch_size is None or batch_size < 1 else min(batch_size, self.n)
+        self.shuffle = shuffle
+        self.block_size = max(1, block_size or self.batch_size)
+        self._idx = self._order = None      # persistent index array (shuffled in place) + stored order
+        self._xbuf = self._ybuf = None      # gather buffers, allocated on first use
+
+    @property
+    def full_batch(self) -> bool:
+        return self.batch_size >= self.n
+
+    def epoch(self, rng=np.random):
+        """Iterate over one epoch of mini-batches (`rng` needs `.shuffle` / `.permutation`)."""
+        if self.full_batch:
+            yield self.X, self.y
+        elif self.shuffle == "none":
+            yield from self._slices(range(0, self.n, self.batch_size))
+        elif self.shuffle == "block":
+            yield from self._blocks(rng)
+        else:
+            yield from self._gathered(rng)
+
+    # ------------------------------------------------ modes ---------------------------------------------------- #
+    def _slices(self, starts, stop=None):
+        stop = self.n if stop is None else stop
+        for start in starts:
+            end = min(start + self.batch_size, stop)
+            yield self.X[start:end], self.y[start:end]
+
+    def _blocks(self, rng):
+        n_blocks = -(-self.n // self.block_size)
+        for blk in rng.permutation(n_blocks):
+            lo = int(blk) * self.block_size
+            hi = min(lo + self.block_size, self.n)
+            yield from self._slices(range(lo, hi, self.batch_size), hi)
+
+    def _gathered(self, rng):
+        if self._idx is None:
+            self._order = np.arange(self.n)
+            self._idx = self._order.copy()
+            self._xbuf = np.empty((self.batch_size,) + self.X.shape[1:], self.X.dtype)
+            self._ybuf = np.empty((self.batch_size,) + self.y.shape[1:], self.y.dtype)
+        np.copyto(self._idx, self._order)
+        rng.shuffle(self._idx)
+        for start in range(0, self.n, self.batch_size):
+            idx = self._idx[start:start + self.batch_size]
+            m = len(idx)
+            xb = np.take(self.X, idx, axis=0, out=self._xbuf[:m])
+            yb = np.take(self.y, idx, axis=0, out=self._ybuf[:m])
+            yield xb, yb
@@ -0,0 +1,154 @@
+"""checkpoint.py - full training checkpoints + a background writer
+================================================================
+`save_model` keeps what inference needs. A checkpoint keeps what *training*
+needs to pick up where it stopped - a job that died, or one the user wants
+to extend - instead of restarting from epoch 0.
+
+Quick checklist
+---------------
+* One `.npz` per run: every `save_model` field (weights, optimizer moments
+  + timestep, norm stats - so `load_full_model` can read it too) plus the
+  epoch count, LR-schedule position (`lr_horizon`, `lr_min`), both RNG
+  states, the histories, float64 norm stats and the run's build config.
+* `checkpoint_fields()` snapshots in the training thread (buffer copies
+  only); `CheckpointWriter` serialises on its own thread, so the loop
+  never waits on the disk. A newer snapshot replaces one still waiting to
+  be written (`superseded`) - the file is always the latest state.
+* Writes go to `<path>.tmp` and are renamed over the file, so a crash
+  mid-write leaves the previous checkpoint intact.
+* `read_checkpoint()` returns `(state, meta)`: `state` goes straight into
+  `NeuralNetwork.load_train_state`, `meta` has the config / stats and the
+  LR schedule - a resume keeps `lr_horizon` / `lr_min`, so asking for more
+  epochs than the horizon continues at `lr_min` instead of re-warming.
+* Not captured: the early-stopping record (a resumed run starts a fresh
+  one) and the `eval_subsample` rows (redrawn per train() call).
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import numpy as np
+from models.network import NeuralNetwork
+
+CHECKPOINT_DIR = "saved_checkpoints"
+
+
+def checkpoint_path(name: str) -> str:
+    """`name` (a file name or job id) -> path under CHECKPOINT_DIR."""
+    name = os.path.basename(name)
+    return os.path.join(CHECKPOINT_DIR, name if name.endswith(".npz") else f"{name}.npz")
+
+
+def checkpoint_fields(network, mode_id: int, norm_stats: dict | None = None, config: dict | None = None,
+                      epoch: int | None = None) -> dict:
+    """Snapshot of a run (copies, safe to hand to another thread); `epoch` = epochs completed."""
+    state = network.train_state(epoch)
+    fields = network.model_fields(mode_id, norm_stats, state=state)
+    fields.update(
+        epoch=state["epoch"],
+        lr_horizon=state["lr_horizon"] or 0,
+        lr_min=state["lr_min"] if state["lr_min"] is not None else np.nan,
+        rng_state=json.dumps(state["rng"]),
+        mask_rng_state=json.dumps(state["mask_rng"]),
+        config=json.dumps(config or {}),
+        saved_at=time.time(),
+    )
+    for k, v in state["histories"].items():
+        fields[f"hist_{k}"] = np.asarray(v, dtype=np.float64)
+    if norm_stats and norm_stats.get("method") == "zscore":
+        fields["stats_mean"] = np.asarray(norm_stats["mean"], dtype=np.float64)
+        fields["stats_std"] = np.asarray(norm_stats["std"], dtype=np.float64)
+    return fields
+
+
+def write_checkpoint(path: str, fields: dict) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **fields)
+    os.replace(tmp, path)
+    return path
+
+
+def read_checkpoint(path: str) -> tuple[dict, dict]:
+    with np.load(path) as data:
+        opt = {k[len("opt_"):]: data[k] for k in data.files if k.startswith("opt_")}
+        histories = {k: data[f"hist_{k}"].tolist() for k in NeuralNetwork.HISTORIES if f"hist_{k}" in data}
+        histories["metric_epochs"] = [int(e) for e in histories.get("metric_epochs", [])]
+        state = {
+            "params": data["params"],
+            "optimizer": {"name": str(data["optimizer"]), **opt},
+            "rng": json.loads(str(data["rng_state"])),
+            "mask_rng": json.loads(str(data["mask_rng_state"])),
+            "epoch": int(data["epoch"]),
+            "histories": histories,
+        }
+        stats = (data["stats_mean"], data["stats_std"]) if "stats_mean" in data else None
+        meta = {
+            "file": os.path.basename(path),
+            "epoch": state["epoch"],
+            "lr_horizon": int(data["lr_horizon"]) or None,
+            "lr_min": None if np.isnan(data["lr_min"]) else float(data["lr_min"]),
+            "mode_id": int(data["mode_id"]),
+            "dtype": str(data["dtype"]),
+            "optimizer": state["optimizer"]["name"],
+            "config": json.loads(str(data["config"])),
+            "stats": stats,
+            "saved_at": float(data["saved_at"]),
+        }
+    return state, meta
+
+
+# ------------------------------------------------ background writer ------------------------------------------------ #
+
+class CheckpointWriter:
+    """Writes `checkpoint_fields()` snapshots to one path on a daemon thread, newest wins."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.written = self.superseded = 0
+        self.last_epoch = None
+        self.write_seconds = 0.0
+        self.error = None
+        self._pending = None
+        self._closed = False
+        self._cv = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fields: dict) -> None:
+        with self._cv:
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = fields
+            self._cv.notify()
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while self._pending is None and not self._closed:
+                    self._cv.wait()
+                if self._pending is None:
+                    return
+                fields, self._pending = self._pending, None
+            t = time.perf_counter()
+            try:
+                write_checkpoint(self.path, fields)
+            except Exception as e:            # a failed write must not kill training
+                self.error = repr(e)
+                continue
+            self.write_seconds += time.perf_counter() - t
+            self.written += 1
+            self.last_epoch = int(fields["epoch"])
+
+    def close(self) -> None:
+        """Flush the pending snapshot and stop the thread."""
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {"file": os.path.basename(self.path), "written": self.written, "superseded": self.superseded,
+                "last_epoch": self.last_epoch, "write_seconds": self.write_seconds, "error": self.error}
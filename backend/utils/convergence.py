@@ -0,0 +1,54 @@
+import numpy as np
+
+#-------------------------------------------------- plateau detection
+def detect_plateau(history, window=20, rel_tol=1e-3):
+    """True once the best value of the last `window` entries improved on the entry
+    just before them by less than `rel_tol` (relative). Works on any loss curve."""
+    if window < 1 or len(history) <= window:
+        return False
+    ref = history[-window - 1]
+    best = min(history[-window:])
+    return (ref - best) <= rel_tol * max(abs(ref), 1e-12)
+
+
+#-------------------------------------------------- early stopping
+class EarlyStopping:
+    """Stop when the monitored value hasn't improved by `min_delta` for `patience` checks.
+
+    With `restore_best_weights` the flat parameter buffer of the best check is kept
+    (one preallocated copy, refreshed in place) and written back by `restore()`.
+    """
+
+    def __init__(self, patience=10, min_delta=0.0, restore_best_weights=True, monitor="auto"):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.restore_best_weights = restore_best_weights
+        self.monitor = monitor          # "auto" -> "val_loss" when validation data exists, else "loss"
+        self.reset()
+
+    def reset(self):
+        self.best = np.inf
+        self.best_epoch = None
+        self.wait = 0
+        self._best_params = None
+
+    def update(self, epoch, value, params=None):
+        """Record one check; returns True when training should stop."""
+        if value < self.best - self.min_delta:
+            self.best = value
+            self.best_epoch = epoch
+            self.wait = 0
+            if self.restore_best_weights and params is not None:
+                if self._best_params is None or self._best_params.shape != params.shape:
+                    self._best_params = np.empty_like(params)
+                np.copyto(self._best_params, params)
+            return False
+        self.wait += 1
+        return self.wait >= self.patience
+
+    def restore(self, params):
+        """Copy the best weights back into `params` (no-op if nothing was kept)."""
+        if self.restore_best_weights and self._best_params is not None:
+            np.copyto(params, self._best_params)
+            return True
+        return False
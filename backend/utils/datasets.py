@@ -0,0 +1,279 @@
+"""datasets.py - out-of-core datasets with background prefetch
+=============================================================
+`NeuralNetwork.train` accepts a `Dataset` anywhere it accepts `(X, y)`
+arrays. A dataset streams `(X, y)` mini-batches, so the full data never has
+to sit in RAM as one float array:
+
+* `ArrayDataset`     - in-memory arrays (wraps `BatchLoader`).
+* `NpyDataset`       - memory-mapped `.npy` files (features + labels, or one
+                       matrix with a label column).
+* `CSVDataset`       - chunked CSV reader (pandas `chunksize`).
+* `GeneratorDataset` - any factory returning an iterator of `(X, y)` chunks.
+
+Shuffling never needs the whole dataset: mmapped files permute shards of
+`shard_size` rows (and rows inside the current shard); CSV / generator
+streams go through a bounded shuffle buffer of `shuffle_buffer` rows.
+
+`Dataset.prefetch()` runs the batch pipeline - reading, label one-hot,
+normalisation, dtype cast - on a background thread that stays `depth`
+batches ahead of the training loop.
+"""
+from __future__ import annotations
+import queue
+import threading
+import numpy as np
+from utils.batching import BatchLoader
+
+
+class Dataset:
+    """Base class - subclasses implement `_chunks(rng, shuffle)` or override `batches`."""
+
+    n_features: int = 0
+
+    def __init__(self, n_classes: int | None = None, shuffle_buffer: int = 0) -> None:
+        self.n_classes = n_classes            # one-hot integer labels into this many columns
+        self.shuffle_buffer = shuffle_buffer  # rows kept in the mixing buffer (0 = stream order)
+        self.norm = None                      # (mean, std) applied to X in the prefetch thread
+
+    def __len__(self):
+        raise TypeError(f"{type(self).__name__} has no known length")
+
+    # -------- batch pipeline
+    def _chunks(self, rng, shuffle: bool):
+        """Yield `(X, y)` chunks of any size (float64 features / raw labels)."""
+        raise NotImplementedError
+
+    def batches(self, batch_size: int, rng=np.random, shuffle: bool = True):
+        """Yield exact `batch_size` mini-batches (the last may be short)."""
+        chunks = self._chunks(rng, shuffle)
+        if shuffle and self.shuffle_buffer:
+            chunks = _shuffle_buffer(chunks, self.shuffle_buffer, rng)
+        return _rebatch(chunks, batch_size)
+
+    def _prepare(self, X, y, dtype):
+        if self.norm is not None:
+            mean, std = self.norm
+            X = (X - mean) / std
+        y = np.asarray(y)
+        if self.n_classes:
+            y = np.eye(self.n_classes, dtype=dtype)[y.astype(int).reshape(-1)]
+        elif y.ndim == 2 and y.shape[1] == 1:
+            y = y.reshape(-1)
+        return np.asarray(X, dtype=dtype), np.asarray(y, dtype=dtype)
+
+    def prefetch(self, batch_size: int, rng=np.random, shuffle: bool = True,
+                 dtype=np.float64, depth: int = 2):
+        """`batches()` run on a background thread, normalised and cast to `dtype`."""
+        gen = (self._prepare(X, y, dtype) for X, y in self.batches(batch_size, rng, shuffle))
+        return Prefetcher(gen, depth)
+
+    # -------- statistics
+    def compute_stats(self, chunk_rows: int = 65536):
+        """One streaming pass: float64 per-feature mean / std (z-score stats)."""
+        n, s, ss = 0, 0.0, 0.0
+        for X, _ in _rebatch(self._chunks(None, False), chunk_rows):
+            X = np.asarray(X, dtype=np.float64)
+            n += len(X)
+            s = s + X.sum(axis=0)
+            ss = ss + np.square(X).sum(axis=0)
+        mean = s / n
+        std = np.sqrt(np.maximum(ss / n - mean ** 2, 0.0)) + 1e-8
+        return mean, std
+
+
+# ------------------------------------------------ concrete datasets ------------------------------------------------ #
+
+class ArrayDataset(Dataset):
+    """In-memory arrays behind the `Dataset` interface."""
+
+    def __init__(self, X, y, shuffle: str = "full", block_size: int | None = None, n_classes=None) -> None:
+        super().__init__(n_classes)
+        self.X, self.y = X, y
+        self.n_features = X.shape[1]
+        self.shuffle, self.block_size = shuffle, block_size
+
+    def __len__(self):
+        return len(self.X)
+
+    def batches(self, batch_size, rng=np.random, shuffle=True):
+        loader = BatchLoader(self.X, self.y, batch_size, self.shuffle if shuffle else "none", self.block_size)
+        return loader.epoch(rng)
+
+    def _chunks(self, rng, shuffle):
+        yield self.X, self.y
+
+    def prefetch(self, batch_size, rng=np.random, shuffle=True, dtype=np.float64, depth=2):
+        # batches are reused gather buffers - nothing to read ahead, and a worker would overwrite them
+        return (self._prepare(X, y, dtype) for X, y in self.batches(batch_size, rng, shuffle))
+
+
+class NpyDataset(Dataset):
+    """Memory-mapped `.npy` features (+ labels file, or a label column in the same matrix)."""
+
+    def __init__(self, x_path: str, y_path: str | None = None, label_column: int = -1,
+                 shard_size: int = 65536, n_classes=None, shuffle_buffer: int = 0) -> None:
+        super().__init__(n_classes, shuffle_buffer)
+        self.X = np.load(x_path, mmap_mode="r")
+        if y_path is not None:
+            self.y = np.load(y_path, mmap_mode="r")
+            self._feat = slice(None)
+        else:
+            self.y = None
+            cols = np.arange(self.X.shape[1])
+            self.label_column = int(cols[label_column])
+            self._feat = np.delete(cols, self.label_column)
+        self.n_features = len(np.arange(self.X.shape[1])[self._feat])
+        self.shard_size = shard_size
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def _read(self, lo, hi):
+        block = np.asarray(self.X[lo:hi])                       # only this shard is paged in
+        if self.y is None:
+            return block[:, self._feat], block[:, self.label_column]
+        return block, np.asarray(self.y[lo:hi])
+
+    def _chunks(self, rng, shuffle):
+        n = len(self)
+        starts = np.arange(0, n, self.shard_size)
+        if shuffle:
+            starts = starts[rng.permutation(len(starts))]        # shard-level permutation
+        for lo in starts:
+            X, y = self._read(int(lo), min(int(lo) + self.shard_size, n))
+            if shuffle:
+                perm = rng.permutation(len(X))                    # rows within the shard
+                X, y = X[perm], y[perm]
+            yield X, y
+
+
+class CSVDataset(Dataset):
+    """Chunked CSV reader; shuffling goes through the bounded shuffle buffer."""
+
+    def __init__(self, path: str, label_column: int | str = -1, chunksize: int = 65536,
+                 header="infer", n_classes=None, shuffle_buffer: int = 65536) -> None:
+        super().__init__(n_classes, shuffle_buffer)
+        import pandas as pd
+        self.path, self.chunksize, self.header = path, chunksize, header
+        first = pd.read_csv(path, nrows=1, header=header)
+        cols = list(first.columns)
+        self.label_column = label_column if not isinstance(label_column, int) else cols[label_column]
+        self.n_features = len(cols) - 1
+
+    def _chunks(self, rng, shuffle):
+        import pandas as pd
+        for df in pd.read_csv(self.path, chunksize=self.chunksize, header=self.header):
+            y = df.pop(self.label_column).to_numpy()
+            yield df.to_numpy(dtype=np.float64), y
+
+
+class GeneratorDataset(Dataset):
+    """Wraps `factory()`, which must return a fresh iterator of `(X, y)` chunks each call."""
+
+    def __init__(self, factory, n_features: int, n_classes=None, shuffle_buffer: int = 0) -> None:
+        super().__init__(n_classes, shuffle_buffer)
+        self.factory = factory
+        self.n_features = n_features
+
+    def _chunks(self, rng, shuffle):
+        for X, y in self.factory():
+            yield np.asarray(X, dtype=np.float64), np.asarray(y)
+
+
+# ------------------------------------------------ stream helpers ------------------------------------------------ #
+
+def _rebatch(chunks, batch_size: int):
+    """Re-cut a stream of arbitrarily sized chunks into `batch_size`-row batches."""
+    pend_X, pend_y, have = [], [], 0
+    for X, y in chunks:
+        pend_X.append(X)
+        pend_y.append(y)
+        have += len(X)
+        if have < batch_size:
+            continue
+        X, y = np.concatenate(pend_X), np.concatenate(pend_y)
+        cut = len(X) - len(X) % batch_size
+        for start in range(0, cut, batch_size):
+            yield X[start:start + batch_size], y[start:start + batch_size]
+        pend_X, pend_y, have = [X[cut:]], [y[cut:]], len(X) - cut
+    if have:
+        yield np.concatenate(pend_X), np.concatenate(pend_y)
+
+
+def _shuffle_buffer(chunks, size: int, rng):
+    """Bounded shuffle: keep ~`size` rows mixed, release the older half once the buffer is full."""
+    buf_X = buf_y = None
+    for X, y in chunks:
+        buf_X = X if buf_X is None else np.concatenate([buf_X, X])
+        buf_y = y if buf_y is None else np.concatenate([buf_y, y])
+        if len(buf_X) < size:
+            continue
+        perm = rng.permutation(len(buf_X))
+        buf_X, buf_y = buf_X[perm], buf_y[perm]
+        release = len(buf_X) - size // 2
+        yield buf_X[:release], buf_y[:release]
+        buf_X, buf_y = buf_X[release:], buf_y[release:]
+    if buf_X is not None and len(buf_X):
+        perm = rng.permutation(len(buf_X))
+        yield buf_X[perm], buf_y[perm]
+
+
+class Prefetcher:
+    """Runs an iterator on a daemon thread, keeping up to `depth` items queued ahead."""
+
+    _DONE = object()
+
+    def __init__(self, iterable, depth: int = 2) -> None:
+        self._q = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(iterable,), name="batch-prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self, iterable):
+        try:
+            for item in iterable:
+                while not self._stop.is_set():
+                    try:
+                        self._q.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self._stop.is_set():
+                    return
+            self._put_final(self._DONE)
+        except BaseException as exc:            # surface worker errors in the training thread
+            self._put_final(exc)
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()                         # release open shards / CSV readers now, not at GC
+
+    def _put_final(self, item):
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self._q.get()
+        if item is self._DONE:
+            raise StopIteration
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def close(self):
+        """Stop the worker early (e.g. training ended before the epoch did)."""
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
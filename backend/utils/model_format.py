@@ -0,0 +1,126 @@
+"""model_format.py - memory-mappable `.nnm` model files
+====================================================
+`np.savez` archives go through the zip layer, so every load decompresses
+and copies each array. An `.nnm` file is laid out so a load is one `mmap`:
+
+    b"NNMODEL1" | uint64 header length | JSON header | pad | blob | pad | blob ...
+
+* The JSON header holds every scalar field (architecture, mode_id, dtype,
+  optimizer name / timestep, norm method) plus, per array, its byte
+  offset / shape / dtype.
+* Arrays (the flat `params` buffer, `opt_*` slots, `norm_*` stats) start on
+  64-byte boundaries, so the mapped views are aligned for SIMD loads.
+* `read_model()` maps the file once; every array is a view into that
+  mapping - no copy, and all processes serving the same file share the
+  page-cache pages. `mode="c"` (copy-on-write) gives writable views for
+  training without touching the file.
+* Field names match the `.npz` layout, so `load_full_model` reads both the
+  same way. `convert_npz()` / `python -m utils.model_format a.npz ...`
+  converts existing models.
+* Files are written to a temp name and `os.replace`d, so a reader that
+  still maps the old file keeps valid pages.
+"""
+from __future__ import annotations
+import json
+import os
+import numpy as np
+
+MAGIC = b"NNMODEL1"
+ALIGN = 64
+EXT = ".nnm"
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def _scalar(v):
+    """JSON-friendly python value for a 0-d field."""
+    v = v.item() if isinstance(v, np.ndarray | np.generic) else v
+    return v
+
+
+def write_model(path: str, fields: dict) -> str:
+    """Write `fields` (scalars -> header, >=1-d arrays -> aligned blobs)."""
+    header, arrays = {"format": 1, "arrays": {}}, []
+    offset = 0
+    for k, v in fields.items():
+        if isinstance(v, np.ndarray) and v.ndim >= 1:
+            a = np.ascontiguousarray(v)
+            header["arrays"][k] = {"offset": offset, "shape": list(a.shape), "dtype": a.dtype.str}
+            arrays.append(a)
+            offset += a.nbytes + _pad(a.nbytes)
+        else:
+            header[k] = _scalar(v)
+
+    head = json.dumps(header).encode()
+    prefix = len(MAGIC) + 8 + len(head)
+    data_start = prefix + _pad(prefix)
+    header_len = data_start - len(MAGIC) - 8          # header is space-padded up to the blob start
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(header_len).tobytes())
+        f.write(head.ljust(header_len))
+        for a in arrays:
+            f.write(a.tobytes())
+            f.write(b"\0" * _pad(a.nbytes))
+    os.replace(tmp, path)
+    return path
+
+
+class ModelFile:
+    """Read-only mapping over an `.nnm` file, shaped like the `np.load` result of an `.npz`."""
+
+    def __init__(self, path: str, mode: str = "r") -> None:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an .nnm model file")
+            header_len = int(np.frombuffer(f.read(8), np.uint64)[0])
+            self.header = json.loads(f.read(header_len))
+        base = len(MAGIC) + 8 + header_len
+        self._mm = np.memmap(path, dtype=np.uint8, mode=mode) if self.header["arrays"] else None
+        self._arrays = {}
+        for k, spec in self.header["arrays"].items():
+            dt = np.dtype(spec["dtype"])
+            n = int(np.prod(spec["shape"], dtype=np.int64)) * dt.itemsize
+            lo = base + spec["offset"]
+            self._arrays[k] = self._mm[lo: lo + n].view(dt).reshape(spec["shape"])
+        self._scalars = {k: v for k, v in self.header.items() if k not in ("arrays", "format")}
+        self.files = list(self._scalars) + list(self._arrays)
+
+    def __contains__(self, k):
+        return k in self._scalars or k in self._arrays
+
+    def __getitem__(self, k):
+        if k in self._arrays:
+            return self._arrays[k]
+        return np.asarray(self._scalars[k])           # 0-d like np.load, so int(...) / str(...) work
+
+
+def read_model(path: str, mode: str = "r") -> ModelFile:
+    """Map an `.nnm` file; `mode="r"` read-only views, `"c"` copy-on-write views."""
+    return ModelFile(path, mode)
+
+
+def convert_npz(npz_path: str, out_path: str | None = None) -> str:
+    """Rewrite an existing `.npz` model as `.nnm` (same fields, same dtypes).
+
+    Files from before the flat buffer (per-layer `W{i}` / `b{i}`, no `dtype`) are upgraded on
+    the way - packed into `params` as [W0 | b0 | W1 | b1 | ...], `dtype` = float64 - since the
+    `.nnm` loaders map `params` directly."""
+    out_path = out_path or os.path.splitext(npz_path)[0] + EXT
+    with np.load(npz_path) as data:
+        fields = {k: data[k] for k in data.files}
+    if "params" not in fields and "W0" in fields:
+        layers = range(int(fields["n_hidden"]) + 1)
+        fields["params"] = np.concatenate([fields.pop(f"{k}{i}").ravel() for i in layers for k in "Wb"])
+    fields.setdefault("dtype", np.dtype(np.float64).name)      # pre-dtype files are float64
+    return write_model(out_path, fields)
+
+
+if __name__ == "__main__":
+    import sys
+    for p in sys.argv[1:]:
+        print(f"{p} -> {convert_npz(p)}")
@@ -1,50 +1,102 @@
+import os
 import numpy as np
 from models.network import NeuralNetwork
+from models.inference import InferenceModel
 from utils.config import MODES
-from utils.winit import random_init
-
-def load_full_model(filename):
-    load_path = os.path.join("saved_models", filename)
-    data = np.load(load_path)
-
-    #gather NN attributes from previously saved file
-    input_size = int(data["input_size"])
-    hidden_size = int(data["hidden_size"])
-    num_layers = int(data["num_layers"])
-    dropout_rate = float(data["dropout_rate"])
-    optimizer_choice = int(data["optimizer_choice"])
-    mode_id = int(data["mode_id"])
-    bsize = int(data["batch_size"])
-    output_size = int(data["output_size"])
-
-    config = MODES[mode_id] 
-
-    #create an instance of the NeuralNetwork class with the following attributes
-    network = NeuralNetwork(
-        input_size=input_size,
-        hidden_size=hidden_size,
-        num_layers=num_layers,
-        output_size=output_size,
-        config=config,
-        dropout_rate=dropout_rate,
-        init_fn=random_init,
-        optimizer_choice=optimizer_choice
+from utils.model_format import EXT as NNM_EXT, ModelFile, read_model
+from utils.checkpoint import CHECKPOINT_DIR, checkpoint_path
+
+MODELS_DIR = "saved_models"
+
+def _open(filename, mode="c", directory=MODELS_DIR):
+    """`.nnm` -> memory-mapped ModelFile, anything else -> np.load'ed `.npz` (same field names)."""
+    path = os.path.join(directory, filename)
+    return read_model(path, mode) if filename.endswith(NNM_EXT) else np.load(path)
+
+def _norm_stats(data, dtype):
+    norm = {"method": str(data["norm_method"]) if "norm_method" in data else "none"}
+    for k in data.files:
+        if k.startswith("norm_") and k != "norm_method":
+            norm[k[len("norm_"):]] = data[k].astype(dtype, copy=False)
+    return norm
+
+def find_base_model(name):
+    """Warm-start source `name` -> `(filename, directory)`: a saved model, else a checkpoint / job id.
+
+    None if neither exists. Checkpoints carry every saved-model field, so both load the same way."""
+    name = os.path.basename(name)
+    if os.path.isfile(os.path.join(MODELS_DIR, name)):
+        return name, MODELS_DIR
+    path = checkpoint_path(name)
+    if os.path.isfile(path):
+        return os.path.basename(path), CHECKPOINT_DIR
+    return None
+
+def load_full_model(filename, with_optimizer=True, directory=MODELS_DIR):
+    data = _open(filename, directory=directory)   # .nnm: copy-on-write map, so training a loaded model never writes the file
+
+    in_dim    = int(data["in_dim"])
+    hid_units = int(data["hid_units"])
+    n_hidden  = int(data["n_hidden"])
+    out_dim   = int(data["out_dim"])
+    mode_id   = int(data["mode_id"])
+    dtype     = np.dtype(str(data["dtype"])) if "dtype" in data else np.dtype(np.float64)  # pre-dtype files are float64
+    config    = MODES[mode_id]
+
+    # stub init that returns zeros so __init__ won’t insert Nones
+    zeros_init = lambda fin, fout, rng=None: np.zeros((fin, fout), dtype=dtype)
+
+    net = NeuralNetwork(
+        input_dim=in_dim,
+        hidden_units=hid_units,
+        hidden_layers_count=n_hidden,
+        output_dim=out_dim,
+        mode_cfg=config,
+        dropout_rate=0.0,
+        init_fn=zeros_init,      # <— use zeros here
+        optimizer_choice=str(data["optimizer"]) if with_optimizer and "optimizer" in data else 1,
+        use_scheduler=False,
+        learn_rate=0.0,
+        dtype=dtype,
     )
 
-    #basically build back up the network with for loops
-    for layer_index, layer in enumerate(network.hidden_layers):
-        for neuron_index, neuron in enumerate(layer):
-            key_w = f"hidden_{layer_index}_{neuron_index}_weights"
-            key_b = f"hidden_{layer_index}_{neuron_index}_bias"
-            neuron.weights = data[key_w]
-            neuron.bias = data[key_b]
+    # overwrite with your real trained params (flat buffer, or per-layer W{i}/b{i} in older files)
+    if isinstance(data, ModelFile):
+        net.params = data["params"]             # zero-copy view into the mapped file
+        net._bind_views()
+    elif "params" in data:
+        net.params[...] = data["params"]
+    else:
+        net.set_params([data[f"W{i}"] for i in range(n_hidden + 1)],
+                       [data[f"b{i}"] for i in range(n_hidden + 1)])
+
+    # optimizer timestep / moments, if they were saved (otherwise allocated lazily on the first step)
+    opt_state = {k[len("opt_"):]: data[k].astype(dtype, copy=False) for k in data.files if k.startswith("opt_")}
+    if opt_state and with_optimizer:
+        net.optimizer.load_state_dict(opt_state)
+
+    # pull norm metadata
+    norm = _norm_stats(data, dtype)
+    net.norm_method = norm["method"]
+    if net.norm_method == "max":
+        net.norm_max = norm["max"]
+    elif net.norm_method == "zscore":
+        net.norm_mean = norm["mean"]
+        net.norm_std  = norm["std"]
 
-    for i, neuron in enumerate(network.output_layer):
-        neuron.weights = data[f"output_{i}_weights"]
-        neuron.bias = data[f"output_{i}_bias"]
+    return net, config
 
 
-    print(f"\nModel loaded from {filename}")
-    print(f"Model Architecture:\n- Input size: {input_size}\n- Hidden layers: {num_layers}\n- Neurons per layer: {hidden_size}\n- Number of output neurons: {output_size}\n- Dropout rate: {dropout_rate}\n- Optimizer: {optimizer_choice}\n- Mode ID: {mode_id}\n- Batch size: {bsize}")
-    
-    return network, config
\ No newline at end of file
+def load_inference_model(filename, chunk_size=None):
+    """Load a saved model straight into a frozen `InferenceModel` (norm stats included)."""
+    if filename.endswith(NNM_EXT):
+        # weights stay read-only views into the page cache, shared by every process serving the file
+        data = _open(filename, mode="r")
+        config = MODES[int(data["mode_id"])]
+        dtype = np.dtype(str(data["dtype"]))
+        dims = [int(data["in_dim"])] + [int(data["hid_units"])] * int(data["n_hidden"]) + [int(data["out_dim"])]
+        model = InferenceModel(data["params"], dims, config["hidden"]["fn"], config["output"]["fn"],
+                               dtype, _norm_stats(data, dtype), chunk_size, copy=False)
+        return model, config
+    net, config = load_full_model(filename, with_optimizer=False)   # optimizer state is never used here
+    return InferenceModel.from_network(net, chunk_size), config
@@ -0,0 +1,180 @@
+"""optimizers.py - flat-buffer optimizers
+=======================================
+Every optimizer updates ONE contiguous parameter buffer from ONE gradient
+buffer of the same shape (the network keeps its per-layer W / b as views into
+them), so a step is a handful of whole-buffer ufunc calls instead of a Python
+loop over layers.
+
+* State buffers (`slots`) are allocated lazily on the first step and only for
+  the optimizers that need them - plain SGD never allocates any.
+* `lr` may be a scalar or an array that broadcasts against the buffer
+  (e.g. one learning rate per stacked model).
+* `state_dict()` / `load_state_dict()` round-trip the timestep and slots.
+"""
+from __future__ import annotations
+import numpy as np
+
+
+class Optimizer:
+    """Base class - subclasses implement `_update(params, grads, lr, tmp)`."""
+
+    name = "base"
+    slots: tuple[str, ...] = ()
+
+    def __init__(self) -> None:
+        self.t = 0            # number of steps taken
+        self.state = {}       # slot name -> buffer shaped like params
+        self._tmp = None      # scratch shaped like params
+
+    def _slot(self, name, like):
+        buf = self.state.get(name)
+        if buf is None or buf.shape != like.shape or buf.dtype != like.dtype:
+            buf = self.state[name] = np.zeros_like(like)
+        return buf
+
+    def step(self, params, grads, lr):
+        if self._tmp is None or self._tmp.shape != params.shape or self._tmp.dtype != params.dtype:
+            self._tmp = np.empty_like(params)
+        self.t += 1
+        self._update(params, grads, lr, self._tmp)
+
+    def _update(self, params, grads, lr, tmp):
+        raise NotImplementedError
+
+    # -------- (de)serialisation
+    def state_dict(self) -> dict:
+        return {"name": self.name, "t": self.t, **{k: v for k, v in self.state.items()}}
+
+    def load_state_dict(self, d: dict) -> None:
+        self.t = int(d.get("t", 0))
+        for k in self.slots:
+            if k in d and d[k] is not None:
+                self.state[k] = np.array(d[k])
+
+
+class SGD(Optimizer):
+    name = "sgd"
+
+    def _update(self, params, grads, lr, tmp):
+        np.multiply(grads, lr, out=tmp)
+        params -= tmp
+
+
+class Momentum(Optimizer):
+    """Heavy-ball momentum; `nesterov=True` uses the look-ahead form g + mu * v."""
+
+    name = "momentum"
+    slots = ("v",)
+
+    def __init__(self, momentum: float = 0.9, nesterov: bool = False) -> None:
+        super().__init__()
+        self.momentum = momentum
+        self.nesterov = nesterov
+        if nesterov:
+            self.name = "nesterov"
+
+    def _update(self, params, grads, lr, tmp):
+        v = self._slot("v", params)
+        v *= self.momentum
+        v += grads
+        if self.nesterov:
+            np.multiply(v, self.momentum, out=tmp)
+            tmp += grads
+        else:
+            np.copyto(tmp, v)
+        tmp *= lr
+        params -= tmp
+
+
+class RMSprop(Optimizer):
+    name = "rmsprop"
+    slots = ("v",)
+
+    def __init__(self, rho: float = 0.9, eps: float = 1e-8) -> None:
+        super().__init__()
+        self.rho = rho
+        self.eps = eps
+
+    def _update(self, params, grads, lr, tmp):
+        v = self._slot("v", params)
+        v *= self.rho
+        np.square(grads, out=tmp)
+        tmp *= 1 - self.rho
+        v += tmp
+        np.sqrt(v, out=tmp)
+        tmp += self.eps
+        np.divide(grads, tmp, out=tmp)
+        tmp *= lr
+        params -= tmp
+
+
+class Adam(Optimizer):
+    name = "adam"
+    slots = ("m", "v")
+
+    def __init__(self, beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8) -> None:
+        super().__init__()
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+
+    def _update(self, params, grads, lr, tmp):
+        m, v = self._slot("m", params), self._slot("v", params)
+        b1, b2 = self.beta1, self.beta2
+        m *= b1
+        np.multiply(grads, 1 - b1, out=tmp)
+        m += tmp
+        v *= b2
+        np.square(grads, out=tmp)
+        tmp *= 1 - b2
+        v += tmp
+        # m_hat / (sqrt(v_hat) + eps) with both bias corrections folded into scalars
+        np.divide(v, 1 - b2 ** self.t, out=tmp)
+        np.sqrt(tmp, out=tmp)
+        tmp += self.eps
+        np.divide(m, tmp, out=tmp)
+        tmp *= lr / (1 - b1 ** self.t)
+        params -= tmp
+
+
+class AdamW(Adam):
+    """Adam with decoupled weight decay (applied to every parameter, biases included)."""
+
+    name = "adamw"
+
+    def __init__(self, beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8,
+                 weight_decay: float = 1e-2) -> None:
+        super().__init__(beta1, beta2, eps)
+        self.weight_decay = weight_decay
+
+    def _update(self, params, grads, lr, tmp):
+        np.multiply(params, lr * self.weight_decay, out=tmp)
+        params -= tmp
+        super()._update(params, grads, lr, tmp)
+
+
+# optimizer_choice ids used by the UI / TrainRequest (1-3 predate this module)
+OPTIMIZERS = {
+    1: SGD,
+    2: RMSprop,
+    3: Adam,
+    4: Momentum,
+    5: lambda: Momentum(nesterov=True),
+    6: AdamW,
+}
+
+OPTIMIZER_NAMES = {1: "SGD", 2: "RMSProp", 3: "Adam", 4: "Momentum", 5: "Nesterov", 6: "AdamW"}
+
+# `Optimizer.name` -> id, used when rebuilding an optimizer from a saved model
+OPTIMIZER_IDS = {"sgd": 1, "rmsprop": 2, "adam": 3, "momentum": 4, "nesterov": 5, "adamw": 6}
+
+
+def make_optimizer(choice) -> Optimizer:
+    """Build an optimizer from an `optimizer_choice` id or name (or pass an instance through)."""
+    if isinstance(choice, Optimizer):
+        return choice
+    if isinstance(choice, str):
+        choice = OPTIMIZER_IDS.get(choice.lower(), choice)
+    if choice not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer_choice: {choice}")
+    return OPTIMIZERS[choice]()
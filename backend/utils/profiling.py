@@ -0,0 +1,151 @@
+"""profiling.py - opt-in per-phase timers for NeuralNetwork.train
+===============================================================
+`train(profiler=Profiler())` splits the wall time of a run into phases:
+
+    data      - shuffling / gathering / prefetch wait for the next batch
+    forward   - `_forward`
+    metrics   - running-metric accumulation ("running" strategy only)
+    backward  - `_backward`
+    step      - optimizer update
+    eval      - the per-epoch metric pass (training + validation)
+    callback  - convergence checks + `on_epoch_end`
+
+Quick checklist
+---------------
+* Lap timer: `lap(phase)` charges the time since the previous lap to
+  `phase` - one `perf_counter_ns()` per phase boundary, no context managers.
+* With no profiler, train() only pays an `if prof:` test per boundary.
+* `summary()`: seconds / calls / share per phase, samples per second,
+  peak RSS, and (with `trace_memory=True`, which costs real time) the peak
+  traced allocation size from `tracemalloc`.
+* `chrome_trace()` / `export_chrome_trace()`: every phase as a complete
+  ("X") event plus one span per epoch - open in chrome://tracing or
+  Perfetto. At most `max_events` phase events are kept; the summary
+  always covers the whole run.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+PHASES = ("data", "forward", "metrics", "backward", "step", "eval", "callback")
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:                       # not on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+class Profiler:
+    """Phase timers + optional Chrome trace for one training run."""
+
+    def __init__(self, trace: bool = True, max_events: int = 200_000, trace_memory: bool = False) -> None:
+        self.trace = trace
+        self.max_events = max_events
+        self.trace_memory = trace_memory
+        self.totals = dict.fromkeys(PHASES, 0)          # ns
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.events: list[tuple] = []                   # (phase, start ns, duration ns)
+        self.epochs: list[tuple] = []                   # (epoch, start ns, duration ns)
+        self.rows = 0
+        self.dropped_events = 0
+        self._t0 = self._mark = self._epoch_start = self._end = None
+        self._own_tracemalloc = False
+        self.peak_traced = None
+
+    # -------- recording (called from the training loop)
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._t0 = self._mark = self._epoch_start = time.perf_counter_ns()
+
+    def mark(self):
+        """Restart the lap clock without charging anything."""
+        self._mark = time.perf_counter_ns()
+
+    def lap(self, phase: str, rows: int = 0):
+        now = time.perf_counter_ns()
+        dt = now - self._mark
+        self.totals[phase] += dt
+        self.calls[phase] += 1
+        self.rows += rows
+        if self.trace:
+            if len(self.events) < self.max_events:
+                self.events.append((phase, self._mark, dt))
+            else:
+                self.dropped_events += 1
+        self._mark = now
+
+    def epoch_end(self, epoch: int):
+        now = time.perf_counter_ns()
+        self.epochs.append((epoch, self._epoch_start, now - self._epoch_start))
+        self._epoch_start = self._mark = now
+
+    def stop(self):
+        self._end = time.perf_counter_ns()
+        if self.trace_memory:
+            self.peak_traced = tracemalloc.get_traced_memory()[1]
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+                self._own_tracemalloc = False
+
+    # -------- results
+    def summary(self) -> dict:
+        wall = ((self._end or time.perf_counter_ns()) - self._t0) / 1e9 if self._t0 else 0.0
+        timed = sum(self.totals.values()) / 1e9
+        train_s = sum(self.totals[p] for p in ("data", "forward", "metrics", "backward", "step")) / 1e9
+        phases = {
+            p: {
+                "seconds": self.totals[p] / 1e9,
+                "calls": self.calls[p],
+                "mean_ms": self.totals[p] / 1e6 / self.calls[p] if self.calls[p] else None,
+                "share": self.totals[p] / 1e9 / wall if wall else None,
+            }
+            for p in PHASES if self.calls[p]
+        }
+        return {
+            "wall_seconds": wall,
+            "untimed_seconds": max(0.0, wall - timed),    # lr schedule, history bookkeeping
+            "epochs": len(self.epochs),
+            "samples": self.rows,
+            "samples_per_sec": self.rows / train_s if train_s else None,
+            "epochs_per_sec": len(self.epochs) / wall if wall else None,
+            "phases": phases,
+            "peak_rss_mb": _peak_rss_mb(),
+            "peak_traced_mb": None if self.peak_traced is None else self.peak_traced / 2**20,
+            "trace_events": len(self.events),
+            "dropped_trace_events": self.dropped_events,
+        }
+
+    def chrome_trace(self) -> dict:
+        """Chrome trace-event JSON (timestamps in microseconds from the start of the run)."""
+        pid, tid = os.getpid(), threading.get_ident() % 2**31
+        t0 = self._t0 or 0
+        events = [
+            {"name": "epoch", "cat": "epoch", "ph": "X", "pid": pid, "tid": 0,
+             "ts": (s - t0) / 1e3, "dur": d / 1e3, "args": {"epoch": e}}
+            for e, s, d in self.epochs
+        ]
+        events += [
+            {"name": p, "cat": "phase", "ph": "X", "pid": pid, "tid": tid, "ts": (s - t0) / 1e3, "dur": d / 1e3}
+            for p, s, d in self.events
+        ]
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "epochs"}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": "train loop"}},
+        ]
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms", "otherData": {"summary": self.summary()}}
+
+    def export_chrome_trace(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        return path
@@ -1,6 +1,8 @@
 import numpy as np
+from models.inference import InferenceModel
 
 def test_model_loop(network, config):
+    model = InferenceModel.from_network(network)   # applies the saved norm stats
     while True:
         print("\nPaste your test data here (each line is a sample, comma-separated values).")
         print("When you're done, enter an empty line to finish:")
@@ -14,12 +16,9 @@ def test_model_loop(network, config):
             print("No test data entered. Exiting test loop.")
             break
         test_data = np.array([[float(value.strip()) for value in line.split(',')] for line in test_data_lines])
-        if config.get("normalize"):
-            test_data = test_data / 10.0
 
         print("\nModel predictions:")
-        for sample in test_data:
-            prediction = network.feedforward(sample)
+        for sample, prediction in zip(test_data, model.predict(test_data)):
             print(f"Input: {sample} so prediction: {prediction}")
 
         again = input("\nWould you like to test more data? (y/n): ").strip().lower()
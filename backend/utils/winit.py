@@ -1,10 +1,15 @@
 import numpy as np
 
-def he_init(fan_in, fan_out):
-    return np.random.randn(fan_in, fan_out) * np.sqrt(2. / fan_in)
+# `rng` is an np.random.Generator (the network passes its own); None falls back to the global RNG
 
-def xavier_init(fan_in, fan_out):
-    return np.random.randn(fan_in, fan_out) * np.sqrt(1. / fan_in)
+def _normal(fan_in, fan_out, rng):
+    return (np.random if rng is None else rng).standard_normal((fan_in, fan_out))
 
-def random_init(fan_in, fan_out):
-    return np.random.randn(fan_in, fan_out) * 0.01
\ No newline at end of file
+def he_init(fan_in, fan_out, dtype=np.float64, rng=None):
+    return (_normal(fan_in, fan_out, rng) * np.sqrt(2. / fan_in)).astype(dtype, copy=False)
+
+def xavier_init(fan_in, fan_out, dtype=np.float64, rng=None):
+    return (_normal(fan_in, fan_out, rng) * np.sqrt(1. / fan_in)).astype(dtype, copy=False)
+
+def random_init(fan_in, fan_out, dtype=np.float64, rng=None):
+    return (_normal(fan_in, fan_out, rng) * 0.01).astype(dtype, copy=False)
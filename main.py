@@ -1,10 +1,12 @@
 import numpy as np
 from models.network import NeuralNetwork
+from models.inference import InferenceModel
 from utils.activation import sigmoid, deriv_sig, tanh, deriv_tanh, relu, deriv_relu #imports all activation functions
 from utils.loss import mse_loss, bce_loss  #imports all loss functions
 from utils.winit import random_init, xavier_init, he_init
 from utils.config import clipped_bce_grad, MODES
 from utils.testing import test_model_loop
+from utils.model_loader import load_full_model
 import os
 
 WEIGHT_INITS = {
@@ -13,54 +15,8 @@ WEIGHT_INITS = {
     3: he_init,
 }
 
-def load_full_model(filename):
-    data = np.load(os.path.join("saved_models", filename))
-
-    in_dim    = int(data["in_dim"])
-    hid_units = int(data["hid_units"])
-    n_hidden  = int(data["n_hidden"])
-    out_dim   = int(data["out_dim"])
-    mode_id   = int(data["mode_id"])
-    config    = MODES[mode_id]
-
-    # stub init that returns zeros so __init__ won’t insert Nones
-    zeros_init = lambda fin, fout: np.zeros((fin, fout), dtype=np.float64)
-
-    net = NeuralNetwork(
-        input_dim=in_dim,
-        hidden_units=hid_units,
-        hidden_layers_count=n_hidden,
-        output_dim=out_dim,
-        mode_cfg=config,
-        dropout_rate=0.0,
-        init_fn=zeros_init,      # <— use zeros here
-        optimizer_choice=1,
-        use_scheduler=False,
-        learn_rate=0.0,
-    )
-
-    # overwrite with your real trained params
-    net.weights = [data[f"W{i}"] for i in range(n_hidden + 1)]
-    net.biases  = [data[f"b{i}"] for i in range(n_hidden + 1)]
-
-    # rebuild optimizer state arrays to match shapes
-    net.state = [
-        {"m": np.zeros(W.shape), "v": np.zeros(W.shape),
-         "mb": np.zeros(b.shape), "vb": np.zeros(b.shape)}
-        for W, b in zip(net.weights, net.biases)
-    ]
-
-       # pull norm metadata
-    net.norm_method = data.get("norm_method", "none")
-    if net.norm_method == "max":
-        net.norm_max = data["norm_max"]
-    elif net.norm_method == "zscore":
-        net.norm_mean = data["norm_mean"]
-        net.norm_std  = data["norm_std"]
-
-    return net, config
-
 def test_model_loop(network):
+    model = InferenceModel.from_network(network)   # frozen forward pass, no dropout
     while True:
         print("Paste samples, blank line when done (or 'q' to quit):")
         lines = []
@@ -82,8 +38,7 @@ def test_model_loop(network):
             continue
 
         print("\n=== Predictions ===")
-        X = network._apply_norm(X)            # <- normalize w/ saved stats
-        probs = network.predict(X)
+        probs = model.predict(X)              # <- normalizes w/ saved stats
 
         binary = network.out_dim == 1
         for i, p in enumerate(probs, 1):